@@ -0,0 +1,58 @@
+# coding: utf-8
+"""
+benchmarks.bench_codec
+----------------------------------
+
+Microbenchmark of installed JSON codecs on realistic order payloads,
+compared with previous path (json.dumps to str, then encode by requests).
+
+    python -m benchmarks.bench_codec --items 20 --number 2000
+"""
+
+import argparse
+import json
+import timeit
+
+from readycloud import codec
+
+from .fakeserver import make_order
+
+
+def get_codecs():
+    codecs = [codec.JSONCodec()]
+    for codec_class in (codec.OrjsonCodec, codec.UjsonCodec):
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            pass
+    return codecs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--page', type=int, default=100)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    order = make_order(1, items=args.items)
+    page = json.dumps({'count': args.page,
+                       'results': [make_order(i, items=args.items)
+                                   for i in range(args.page)]}).encode('utf-8')
+    print('order body {0} bytes, page {1} bytes'.format(
+        len(json.dumps(order)), len(page)))
+
+    def report(name, dumps, loads):
+        encode = timeit.timeit(lambda: dumps(order), number=args.number) / args.number
+        decode = timeit.timeit(lambda: loads(page), number=args.number // 10) / (args.number // 10)
+        print('{0:<10} encode order {1:8.2f} us   decode page {2:8.2f} us'.format(
+            name, encode * 1e6, decode * 1e6))
+
+    report('baseline', lambda data: json.dumps(data).encode('utf-8'),
+           lambda content: json.loads(content.decode('utf-8')))
+    for instance in get_codecs():
+        report(instance.name, instance.dumps, instance.loads)
+
+
+if __name__ == '__main__':
+    main()
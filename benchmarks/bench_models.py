@@ -0,0 +1,74 @@
+# coding: utf-8
+"""
+benchmarks.bench_models
+----------------------------------
+
+Memory and attribute access time of orders kept as compact models
+compared with plain dicts returned by the client.
+
+    python -m benchmarks.bench_models --orders 100000 --items 5
+"""
+
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+
+from readycloud.models import Order
+
+from .fakeserver import make_order
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return records, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=5)
+    parser.add_argument('--number', type=int, default=1000000)
+    args = parser.parse_args()
+
+    page = json.dumps([dict(make_order(i, args.items), email='customer{0}@example.com'.format(i),
+                            shipping_address={'city': 'Springfield', 'zip': '12345'})
+                       for i in range(args.orders)]).encode('utf-8')
+    print('{0} orders, {1} line items each, JSON {2:.1f} MB'.format(
+        args.orders, args.items, len(page) / 1e6))
+
+    dicts, dicts_size = measure(lambda: json.loads(page))
+    models, models_size = measure(lambda: list(Order.many(json.loads(page))))
+    print('dicts  {0:8.1f} MB  {1:6.0f} B/order'.format(dicts_size / 1e6,
+                                                        dicts_size / args.orders))
+    print('models {0:8.1f} MB  {1:6.0f} B/order'.format(models_size / 1e6,
+                                                        models_size / args.orders))
+
+    order_dict, order = dicts[0], models[0]
+
+    def report(name, func):
+        seconds = timeit.timeit(func, number=args.number) / args.number
+        print('{0:<32} {1:8.1f} ns'.format(name, seconds * 1e9))
+
+    report('dict scalar field', lambda: order_dict['status'])
+    report('model scalar field', lambda: order.status)
+    report('dict nested field', lambda: order_dict['items'])
+    order.items
+    report('model nested field (decoded)', lambda: order.items)
+
+    def first_access():
+        order.release()
+        return order.items
+
+    seconds = timeit.timeit(first_access, number=args.number // 100) / (args.number // 100)
+    print('{0:<32} {1:8.1f} ns'.format('model nested field (first)', seconds * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# coding: utf-8
+"""
+benchmarks.bench_overhead
+----------------------------------
+
+Client-side overhead of API calls, measured with in-memory transport so
+network doesn't add noise: headers, encoding, instrumentation, response
+checks and decoding.
+
+    python -m benchmarks.bench_overhead --number 20000 --items 5
+"""
+
+import argparse
+import json
+import timeit
+
+from readycloud import ReadyCloud
+from readycloud.instrumentation import MetricsCollector
+from readycloud.transport import InMemoryTransport, build_response
+
+from .fakeserver import make_order
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--items', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    order = make_order(1, args.items)
+    page = json.dumps({'count': args.page_size,
+                       'results': [make_order(i, args.items)
+                                   for i in range(args.page_size)]}).encode('utf-8')
+    created = json.dumps(order).encode('utf-8')
+
+    def handler(request):
+        if request.method == 'GET' and request.path.endswith('/orders/'):
+            return build_response(200, page)
+        return build_response(201, created)
+
+    transport = InMemoryTransport(handler)
+    clients = [
+        ('plain', ReadyCloud(token='token', org_id='org', transport=transport)),
+        ('metrics', ReadyCloud(token='token', org_id='org', transport=transport,
+                               listeners=[MetricsCollector()])),
+    ]
+    print('{0:<10} {1:<12} {2:>12}'.format('client', 'call', 'us/call'))
+    for name, rc in clients:
+        calls = [
+            ('get_order', lambda: rc.get(rc.get_order_url(1), params={})),
+            ('get_orders', lambda: rc.get_orders(limit=args.page_size)),
+            ('create', lambda: rc.create_order(order)),
+        ]
+        for call_name, call in calls:
+            number = args.number if call_name != 'get_orders' else args.number // 10
+            seconds = min(timeit.repeat(call, number=number, repeat=3))
+            print('{0:<10} {1:<12} {2:>12.1f}'.format(name, call_name,
+                                                      seconds / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
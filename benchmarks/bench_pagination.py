@@ -0,0 +1,51 @@
+# coding: utf-8
+"""
+benchmarks.bench_pagination
+----------------------------------
+
+Compare time to export all orders page by page, with background prefetch
+and with parallel fan-out, against fake server with artificial latency.
+
+    python -m benchmarks.bench_pagination --orders 5000 --latency 0.05 --workers 8
+"""
+
+import argparse
+import time
+
+from readycloud import ReadyCloud
+
+from .fakeserver import FakeReadyCloudServer
+
+
+def run(rc, **kwargs):
+    started = time.time()
+    count = 0
+    for _ in rc.iter_orders(**kwargs):
+        count += 1
+    return count, time.time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    with FakeReadyCloudServer(latency=args.latency, orders=args.orders) as server:
+        with ReadyCloud(token='token', host=server.url, org_id='1',
+                        pool_maxsize=args.workers) as rc:
+            modes = [
+                ('sequential', dict(prefetch=0)),
+                ('prefetch', dict(prefetch=2)),
+                ('parallel x{0}'.format(args.workers), dict(workers=args.workers)),
+            ]
+            for name, kwargs in modes:
+                count, elapsed = run(rc, limit=args.limit, **kwargs)
+                print('{0:<14} {1} orders in {2:6.2f}s ({3:8.1f} orders/s)'.format(
+                    name, count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
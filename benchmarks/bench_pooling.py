@@ -0,0 +1,69 @@
+# coding: utf-8
+"""
+benchmarks.bench_pooling
+----------------------------------
+
+Compare requests/sec of ReadyCloud with pooled keep-alive session against
+a new connection per request (old module-level ``requests.*`` behaviour).
+
+    python -m benchmarks.bench_pooling --requests 2000 --threads 4
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from readycloud import ReadyCloud
+
+from .fakeserver import FakeReadyCloudServer
+
+
+class NoPoolSession(object):
+    """
+    Session-like object which opens a new connection for every request.
+    """
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+    def close(self):
+        pass
+
+
+def run(rc, total, threads):
+    per_thread = total // threads
+
+    def worker():
+        for _ in range(per_thread):
+            rc.get_orders(limit=1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.time()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads / (time.time() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    with FakeReadyCloudServer() as server:
+        pooled = ReadyCloud(token='token', host=server.url, org_id='1',
+                            pool_maxsize=args.threads)
+        unpooled = ReadyCloud(token='token', host=server.url, org_id='1',
+                              session=NoPoolSession())
+        run(pooled, args.threads * 10, args.threads)  # warm up
+        with pooled:
+            print('pooled:   {0:8.1f} req/s'.format(run(pooled, args.requests, args.threads)))
+        print('unpooled: {0:8.1f} req/s'.format(run(unpooled, args.requests, args.threads)))
+
+
+if __name__ == '__main__':
+    main()
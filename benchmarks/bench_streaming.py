@@ -0,0 +1,72 @@
+# coding: utf-8
+"""
+benchmarks.bench_streaming
+----------------------------------
+
+Compare peak RSS of reading one big page of orders with get_orders
+(buffered) and stream_orders (incremental decoding). Every mode runs in
+its own process, so peaks don't affect each other.
+
+    python -m benchmarks.bench_streaming --orders 20000 --items 10
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+from readycloud import ReadyCloud
+
+from .fakeserver import FakeReadyCloudServer
+
+
+def peak_rss_mb():
+    # ru_maxrss survives exec, so it includes peak of forking parent,
+    # VmHWM is reset for new process image
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child(mode, url, orders):
+    rc = ReadyCloud(token='token', host=url, org_id='1')
+    baseline = peak_rss_mb()
+    started = time.time()
+    count = 0
+    if mode == 'buffered':
+        for order in rc.get_orders(limit=orders)['results']:
+            count += 1
+    else:
+        with rc.stream_orders(limit=orders) as page:
+            for order in page:
+                count += 1
+    print('{0:<9} {1} orders in {2:6.2f}s, peak RSS {3:7.1f} MB (+{4:.1f} MB)'.format(
+        mode, count, time.time() - started, peak_rss_mb(), peak_rss_mb() - baseline))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--items', type=int, default=10)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.orders)
+        return
+
+    with FakeReadyCloudServer(orders=args.orders, max_page_size=args.orders,
+                              items_per_order=args.items) as server:
+        for mode in ('buffered', 'streaming'):
+            subprocess.check_call([sys.executable, '-m', 'benchmarks.bench_streaming',
+                                   '--orders', str(args.orders), '--child', mode, server.url])
+
+
+if __name__ == '__main__':
+    main()
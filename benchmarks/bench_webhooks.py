@@ -0,0 +1,130 @@
+# coding: utf-8
+"""
+benchmarks.bench_webhooks
+----------------------------------
+
+Throughput of WebhookReceiver: deliveries are posted to WSGI application
+from several threads and to ASGI application from asyncio tasks, without
+network, so the numbers show receiver overhead. Rejected (503)
+deliveries are redelivered after a pause, like ReadyCloud does.
+Acknowledge rate, end-to-end rate (until handler got every payload) and
+number of rejections are reported.
+
+    python -m benchmarks.bench_webhooks --deliveries 50000 --threads 8
+    python -m benchmarks.bench_webhooks --handler-delay 0.01 --max-queue 1000
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import threading
+import time
+
+from readycloud.webhooks import WebhookReceiver
+
+from .fakeserver import make_order
+
+
+def make_receiver(args):
+    def handler(events):
+        if args.handler_delay:
+            time.sleep(args.handler_delay)
+
+    return WebhookReceiver(handler, batch_size=args.batch_size, max_queue=args.max_queue,
+                           workers=args.workers)
+
+
+def bench_wsgi(args, body):
+    receiver = make_receiver(args)
+    per_thread = args.deliveries // args.threads
+
+    def post():
+        statuses = []
+        for _ in range(per_thread):
+            while True:
+                receiver({'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': str(len(body)),
+                          'wsgi.input': io.BytesIO(body)},
+                         lambda status, headers: statuses.append(status))
+                if not statuses.pop().startswith('503'):
+                    break
+                time.sleep(args.redelivery_delay)
+
+    threads = [threading.Thread(target=post) for _ in range(args.threads)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    acknowledged = time.time() - started
+    receiver.stop()
+    return report('wsgi', receiver, per_thread * args.threads, acknowledged,
+                  time.time() - started)
+
+
+def bench_asgi(args, body):
+    receiver = make_receiver(args)
+    scope = {'type': 'http', 'method': 'POST'}
+    message = {'type': 'http.request', 'body': body}
+
+    async def receive():
+        return message
+
+    async def post(count):
+        statuses = []
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        for _ in range(count):
+            while True:
+                await receiver.asgi(scope, receive, send)
+                if statuses.pop() != 503:
+                    break
+                await asyncio.sleep(args.redelivery_delay)
+
+    async def main():
+        per_task = args.deliveries // args.threads
+        await asyncio.gather(*[post(per_task) for _ in range(args.threads)])
+        return per_task * args.threads
+
+    started = time.time()
+    deliveries = asyncio.run(main())
+    acknowledged = time.time() - started
+    receiver.stop()
+    return report('asgi', receiver, deliveries, acknowledged, time.time() - started)
+
+
+def report(name, receiver, deliveries, acknowledged, total):
+    stats = receiver.stats
+    print('{0}: {1} deliveries, ack {2:.0f}/s, end-to-end {3:.0f}/s, '
+          'processed {4}, rejected {5}, batches {6}'.format(
+              name, deliveries, deliveries / acknowledged, stats['processed'] / total,
+              stats['processed'], stats['rejected'], stats['batches']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--deliveries', type=int, default=50000)
+    parser.add_argument('--threads', type=int, default=8, help='posting threads (tasks)')
+    parser.add_argument('--items', type=int, default=5, help='line items per order')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--max-queue', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--handler-delay', type=float, default=0,
+                        help='time (seconds) handler spends on a batch')
+    parser.add_argument('--redelivery-delay', type=float, default=0.001,
+                        help='pause (seconds) before redelivery of rejected delivery')
+    args = parser.parse_args()
+
+    body = json.dumps({'entity': 'orders', 'action': 'update',
+                       'data': make_order(1, args.items)}).encode('utf-8')
+    print('payload {0} bytes'.format(len(body)))
+    bench_wsgi(args, body)
+    bench_asgi(args, body)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,363 @@
+# coding: utf-8
+"""
+benchmarks.fakeserver
+----------------------------------
+
+Local stand-in for ReadyCloud API, used by benchmarks.
+
+Implements orders (v1 and v2), webhooks and organizations endpoints with
+limit/offset pagination, ETag revalidation, configurable latency, page
+size, payload size and error injection. Can be run standalone:
+
+    python -m benchmarks.fakeserver --port 8000 --orders 10000 --latency 0.01
+"""
+
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qs
+
+
+def make_order(number, items=0):
+    """
+    Build fake order.
+
+    :param int number: order number
+    :param int items: number of line items
+    :returns: dict -- order
+    """
+    return {
+        'id': number,
+        'number': 'RC-{0:08d}'.format(number),
+        'status': 'new',
+        'message': 'Order {0}'.format(number),
+        'items': [{
+            'sku': 'SKU-{0:06d}'.format(item),
+            'description': 'Line item {0} of order {1}'.format(item, number),
+            'quantity': item % 5 + 1,
+            'price': '{0}.99'.format(item % 100),
+        } for item in range(items)],
+    }
+
+
+class FakeStore(object):
+    """
+    Thread-safe in-memory data of fake server.
+
+    First ``orders`` orders are generated on the fly, so big stores don't
+    take memory. Created and updated orders are kept in memory.
+    """
+
+    def __init__(self, orders=0, items_per_order=0, organizations=3):
+        self.generated = orders
+        self.items_per_order = items_per_order
+        self.orders = {}
+        self.deleted = set()
+        self.webhooks = {}
+        self.organizations = [{'id': str(i), 'name': 'Organization {0}'.format(i)}
+                              for i in range(organizations)]
+        self._ids = itertools.count(orders)
+        self._webhook_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get_order(self, order_id):
+        with self._lock:
+            if order_id in self.deleted:
+                return None
+            if order_id in self.orders:
+                return self.orders[order_id]
+        if 0 <= order_id < self.generated:
+            return make_order(order_id, self.items_per_order)
+        return None
+
+    def list_orders(self, offset, limit):
+        with self._lock:
+            created = sorted(i for i in self.orders if i >= self.generated)
+            total = self.generated + len(created)
+        ids = itertools.chain(range(offset, min(offset + limit, self.generated)),
+                              created[max(0, offset - self.generated):
+                                      max(0, offset + limit - self.generated)])
+        results = [order for order in (self.get_order(i) for i in ids) if order is not None]
+        return total, results
+
+    def save_order(self, order, order_id=None):
+        with self._lock:
+            if order_id is None:
+                order_id = next(self._ids)
+            order = dict(order, id=order_id)
+            self.orders[order_id] = order
+            self.deleted.discard(order_id)
+            return order
+
+    def delete_order(self, order_id):
+        with self._lock:
+            self.orders.pop(order_id, None)
+            self.deleted.add(order_id)
+
+    def save_webhook(self, webhook, webhook_id=None):
+        with self._lock:
+            if webhook_id is None:
+                webhook_id = next(self._webhook_ids)
+            webhook = dict(webhook, id=webhook_id)
+            self.webhooks[webhook_id] = webhook
+            return webhook
+
+    def delete_webhook(self, webhook_id):
+        with self._lock:
+            return self.webhooks.pop(webhook_id, None)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def page(query, total, results_or_fetch, max_page_size):
+    limit = min(int(query.get('limit', ['100'])[0]), max_page_size)
+    offset = int(query.get('offset', ['0'])[0])
+    if callable(results_or_fetch):
+        total, results = results_or_fetch(offset, limit)
+    else:
+        results = results_or_fetch[offset:offset + limit]
+    return {
+        'count': total,
+        'next': None if offset + limit >= total else 'next',
+        'previous': None,
+        'results': results,
+    }
+
+
+class FakeReadyCloudHandler(BaseHTTPRequestHandler):
+    """
+    Keep-alive (HTTP/1.1) handler of fake ReadyCloud API.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        (re.compile(r'^/api/(?:v1|v2/orgs/[^/]+)/orders/$'), 'orders'),
+        (re.compile(r'^/api/(?:v1|v2/orgs/[^/]+)/orders/(\d+)/$'), 'order'),
+        (re.compile(r'^/api/v1/webhooks/$'), 'webhooks'),
+        (re.compile(r'^/api/v1/webhooks/(\d+)/$'), 'webhook'),
+        (re.compile(r'^/api/v2/orgs/$'), 'organizations'),
+        (re.compile(r'^/api/v2/orgs/([^/]+)/$'), 'organization'),
+    ]
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def store(self):
+        return self.server.store
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length).decode('utf-8')) if length else None
+
+    def _respond(self):
+        options = self.server.options
+        body = self._read_body()
+        if options['latency']:
+            time.sleep(options['latency'])
+        if options['error_rate'] and self.server.random.random() < options['error_rate']:
+            return self._send_json(options['error_status'], {'detail': 'Injected error'})
+        url = urlsplit(self.path)
+        for pattern, name in self.ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                handler = getattr(self, '{0}_{1}'.format(self.command.lower(), name), None)
+                if handler is None:
+                    return self._send_json(405, {'detail': 'Method not allowed'})
+                status, payload = handler(parse_qs(url.query), body, *match.groups())
+                return self._send_json(status, payload)
+        self._send_json(404, {'detail': 'Not found'})
+
+    def get_orders(self, query, body):
+        return 200, page(query, None, self.store.list_orders, self.server.options['max_page_size'])
+
+    def post_orders(self, query, body):
+        return 201, self.store.save_order(body)
+
+    def get_order(self, query, body, order_id):
+        order = self.store.get_order(int(order_id))
+        return (200, order) if order else (404, {'detail': 'Not found'})
+
+    def put_order(self, query, body, order_id):
+        return 200, self.store.save_order(body, int(order_id))
+
+    def patch_order(self, query, body, order_id):
+        order = self.store.get_order(int(order_id))
+        if order is None:
+            return 404, {'detail': 'Not found'}
+        return 200, self.store.save_order(dict(order, **body), int(order_id))
+
+    def delete_order(self, query, body, order_id):
+        self.store.delete_order(int(order_id))
+        return 204, None
+
+    def get_webhooks(self, query, body):
+        webhooks = sorted(self.store.webhooks.values(), key=lambda webhook: webhook['id'])
+        return 200, page(query, len(webhooks), webhooks, self.server.options['max_page_size'])
+
+    def post_webhooks(self, query, body):
+        return 201, self.store.save_webhook(body)
+
+    def put_webhook(self, query, body, webhook_id):
+        return 200, self.store.save_webhook(body, int(webhook_id))
+
+    def delete_webhook(self, query, body, webhook_id):
+        if self.store.delete_webhook(int(webhook_id)) is None:
+            return 404, {'detail': 'Not found'}
+        return 204, None
+
+    def get_organizations(self, query, body):
+        organizations = self.store.organizations
+        return 200, page(query, len(organizations), organizations,
+                         self.server.options['max_page_size'])
+
+    def get_organization(self, query, body, org_id):
+        for organization in self.store.organizations:
+            if organization['id'] == org_id:
+                return 200, organization
+        return 404, {'detail': 'Not found'}
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        etag = None
+        if self.command == 'GET' and status == 200:
+            etag = '"{0}"'.format(hashlib.md5(body).hexdigest())
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+        self.send_response(status)
+        if body:
+            self.send_header('Content-Type', 'application/json')
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+
+class FakeReadyCloudServer(object):
+    """
+    Fake ReadyCloud server running in a background thread.
+
+    Usage::
+
+        with FakeReadyCloudServer(latency=0.01) as server:
+            rc = ReadyCloud(token='token', host=server.url, org_id='1')
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, orders=0, max_page_size=1000,
+                 items_per_order=0, organizations=3, error_rate=0, error_status=500, seed=0):
+        """
+        :param str host: interface to bind
+        :param int port: port to bind (0 - pick free one)
+        :param float latency: artificial delay (seconds) before every response
+        :param int orders: number of orders returned by orders endpoint
+        :param int max_page_size: max page size, bigger limits are capped
+        :param int items_per_order: number of line items in every order
+        :param int organizations: number of organizations
+        :param float error_rate: fraction of requests answered with error
+        :param int error_status: status of injected errors
+        :param int seed: random seed for error injection
+        """
+        self.httpd = _ThreadingHTTPServer((host, port), FakeReadyCloudHandler)
+        self.httpd.store = FakeStore(orders=orders, items_per_order=items_per_order,
+                                     organizations=organizations)
+        self.httpd.options = {
+            'latency': latency,
+            'max_page_size': max_page_size,
+            'error_rate': error_rate,
+            'error_status': error_status,
+        }
+        self.httpd.random = random.Random(seed)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{0}:{1}/'.format(host, port)
+
+    @property
+    def store(self):
+        return self.httpd.store
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _serve(queue, options):
+    server = FakeReadyCloudServer(**options)
+    queue.put(server.url)
+    server.httpd.serve_forever()
+
+
+@contextlib.contextmanager
+def serve_in_process(**options):
+    """
+    Run fake server in a separate process, so its CPU and memory don't
+    affect measurements of the client.
+
+    :param dict options: FakeReadyCloudServer arguments
+    :returns: str -- server URL
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(queue, options))
+    process.daemon = True
+    process.start()
+    try:
+        yield queue.get(timeout=30)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--orders', type=int, default=1000)
+    parser.add_argument('--max-page-size', type=int, default=1000)
+    parser.add_argument('--items-per-order', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--error-status', type=int, default=500)
+    args = parser.parse_args()
+    server = FakeReadyCloudServer(host=args.host, port=args.port, latency=args.latency,
+                                  orders=args.orders, max_page_size=args.max_page_size,
+                                  items_per_order=args.items_per_order,
+                                  error_rate=args.error_rate, error_status=args.error_status)
+    print('Serving fake ReadyCloud API on {0}'.format(server.url))
+    server.httpd.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
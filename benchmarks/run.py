@@ -0,0 +1,261 @@
+# coding: utf-8
+"""
+benchmarks.run
+----------------------------------
+
+Benchmark suite. Runs scenarios against fake ReadyCloud server (in a
+separate process) and writes machine-readable results:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scenarios get_order,bulk_create --latency 0.01
+
+For every scenario results contain number of operations, errors, wall
+time, throughput (operations/s), p50/p99 latency of API calls and peak
+memory allocated by the client (tracemalloc, measured in a second pass).
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import readycloud
+from readycloud import ReadyCloud
+from readycloud.retry import RetryPolicy
+
+from .fakeserver import make_order, serve_in_process
+
+
+SCENARIOS = OrderedDict()
+
+
+def scenario(name, **server_options):
+    """
+    Register scenario function. Function accepts client, Stats (to record
+    API call durations and errors to) and config, and returns number of
+    operations.
+
+    :param str name: scenario name
+    :param dict server_options: fake server options for this scenario
+    """
+    def decorator(func):
+        SCENARIOS[name] = (func, server_options)
+        return func
+    return decorator
+
+
+class Stats(object):
+    """
+    API call durations and errors of scenario run.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = []
+
+    def timed(self, func, record_errors=True):
+        """
+        Wrap func to record duration of every call. If record_errors is
+        set, exceptions are recorded and call returns None.
+        """
+        def wrapper(*args, **kwargs):
+            started = time.time()
+            try:
+                return func(*args, **kwargs)
+            except Exception as exc:
+                if not record_errors:
+                    raise
+                self.errors.append(exc)
+            finally:
+                self.latencies.append(time.time() - started)
+        return wrapper
+
+
+@scenario('get_order')
+def get_order(rc, stats, config):
+    get = stats.timed(rc.get)
+    for i in range(config.requests):
+        get(rc.get_order_url(i % config.orders), params={})
+    return config.requests
+
+
+@scenario('get_orders_page')
+def get_orders_page(rc, stats, config):
+    get_orders = stats.timed(rc.get_orders)
+    for i in range(config.requests):
+        get_orders(limit=config.page_size, offset=(i * config.page_size) % config.orders)
+    return config.requests
+
+
+@scenario('create_order')
+def create_order(rc, stats, config):
+    create = stats.timed(rc.create_order)
+    for i in range(config.requests):
+        create(make_order(i, config.items))
+    return config.requests
+
+
+@scenario('iter_orders_sequential')
+def iter_orders_sequential(rc, stats, config):
+    rc.get_orders = stats.timed(rc.get_orders, record_errors=False)
+    return sum(1 for _ in rc.iter_orders(limit=config.page_size, prefetch=1))
+
+
+@scenario('iter_orders_parallel')
+def iter_orders_parallel(rc, stats, config):
+    rc.get_orders = stats.timed(rc.get_orders, record_errors=False)
+    return sum(1 for _ in rc.iter_orders(limit=config.page_size, workers=config.workers))
+
+
+@scenario('bulk_create')
+def bulk_create(rc, stats, config):
+    rc.create_order = stats.timed(rc.create_order, record_errors=False)
+    orders = (make_order(i, config.items) for i in range(config.requests))
+    for result in rc.bulk_create_orders(orders, workers=config.workers, ordered=False):
+        if result.error is not None:
+            stats.errors.append(result.error)
+    return config.requests
+
+
+@scenario('json_heavy_page', items_per_order=50)
+def json_heavy_page(rc, stats, config):
+    get_orders = stats.timed(rc.get_orders)
+    count = 0
+    for _ in range(max(1, config.requests // 10)):
+        page = get_orders(limit=config.heavy_page_size)
+        count += len(page['results']) if page else 0
+    return count
+
+
+@scenario('json_heavy_stream', items_per_order=50)
+def json_heavy_stream(rc, stats, config):
+    def read_page():
+        with rc.stream_orders(limit=config.heavy_page_size) as page:
+            return sum(1 for _ in page)
+
+    read_page = stats.timed(read_page)
+    return sum(read_page() or 0 for _ in range(max(1, config.requests // 10)))
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile.
+
+    :param list values: values
+    :param float percent: percentile (0-100)
+    :returns: float -- percentile or None for empty values
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    index = max(0, int(round(percent / 100.0 * len(values) + 0.5)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def run_scenario(func, url, config, trace_memory=False):
+    rc = ReadyCloud(token='token', host=url, org_id='1', pool_maxsize=config.workers,
+                    retry=RetryPolicy(max_retries=config.retries) if config.retries else None)
+    stats = Stats()
+    error = None
+    if trace_memory:
+        tracemalloc.start()
+    started = time.time()
+    try:
+        operations = func(rc, stats, config)
+    except Exception as exc:
+        operations = 0
+        error = '{0}: {1}'.format(type(exc).__name__, exc)
+    elapsed = time.time() - started
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    rc.close()
+    return operations, stats, elapsed, peak, error
+
+
+def run(config):
+    results = []
+    for name, (func, server_options) in SCENARIOS.items():
+        if config.scenarios and name not in config.scenarios:
+            continue
+        options = {
+            'latency': config.latency,
+            'orders': config.orders,
+            'items_per_order': config.items,
+            'max_page_size': max(config.page_size, config.heavy_page_size),
+            'error_rate': config.error_rate,
+            'error_status': config.error_status,
+        }
+        options.update(server_options)
+        with serve_in_process(**options) as url:
+            operations, stats, elapsed, _, error = run_scenario(func, url, config)
+        peak = None
+        if config.memory:
+            with serve_in_process(**options) as url:
+                peak = run_scenario(func, url, config, trace_memory=True)[3]
+        result = OrderedDict([
+            ('name', name),
+            ('operations', operations),
+            ('api_calls', len(stats.latencies)),
+            ('errors', len(stats.errors)),
+            ('seconds', round(elapsed, 6)),
+            ('throughput', round(operations / elapsed, 3) if elapsed else None),
+            ('p50_ms', _ms(percentile(stats.latencies, 50))),
+            ('p99_ms', _ms(percentile(stats.latencies, 99))),
+            ('peak_memory_bytes', peak),
+            ('error', error),
+        ])
+        sys.stderr.write('{name:<24} {throughput:>10} ops/s  p50 {p50_ms} ms  '
+                         'p99 {p99_ms} ms  errors {errors}  peak {peak_memory_bytes} B{0}\n'.format(
+                             '  ERROR ' + error if error else '', **result))
+        results.append(result)
+    return OrderedDict([
+        ('readycloud_version', readycloud.__version__),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('timestamp', int(time.time())),
+        ('config', OrderedDict(sorted(vars(config).items()))),
+        ('scenarios', results),
+    ])
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', type=lambda value: value.split(','), default=None,
+                        help='comma separated scenarios: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500,
+                        help='API calls in per-call scenarios')
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--heavy-page-size', type=int, default=500)
+    parser.add_argument('--items', type=int, default=5, help='line items per order')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0, help='server latency, seconds')
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--retries', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="don't measure peak memory")
+    parser.add_argument('--output', help='write JSON results to file instead of stdout')
+    config = parser.parse_args(argv)
+
+    results = run(config)
+    if config.output:
+        with open(config.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -11,3 +11,5 @@ __email__ = 'tlyapun@trueship.com'
 __version__ = '0.2.0'
 
 from .readycloud import ReadyCloud
+from .aio import AsyncReadyCloud
+from .multiorg import MultiOrgReadyCloud
@@ -0,0 +1,270 @@
+# coding: utf-8
+"""
+readycloud.aio
+----------------------------------
+
+Module which contains asyncio ReadyCloud client. Requires aiohttp.
+"""
+
+import asyncio
+import json
+import time
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .decorators import check_response
+from .instrumentation import RequestEvent
+from .readycloud import BaseReadyCloud
+from .singleflight import make_key
+
+
+class BufferedResponse(object):
+    """
+    Fully read HTTP response with requests-like interface, so it can be
+    checked the same way as responses of synchronous client.
+    """
+
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class AsyncReadyCloud(BaseReadyCloud):
+    """
+    Class for working with ReadyCloud API from asyncio code.
+
+    Has the same API methods as ReadyCloud, but they return awaitables::
+
+        async with AsyncReadyCloud(token='token', org_id='org') as rc:
+            orders = await rc.get_orders(limit=10)
+    """
+
+    def __init__(self, token, host='https://readycloud.com/', org_id=None,
+                 api=BaseReadyCloud.API_V2, session=None, concurrency=100,
+                 limit_per_host=0, timeout=None, retry=None, rate_limiter=None,
+                 codec=None, listeners=None, compression=None, single_flight=None,
+                 circuit_breaker=None):
+        """
+        :param str token: your bearer token
+        :param str host: host with which you want to work (readycloud.com by default)
+        :param str org_id: hexahexacontadecimal encoded organization id
+        :param str api: api version (v2 by default)
+        :param session: aiohttp.ClientSession to use. If not provided, client
+            creates (and owns) its own session on first request.
+        :param int concurrency: max number of in-flight requests, other
+            requests wait for a free slot
+        :param int limit_per_host: max number of connections per host
+            (0 - limited by concurrency only)
+        :param timeout: total timeout (seconds) for every request
+        :param retry: readycloud.retry.RetryPolicy for failed requests
+            (no retries by default)
+        :param rate_limiter: readycloud.ratelimit.TokenBucket, may be shared
+            with other (including synchronous) clients
+        :param codec: readycloud.codec.JSONCodec for request and response
+            bodies (orjson or ujson if installed, json otherwise)
+        :param listeners: callables which receive
+            readycloud.instrumentation.RequestEvent of every request
+        :param compression: readycloud.compression.Compression of request
+            bodies. Responses are decoded by aiohttp, which advertises
+            encodings it supports itself.
+        :param single_flight: readycloud.singleflight.AsyncSingleFlight
+            which joins identical concurrent GET requests (off by default)
+        :param circuit_breaker: readycloud.circuitbreaker.CircuitBreaker
+            which fails calls to failing endpoints fast, may be shared
+            with other (including synchronous) clients
+        """
+        if aiohttp is None:
+            raise ImportError('aiohttp is required for AsyncReadyCloud')
+        super(AsyncReadyCloud, self).__init__(token, host=host, org_id=org_id, api=api,
+                                              retry=retry, rate_limiter=rate_limiter,
+                                              codec=codec, listeners=listeners,
+                                              compression=compression,
+                                              circuit_breaker=circuit_breaker)
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.single_flight = single_flight
+        self._owns_session = session is None
+        self._session = session
+        self._semaphore = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency,
+                                             limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Close underlying aiohttp session if client owns it.
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method, url, **kwargs):
+        """
+        Send request and read whole response body, waiting for rate limiter
+        and retrying according to retry policy. Request is reported to
+        listeners and circuit breaker.
+
+        :param str method: HTTP method
+        :param str url: URL to which you want to do request
+        :param dict kwargs: extra arguments for aiohttp.ClientSession.request
+        :returns: BufferedResponse -- read response
+        :raises ReadyCloudCircuitOpenError: if circuit of endpoint is open
+        """
+        event = RequestEvent(method, url)
+        admitted = None
+        try:
+            if self.circuit_breaker is not None:
+                admitted = self.circuit_breaker.acquire(url)
+            response = await self._request(method, url, event, **kwargs)
+        except Exception as exc:
+            event.finish(error=exc)
+            raise
+        else:
+            event.finish(response)
+            return response
+        finally:
+            if admitted is not None:
+                self.circuit_breaker.record(event, admitted)
+            self.instrumentation.emit(event)
+
+    async def _request(self, method, url, event, **kwargs):
+        kwargs.setdefault('headers', self.get_headers())
+        self.encode_body(event, kwargs)
+        attempt = 0
+        while True:
+            event.retries = attempt
+            if self.rate_limiter is not None:
+                started = time.time()
+                await self.rate_limiter.acquire_async()
+                event.queue_wait += time.time() - started
+            try:
+                response = await self._send(method, url, event, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                delay = self.get_retry_delay(method, attempt, error=exc)
+                if delay is None:
+                    raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(response)
+                delay = self.get_retry_delay(method, attempt, response=response)
+                if delay is None:
+                    return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _send(self, method, url, event, **kwargs):
+        started = time.time()
+        async with self.semaphore:
+            sent = time.time()
+            event.queue_wait += sent - started
+            async with self.session.request(method, url, **kwargs) as resp:
+                received = time.time()
+                content = await resp.read()
+                event.ttfb = received - sent
+                event.body_read = time.time() - received
+                event.uncompressed_bytes_received = len(content)
+                event.bytes_received = _get_received_size(resp, len(content))
+                return BufferedResponse(resp.status, content, resp.headers)
+
+    async def _call(self, method, url, **kwargs):
+        with self.instrumentation.collect():
+            if method == 'GET' and self.single_flight is not None:
+                key = make_key(url, kwargs.get('params'), self.token)
+                response = await self.single_flight.do(
+                    key, lambda: self.request(method, url, **kwargs))
+            else:
+                response = await self.request(method, url, **kwargs)
+            return self.instrumentation.decode(self._check, response)
+
+    def _check(self, response):
+        return check_response(response, loads=self.codec.loads)
+
+    async def get(self, url, params):
+        """
+        Do GET request to ReadyCloud. Identical requests of other tasks
+        which are in flight are joined, if single_flight is set.
+
+        :param str url: URL to which you want to do request
+        :param dict params: dict with request params
+        :returns: dict -- dictionary with response
+        """
+        return await self._call('GET', url, params=params)
+
+    async def post(self, url, data):
+        """
+        Do POST request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :param dict data: dict with POST data
+        :returns: dict -- dictionary with response
+        """
+        return await self._call('POST', url, data=self.codec.dumps(data))
+
+    async def put(self, url, data):
+        """
+        Do PUT request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :param dict data: dict with data which you want to PUT
+        :returns: dict -- dictionary with response
+        """
+        return await self._call('PUT', url, data=self.codec.dumps(data))
+
+    async def patch(self, url, data):
+        """
+        Do PATCH request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :param dict data: dict with data which you want to PATCH
+        :returns: dict -- dictionary with response
+        """
+        return await self._call('PATCH', url, data=self.codec.dumps(data))
+
+    async def delete(self, url):
+        """
+        Do DELETE request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :returns: dict -- dictionary with response
+        """
+        return await self._call('DELETE', url)
+
+
+def _get_received_size(resp, size):
+    # aiohttp decodes body before it's read, size of encoded body is known
+    # only from Content-Length
+    if resp.headers.get('Content-Encoding', 'identity') == 'identity':
+        return size
+    length = resp.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
@@ -0,0 +1,52 @@
+# coding: utf-8
+"""
+readycloud.bulk
+----------------------------------
+
+Module with helpers for bulk operations.
+"""
+
+from collections import namedtuple
+
+from .concurrency import imap_bounded
+
+
+class BulkResult(namedtuple('BulkResult', ['index', 'item', 'response', 'error'])):
+    """
+    Result of one operation of bulk call.
+
+    :ivar int index: position of item in input iterable
+    :ivar item: item passed to bulk call
+    :ivar dict response: deserialized response (None if error was raised)
+    :ivar Exception error: exception raised by the call (None if response
+        was received, including 4xx responses)
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None and bool(self.response.get('ok'))
+
+
+def run_bulk(func, items, workers=8, ordered=True):
+    """
+    Call func for every item with bounded parallelism and yield BulkResult
+    for every item. Errors of one call don't stop the others.
+
+    :param func: callable which accepts one item and returns deserialized
+        response
+    :param items: iterable or generator of items, consumed lazily
+    :param int workers: number of concurrent calls
+    :param bool ordered: yield results in order of items, otherwise as soon
+        as they are ready
+    :returns: generator -- BulkResult per item
+    """
+    def call(indexed):
+        index, item = indexed
+        try:
+            return BulkResult(index, item, func(item), None)
+        except Exception as exc:
+            return BulkResult(index, item, None, exc)
+
+    return imap_bounded(call, enumerate(items), workers=workers, ordered=ordered)
@@ -0,0 +1,183 @@
+# coding: utf-8
+"""
+readycloud.cache
+----------------------------------
+
+Module which contains HTTP response cache for GET requests.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+# nearly static endpoints: organizations and webhooks
+DEFAULT_TTLS = [
+    (r'/api/v2/orgs/$', 300),
+    (r'/api/v2/orgs/[^/]+/$', 300),
+    (r'/api/v1/webhooks/', 60),
+]
+
+
+class CacheEntry(object):
+    """
+    Cached response with its validators.
+    """
+
+    __slots__ = ('url', 'response', 'etag', 'last_modified', 'expires')
+
+    def __init__(self, url, response, expires):
+        self.url = url
+        self.response = response
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.expires = expires
+
+    def get_validators(self):
+        """
+        Get headers for conditional request.
+
+        :returns: dict -- If-None-Match/If-Modified-Since headers
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """
+    Thread-safe LRU cache of successful GET responses.
+
+    Fresh entries (younger than TTL of their endpoint) are served without
+    request. Stale entries are revalidated with If-None-Match or
+    If-Modified-Since, and 304 response is served from the cache. Writes to
+    URL drop entries of that URL and of its parent collection.
+
+    TTLs are configured per endpoint with regular expressions matched
+    against URL, first match wins. By default only organizations and
+    webhooks (DEFAULT_TTLS) are cached, orders are always fetched::
+
+        ResponseCache(ttls=[
+            (r'/api/v2/orgs/[^/]+/$', 300),   # organization
+            (r'/api/v1/webhooks/', 60),
+        ])
+    """
+
+    def __init__(self, max_entries=1000, default_ttl=None, ttls=None, clock=time.time):
+        """
+        :param int max_entries: max number of cached responses, least
+            recently used are evicted
+        :param float default_ttl: seconds response is fresh, for URLs which
+            don't match any of ttls (not cached by default)
+        :param ttls: list of (regex, ttl) pairs or dict, ttl None disables
+            caching for matching URLs (DEFAULT_TTLS by default)
+        :param clock: function which returns current time in seconds
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        if ttls is None:
+            ttls = DEFAULT_TTLS
+        ttls = ttls.items() if isinstance(ttls, dict) else ttls
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """
+        Cache counters.
+
+        :returns: dict -- hits, misses, revalidations (304 served from
+            cache), evictions and current size
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+        }
+
+    def get_ttl(self, url):
+        """
+        Get TTL for URL.
+
+        :param str url: URL
+        :returns: float -- seconds or None if URL shouldn't be cached
+        """
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url, params, auth, send):
+        """
+        Get response from cache or send (conditional) request.
+
+        :param str url: URL
+        :param dict params: query params
+        :param str auth: credentials, responses are cached per credentials
+        :param send: callable which accepts dict with extra headers and
+            sends GET request
+        :returns: response
+        """
+        ttl = self.get_ttl(url)
+        if ttl is None:
+            return send({})
+        key = (url, tuple(sorted((k, repr(v)) for k, v in (params or {}).items())), auth)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.expires > self.clock():
+                    self.hits += 1
+                    return entry.response
+
+        response = send(entry.get_validators() if entry is not None else {})
+        with self._lock:
+            if response.status_code == 304 and entry is not None:
+                self.revalidations += 1
+                entry.expires = self.clock() + ttl
+                return entry.response
+            self.misses += 1
+            if response.status_code == 200:
+                self._store(key, CacheEntry(url, response, self.clock() + ttl))
+        return response
+
+    def invalidate(self, url):
+        """
+        Drop entries of URL and of its parent collection.
+
+        :param str url: URL which was changed
+        """
+        parent = url.rstrip('/').rsplit('/', 1)[0] + '/'
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if entry.url in (url, parent)]:
+                del self._entries[key]
+
+    def clear(self):
+        """
+        Drop all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,245 @@
+# coding: utf-8
+"""
+readycloud.circuitbreaker
+----------------------------------
+
+Module which contains per-endpoint circuit breaker.
+
+While ReadyCloud is failing, waiting for full round trip of every call only
+piles up workers on it. Breaker watches outcomes of recent calls of every
+endpoint template (``/api/v2/orgs/{org}/orders/{id}/``) and, when too many
+of them fail with 5xx / connection errors or are too slow, opens circuit
+of the endpoint: its calls raise ReadyCloudCircuitOpenError without sending
+request. After open_duration circuit becomes half-open and lets limited
+number of probe calls through, their outcome closes or reopens it::
+
+    breaker = CircuitBreaker(failure_rate=0.5, slow_call_duration=5,
+                             listeners=[metrics.observe_circuit])
+    rc = ReadyCloud(token='token', org_id='org', circuit_breaker=breaker)
+"""
+
+import collections
+import logging
+import threading
+import time
+
+from .exceptions import ReadyCloudCircuitOpenError
+from .utils import get_endpoint_template
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+FAILURE_STATUSES = (500, 502, 503, 504)
+
+
+class CircuitEvent(collections.namedtuple('CircuitEvent',
+                                          ['endpoint', 'previous', 'state', 'time'])):
+    """
+    State change of circuit of endpoint, passed to breaker listeners.
+    """
+
+    __slots__ = ()
+
+
+class _Circuit(object):
+    __slots__ = ('state', 'outcomes', 'opened_at', 'probes', 'probe_successes',
+                 'rejected', 'opened')
+
+    def __init__(self, window):
+        self.state = CLOSED
+        # (failed, slow) pairs of the last calls in closed state
+        self.outcomes = collections.deque(maxlen=window)
+        self.opened_at = None
+        self.probes = 0
+        self.probe_successes = 0
+        self.rejected = 0
+        self.opened = 0
+
+
+class CircuitBreaker(object):
+    """
+    Thread-safe circuit breaker with separate circuit per endpoint
+    template. May be shared between clients, including asynchronous ones.
+
+    Call fails if request wasn't answered (connection error, timeout) or
+    its status is in failure_statuses. Call is slow if its time to first
+    byte is at least slow_call_duration. Circuit opens when, over the last
+    ``window`` calls (at least min_calls), share of failed calls reaches
+    failure_rate or share of slow calls reaches slow_call_rate.
+    """
+
+    def __init__(self, failure_rate=0.5, slow_call_duration=None, slow_call_rate=1.0,
+                 window=20, min_calls=10, open_duration=30.0, half_open_calls=1,
+                 failure_statuses=FAILURE_STATUSES, listeners=None, clock=time.time):
+        """
+        :param float failure_rate: share of failed calls which opens circuit
+        :param float slow_call_duration: seconds, calls which take longer
+            are slow (latency isn't watched by default)
+        :param float slow_call_rate: share of slow calls which opens circuit
+        :param int window: number of the last calls to watch per endpoint
+        :param int min_calls: circuit isn't opened until it has this
+            number of calls in window
+        :param float open_duration: seconds before open circuit lets probe
+            calls through
+        :param int half_open_calls: number of concurrent probe calls of
+            half-open circuit; circuit closes when all of them succeed and
+            reopens on the first failed or slow one
+        :param failure_statuses: response statuses of failed calls
+        :param listeners: callables which receive CircuitEvent of every
+            state change, e.g. MetricsCollector.observe_circuit
+        :param clock: function which returns current time in seconds
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.window = window
+        self.min_calls = min(min_calls, window)
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.failure_statuses = frozenset(failure_statuses)
+        self.listeners = list(listeners or [])
+        self.clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """
+        :param listener: callable which accepts CircuitEvent
+        """
+        self.listeners.append(listener)
+
+    def get_state(self, url):
+        """
+        :param str url: URL or endpoint template
+        :returns: str -- CLOSED, OPEN or HALF_OPEN
+        """
+        circuit = self._circuits.get(get_endpoint_template(url))
+        return circuit.state if circuit is not None else CLOSED
+
+    @property
+    def stats(self):
+        """
+        :returns: dict -- endpoint template -> dict with state, calls and
+            failed / slow calls in window, rejected calls and number of
+            times circuit was opened
+        """
+        with self._lock:
+            return dict((endpoint, {
+                'state': circuit.state,
+                'calls': len(circuit.outcomes),
+                'failed': sum(1 for failed, _ in circuit.outcomes if failed),
+                'slow': sum(1 for _, slow in circuit.outcomes if slow),
+                'rejected': circuit.rejected,
+                'opened': circuit.opened,
+            }) for endpoint, circuit in self._circuits.items())
+
+    def acquire(self, url):
+        """
+        Check whether call to URL may be sent, should be followed by
+        record() of its outcome.
+
+        :param str url: requested URL
+        :returns: str -- state in which call was admitted, pass it to record
+        :raises ReadyCloudCircuitOpenError: if circuit is open or half-open
+            one has no free probe slots
+        """
+        endpoint = get_endpoint_template(url)
+        events = []
+        try:
+            with self._lock:
+                circuit = self._circuits.get(endpoint)
+                if circuit is None:
+                    circuit = self._circuits[endpoint] = _Circuit(self.window)
+                if circuit.state == CLOSED:
+                    return CLOSED
+                now = self.clock()
+                if circuit.state == OPEN:
+                    retry_after = circuit.opened_at + self.open_duration - now
+                    if retry_after > 0:
+                        circuit.rejected += 1
+                        raise ReadyCloudCircuitOpenError(endpoint, retry_after)
+                    events.append(self._transition(endpoint, circuit, HALF_OPEN, now))
+                if circuit.probes >= self.half_open_calls:
+                    circuit.rejected += 1
+                    raise ReadyCloudCircuitOpenError(endpoint, 0.0)
+                circuit.probes += 1
+                return HALF_OPEN
+        finally:
+            self._dispatch(events)
+
+    def record(self, event, admitted):
+        """
+        Record outcome of call.
+
+        :param event: readycloud.instrumentation.RequestEvent of finished
+            call
+        :param str admitted: state returned by acquire()
+        """
+        failed = event.error is not None or event.status in self.failure_statuses
+        slow = (self.slow_call_duration is not None and event.ttfb is not None and
+                event.ttfb >= self.slow_call_duration)
+        endpoint = event.endpoint
+        events = []
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                # breaker was reset while call was in flight
+                return
+            now = self.clock()
+            if admitted == HALF_OPEN:
+                circuit.probes -= 1
+                if circuit.state == HALF_OPEN:
+                    if failed or slow:
+                        events.append(self._open(endpoint, circuit, now))
+                    else:
+                        circuit.probe_successes += 1
+                        if circuit.probe_successes >= self.half_open_calls:
+                            events.append(self._transition(endpoint, circuit, CLOSED, now))
+            elif circuit.state == CLOSED:
+                # calls admitted before circuit was opened are ignored
+                circuit.outcomes.append((failed, slow))
+                if self._should_open(circuit):
+                    events.append(self._open(endpoint, circuit, now))
+        self._dispatch(events)
+
+    def reset(self):
+        """
+        Close all circuits and forget their history.
+        """
+        with self._lock:
+            self._circuits.clear()
+
+    def _should_open(self, circuit):
+        calls = len(circuit.outcomes)
+        if calls < self.min_calls:
+            return False
+        failed = sum(1 for failed, _ in circuit.outcomes if failed)
+        slow = sum(1 for _, slow in circuit.outcomes if slow)
+        return (failed >= self.failure_rate * calls or
+                (self.slow_call_duration is not None and slow >= self.slow_call_rate * calls))
+
+    def _open(self, endpoint, circuit, now):
+        circuit.opened_at = now
+        circuit.opened += 1
+        return self._transition(endpoint, circuit, OPEN, now)
+
+    def _transition(self, endpoint, circuit, state, now):
+        previous = circuit.state
+        circuit.state = state
+        circuit.outcomes.clear()
+        circuit.probe_successes = 0
+        logger.info('Circuit of %s changed from %s to %s', endpoint, previous, state)
+        return CircuitEvent(endpoint, previous, state, now)
+
+    def _dispatch(self, events):
+        for event in events:
+            for listener in self.listeners:
+                try:
+                    listener(event)
+                except Exception:
+                    logger.exception('Circuit event listener %r failed', listener)
@@ -0,0 +1,438 @@
+# coding: utf-8
+"""
+readycloud.cli
+----------------------------------
+
+Module which contains ``readycloud`` command line tool for bulk tasks::
+
+    readycloud --org org export-orders orders.ndjson.gz --filter status=new
+    readycloud --org org --workers 32 --rate-limit 100 --progress \\
+        import-orders orders.ndjson --checkpoint import.json
+    readycloud --org org delete-orders --input ids.txt
+    readycloud --org org sync-webhooks orders=https://example.com/hook
+
+Token is read from ``--token`` or ``READYCLOUD_TOKEN`` environment
+variable, organization from ``--org`` or ``READYCLOUD_ORG_ID``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from .bulk import BulkResult
+from .compression import Compression
+from .concurrency import imap_bounded
+from .export import (COMPRESSIONS, CSV, FORMATS, NDJSON, PARQUET, export_orders,
+                     guess_compression)
+from .ratelimit import TokenBucket
+from .readycloud import ReadyCloud
+from .retry import RetryPolicy
+from .sync import FileCheckpointStore
+from .webhooks import CREATE, UPDATE
+
+
+# number of processed records between checkpoint saves
+CHECKPOINT_EVERY = 1000
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+class Progress(object):
+    """
+    Progress and throughput reporter, writes at most one line per interval.
+    """
+
+    def __init__(self, label, stream=None, interval=1.0, enabled=True, clock=time.time):
+        """
+        :param str label: name of processed records
+        :param stream: text stream (stderr by default)
+        :param float interval: seconds between reports
+        :param bool enabled: write reports, otherwise only count
+        :param clock: function which returns current time in seconds
+        """
+        self.label = label
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.enabled = enabled
+        self.clock = clock
+        self.done = 0
+        self.failed = 0
+        self.started = clock()
+        self._reported = self.started
+
+    @property
+    def rate(self):
+        """
+        Records per second since start.
+        """
+        elapsed = self.clock() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def update(self, done=1, failed=0):
+        """
+        Count processed records.
+
+        :param int done: number of processed records
+        :param int failed: number of failed records among them
+        """
+        self.done += done
+        self.failed += failed
+        now = self.clock()
+        if self.enabled and now - self._reported >= self.interval:
+            self._reported = now
+            self._write('\r')
+
+    def finish(self):
+        """
+        Write final report.
+        """
+        if self.enabled:
+            self._write('\r')
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def _write(self, prefix):
+        self.stream.write('{0}{1} {2}, {3} failed, {4:.1f}/s'.format(
+            prefix, self.done, self.label, self.failed, self.rate))
+        self.stream.flush()
+
+
+def open_input(path):
+    """
+    Open input file for reading, compressed files are decompressed by
+    extension, ``-`` is stdin.
+
+    :param str path: file path
+    :returns: binary file object
+    """
+    if path == '-':
+        return sys.stdin.buffer
+    compression = guess_compression(path)
+    if compression is not None:
+        return COMPRESSIONS[compression](path, 'rb')
+    return open(path, 'rb')
+
+
+def read_ndjson(fileobj, loads=json.loads):
+    """
+    Read records of NDJSON file, blank lines are skipped.
+
+    :param fileobj: binary file object
+    :param loads: function which deserializes line
+    :returns: generator -- records
+    """
+    for line in fileobj:
+        if line.strip():
+            yield loads(line)
+
+
+def read_ids(fileobj):
+    """
+    Read ids, one per line. Lines may be NDJSON records with ``id`` field.
+
+    :param fileobj: binary file object
+    :returns: generator -- ids
+    """
+    for line in fileobj:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(b'{'):
+            yield json.loads(line)['id']
+        else:
+            yield line.decode('utf-8')
+
+
+def parse_pair(value):
+    """
+    Parse ``key=value`` argument.
+
+    :returns: tuple -- (key, value)
+    """
+    key, sep, rest = value.partition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError('expected KEY=VALUE, got {0!r}'.format(value))
+    return key, rest
+
+
+def guess_format(path):
+    """
+    Guess export format by extension of path, NDJSON by default.
+    """
+    name = path
+    for extension in ('.gz', '.bz2', '.xz'):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+    if name.endswith('.csv'):
+        return CSV
+    if name.endswith('.parquet'):
+        return PARQUET
+    return NDJSON
+
+
+def create_client(args):
+    """
+    Create client from common options.
+
+    :param args: parsed arguments
+    :returns: ReadyCloud -- client
+    """
+    token = args.token or os.environ.get('READYCLOUD_TOKEN')
+    if not token:
+        raise SystemExit('Token is required, set --token or READYCLOUD_TOKEN')
+    rate_limiter = None
+    if args.rate_limit:
+        rate_limiter = TokenBucket(rate=args.rate_limit, max_rate=args.rate_limit)
+    return ReadyCloud(token, host=args.host,
+                      org_id=args.org or os.environ.get('READYCLOUD_ORG_ID'),
+                      pool_maxsize=max(10, args.workers), timeout=args.timeout,
+                      retry=RetryPolicy(max_retries=args.retries) if args.retries else None,
+                      rate_limiter=rate_limiter,
+                      compression=Compression() if args.compress else None)
+
+
+def run_checkpointed(func, items, args, key, label):
+    """
+    Call func for items with bounded parallelism, reporting progress.
+
+    Checkpoint keeps number of leading items which are done and indexes of
+    items after them which finished out of order (e.g. calls which were in
+    flight when run was interrupted), so resumed run skips all of them.
+    Calls which were sent but not answered when process was killed are
+    repeated, so resuming create import is at-least-once and may create
+    duplicates of such orders.
+
+    :param func: callable which accepts one item
+    :param items: iterable of items
+    :param args: parsed arguments
+    :param str key: checkpoint key
+    :param str label: name of items in progress report
+    :returns: int -- exit code
+    """
+    store = FileCheckpointStore(args.checkpoint) if args.checkpoint else None
+    checkpoint = (store.load(key) if store is not None else None) or {}
+    done = checkpoint.get('done', 0)
+    completed = set(checkpoint.get('completed', []))
+    skipped = done + len(completed)
+    progress = Progress(label, interval=args.progress_interval, enabled=args.progress)
+    errors = open(args.errors, 'a') if args.errors else None
+    # results of finished calls which weren't handled yet
+    finished = {}
+    lock = threading.Lock()
+
+    def call(indexed):
+        index, item = indexed
+        try:
+            result = BulkResult(index, item, func(item), None)
+        except Exception as exc:
+            result = BulkResult(index, item, None, exc)
+        with lock:
+            finished[index] = result
+        return result
+
+    def handle(result):
+        with lock:
+            finished.pop(result.index, None)
+        failed = not result.ok
+        if failed and errors is not None:
+            errors.write(json.dumps({
+                'index': result.index,
+                'item': result.item,
+                'status_code': result.response and result.response.get('status_code'),
+                'response': result.response,
+                'error': repr(result.error) if result.error is not None else None,
+            }, default=str) + '\n')
+        progress.update(failed=int(failed))
+
+    def save():
+        store.save(key, {'done': done,
+                         'completed': sorted(index for index in completed if index >= done)})
+
+    pending = ((index, item) for index, item in enumerate(items)
+               if index >= done and index not in completed)
+    results = imap_bounded(call, pending, workers=args.workers, ordered=True)
+    try:
+        for result in results:
+            # results are ordered, so all items before this one are done
+            done = result.index + 1
+            handle(result)
+            if store is not None and progress.done % CHECKPOINT_EVERY == 0:
+                save()
+    finally:
+        # wait for calls in flight and keep their results
+        results.close()
+        for index in sorted(finished):
+            completed.add(index)
+            handle(finished[index])
+        progress.finish()
+        if store is not None:
+            save()
+        if errors is not None:
+            errors.close()
+    sys.stdout.write('{0} {1}, {2} failed, {3} skipped\n'.format(
+        progress.done, label, progress.failed, skipped))
+    return EXIT_FAILED if progress.failed else EXIT_OK
+
+
+def export_orders_command(args):
+    client = create_client(args)
+    progress = Progress('orders', interval=args.progress_interval, enabled=args.progress)
+    columns = args.columns.split(',') if args.columns else None
+    fmt = args.format or guess_format(args.output)
+    compression = args.compression
+    if compression is None and fmt != PARQUET:
+        compression = guess_compression(args.output)
+    output = sys.stdout.buffer if args.output == '-' else args.output
+    last = [0]
+
+    def report(count):
+        progress.update(count - last[0])
+        last[0] = count
+
+    with client:
+        try:
+            count = export_orders(client, output, format=fmt, columns=columns,
+                                  compression=compression, limit=args.limit,
+                                  workers=args.page_workers, progress=report,
+                                  **dict(args.filters))
+        finally:
+            progress.finish()
+    sys.stderr.write('{0} orders exported\n'.format(count))
+    return EXIT_OK
+
+
+def import_orders_command(args):
+    client = create_client(args)
+    key = 'import-orders:{0}'.format(os.path.abspath(args.input))
+    with client, open_input(args.input) as fileobj:
+        orders = read_ndjson(fileobj, loads=client.codec.loads)
+        if args.update:
+            def func(order):
+                return client.update_order(order['id'], order)
+        else:
+            func = client.create_order
+        return run_checkpointed(func, orders, args, key, 'orders')
+
+
+def delete_orders_command(args):
+    client = create_client(args)
+    if args.input:
+        key = 'delete-orders:{0}'.format(os.path.abspath(args.input))
+        with client, open_input(args.input) as fileobj:
+            return run_checkpointed(client.delete_order, read_ids(fileobj), args, key,
+                                    'orders')
+    with client:
+        return run_checkpointed(client.delete_order, args.ids, args, 'delete-orders',
+                                'orders')
+
+
+def sync_webhooks_command(args):
+    client = create_client(args)
+    with client:
+        report = client.sync_webhooks(args.webhooks, prune=args.prune, dry_run=args.dry_run,
+                                      workers=args.workers)
+    for change in report.changes:
+        if change.action == CREATE:
+            sys.stdout.write('create {0} {1}\n'.format(change.entity, change.url))
+        elif change.action == UPDATE:
+            sys.stdout.write('update {0} {1} {2} -> {3}\n'.format(
+                change.webhook_id, change.entity, change.previous_url, change.url))
+        else:
+            sys.stdout.write('delete {0} {1} {2}\n'.format(change.webhook_id, change.entity,
+                                                           change.url))
+    for result in report.failed:
+        sys.stderr.write('failed {0} {1}: {2}\n'.format(
+            result.item.action, result.item.webhook_id or result.item.url,
+            result.error or result.response.get('status_code')))
+    return EXIT_FAILED if report.failed else EXIT_OK
+
+
+def create_parser():
+    """
+    :returns: argparse.ArgumentParser -- parser of command line
+    """
+    parser = argparse.ArgumentParser(prog='readycloud',
+                                     description='Bulk tasks for ReadyCloud API.')
+    parser.add_argument('--token', help='bearer token (READYCLOUD_TOKEN by default)')
+    parser.add_argument('--host', default='https://readycloud.com/')
+    parser.add_argument('--org', help='organization id (READYCLOUD_ORG_ID by default)')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='number of concurrent requests (default: %(default)s)')
+    parser.add_argument('--rate-limit', type=float,
+                        help='max requests per second (unlimited by default)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='retries of failed idempotent requests (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='timeout of request, seconds (default: %(default)s)')
+    parser.add_argument('--compress', action='store_true', help='compress request bodies')
+    parser.add_argument('--progress', action='store_true',
+                        help='report progress and throughput to stderr')
+    parser.add_argument('--progress-interval', type=float, default=1.0,
+                        help=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    export = subparsers.add_parser('export-orders', help='export orders to file')
+    export.add_argument('output', help='file path, - for stdout')
+    export.add_argument('--format', choices=FORMATS,
+                        help='file format (guessed by extension by default)')
+    export.add_argument('--compression',
+                        help='gzip, bz2 or xz (guessed by extension by default), '
+                             'Parquet compression for Parquet')
+    export.add_argument('--columns', help='comma separated dotted paths of CSV/Parquet columns')
+    export.add_argument('--limit', type=int, default=100, help='page size')
+    export.add_argument('--page-workers', type=int, default=0,
+                        help='number of concurrent page requests (default: %(default)s)')
+    export.add_argument('--filter', dest='filters', type=parse_pair, action='append',
+                        default=[], metavar='KEY=VALUE', help='filter of orders')
+    export.set_defaults(func=export_orders_command)
+
+    for name, help_text in (('import-orders', 'create or update orders from NDJSON file'),
+                            ('delete-orders', 'delete orders')):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('--checkpoint', metavar='FILE',
+                             help='save progress to file and resume from it '
+                                  '(requests in flight when killed are repeated)')
+        command.add_argument('--errors', metavar='FILE',
+                             help='append failed records to NDJSON file')
+        if name == 'import-orders':
+            command.add_argument('input', help='NDJSON file (may be compressed), - for stdin')
+            command.add_argument('--update', action='store_true',
+                                 help='update orders by their id instead of creating')
+            command.set_defaults(func=import_orders_command)
+        else:
+            command.add_argument('ids', nargs='*', help='order ids')
+            command.add_argument('--input', help='file with order ids or NDJSON orders')
+            command.set_defaults(func=delete_orders_command)
+
+    webhooks = subparsers.add_parser('sync-webhooks', help='register webhooks')
+    webhooks.add_argument('webhooks', nargs='+', type=parse_pair, metavar='ENTITY=URL')
+    webhooks.add_argument('--prune', action='store_true',
+                          help='delete webhooks which are not listed')
+    webhooks.add_argument('--dry-run', action='store_true',
+                          help='only print changes')
+    webhooks.set_defaults(func=sync_webhooks_command)
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of ``readycloud`` command.
+
+    :param list argv: arguments (sys.argv by default)
+    :returns: int -- exit code
+    """
+    args = create_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        sys.stderr.write('Interrupted\n')
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+# coding: utf-8
+"""
+readycloud.coalesce
+----------------------------------
+
+Module which contains deduplication and coalescing of order events.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from .bulk import run_bulk
+
+
+class CoalescedEvent(namedtuple('CoalescedEvent', ['order_id', 'event', 'count', 'first_seen',
+                                                   'last_seen', 'order', 'error'])):
+    """
+    Logical update of one order, made of a burst of its events.
+
+    :ivar order_id: order id
+    :ivar dict event: the latest event
+    :ivar int count: number of (unique) events collapsed to this update
+    :ivar float first_seen: time of the first event
+    :ivar float last_seen: time of the latest event
+    :ivar dict order: current order fetched from API (None if coalescer
+        has no client)
+    :ivar Exception error: exception raised by fetch
+    """
+
+    __slots__ = ()
+
+
+def get_event_key(event):
+    """
+    Get deduplication key of event: its id if event has one, hash of its
+    content otherwise.
+
+    :param dict event: event
+    :returns: str -- key
+    """
+    for field in ('event_id', 'uuid'):
+        if event.get(field) is not None:
+            return '{0}:{1}'.format(field, event[field])
+    content = json.dumps(event, sort_keys=True, separators=(',', ':'), default=str)
+    return 'sha1:' + hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def get_event_order_id(event):
+    """
+    Get id of order event is about: ``order_id`` field, ``id`` of nested
+    ``order`` or ``data`` record, or ``id`` of event itself.
+
+    :param dict event: event
+    :returns: order id or None
+    """
+    if event.get('order_id') is not None:
+        return event['order_id']
+    for field in ('order', 'data'):
+        record = event.get(field)
+        if isinstance(record, dict) and record.get('id') is not None:
+            return record['id']
+    return event.get('id')
+
+
+class EventCoalescer(object):
+    """
+    Drops duplicate order events and collapses bursts of events of the
+    same order to one update.
+
+    Event is a duplicate if an event with the same key (id or content
+    hash) was seen within dedupe_window. Unique events of an order are
+    collected for window seconds after the first one and then released
+    by drain() as one CoalescedEvent with the latest event. With client
+    set, current state of released orders is fetched concurrently::
+
+        coalescer = EventCoalescer(window=2, client=rc)
+        receiver = WebhookReceiver(coalescer.add_many)
+        coalescer.start(handle_updates, interval=1)
+
+    Memory is bounded: keys of seen events expire after dedupe_window
+    and the oldest are evicted above max_keys. When a new order would
+    exceed max_pending, the oldest pending order is released early (it's
+    returned by the next drain); at most max_pending early released
+    updates wait for drain, older ones are dropped.
+    """
+
+    def __init__(self, window=2.0, dedupe_window=300.0, max_keys=100000, max_pending=10000,
+                 client=None, workers=8, get_key=get_event_key,
+                 get_order_id=get_event_order_id, clock=time.time):
+        """
+        :param float window: seconds events of one order are collected for
+        :param float dedupe_window: seconds keys of seen events are kept
+        :param int max_keys: max number of kept keys
+        :param int max_pending: max number of pending orders (and of
+            early released updates waiting for drain)
+        :param client: readycloud.ReadyCloud to fetch released orders
+        :param int workers: number of concurrent fetches
+        :param get_key: callable which returns deduplication key of event
+        :param get_order_id: callable which returns order id of event
+        :param clock: function which returns current time in seconds
+        """
+        self.window = window
+        self.dedupe_window = dedupe_window
+        self.max_keys = max_keys
+        self.max_pending = max_pending
+        self.client = client
+        self.workers = workers
+        self.get_key = get_key
+        self.get_order_id = get_order_id
+        self.clock = clock
+        self.received = 0
+        self.duplicates = 0
+        self.coalesced = 0
+        self.released = 0
+        self.evicted = 0
+        self.overflowed = 0
+        self.dropped = 0
+        self._keys = OrderedDict()
+        self._pending = OrderedDict()
+        # updates released early because of max_pending
+        self._overflow = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def stats(self):
+        """
+        Coalescer counters.
+
+        :returns: dict -- received events, dropped duplicates, events
+            collapsed to pending updates, released updates, keys evicted
+            before expiration, updates released early because of
+            max_pending and dropped before drain, current number of keys
+            and pending orders
+        """
+        return {
+            'received': self.received,
+            'duplicates': self.duplicates,
+            'coalesced': self.coalesced,
+            'released': self.released,
+            'evicted': self.evicted,
+            'overflowed': self.overflowed,
+            'dropped': self.dropped,
+            'keys': len(self._keys),
+            'pending': len(self._pending),
+        }
+
+    def add(self, event):
+        """
+        Add event.
+
+        :param dict event: order event
+        :returns: bool -- False if event is a duplicate or has no order id
+        """
+        key = self.get_key(event)
+        order_id = self.get_order_id(event)
+        with self._lock:
+            now = self.clock()
+            self.received += 1
+            self._expire_keys(now)
+            if key in self._keys:
+                self.duplicates += 1
+                return False
+            self._keys[key] = now
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+                self.evicted += 1
+            if order_id is None:
+                return False
+            pending = self._pending.get(order_id)
+            if pending is None:
+                self._pending[order_id] = [event, 1, now, now]
+                if len(self._pending) > self.max_pending:
+                    self._overflow.append(self._pending.popitem(last=False))
+                    self.overflowed += 1
+                    if len(self._overflow) > self.max_pending:
+                        self._overflow.popleft()
+                        self.dropped += 1
+            else:
+                pending[0] = event
+                pending[1] += 1
+                pending[3] = now
+                self.coalesced += 1
+            return True
+
+    def add_many(self, events):
+        """
+        Add events, may be used as WebhookReceiver handler.
+
+        :param events: iterable of order events
+        :returns: int -- number of accepted events
+        """
+        return sum(1 for event in events if self.add(event))
+
+    def drain(self, force=False):
+        """
+        Release updates of orders whose window has passed.
+
+        :param bool force: release all pending updates
+        :returns: list -- CoalescedEvent per released order, in order of
+            their first events
+        """
+        with self._lock:
+            deadline = self.clock() - self.window
+            entries = list(self._overflow)
+            self._overflow.clear()
+            while self._pending:
+                order_id, entry = next(iter(self._pending.items()))
+                if not force and entry[2] > deadline:
+                    break
+                del self._pending[order_id]
+                entries.append((order_id, entry))
+            released = [CoalescedEvent(order_id, event, count, first_seen, last_seen, None, None)
+                        for order_id, (event, count, first_seen, last_seen) in entries]
+            self.released += len(released)
+        if self.client is not None and released:
+            released = self.fetch(released)
+        return released
+
+    def fetch(self, updates):
+        """
+        Fetch current state of orders of updates.
+
+        :param list updates: CoalescedEvent list
+        :returns: list -- CoalescedEvent list with order or error set
+        """
+        def get_order(update):
+            return self.client.get(self.client.get_order_url(update.order_id), params={})
+
+        return [update._replace(order=result.response, error=result.error)
+                for update, result in zip(updates, run_bulk(get_order, updates,
+                                                            workers=self.workers))]
+
+    def start(self, callback, interval=1.0):
+        """
+        Start background thread which drains coalescer every interval
+        seconds and calls callback with released updates.
+
+        :param callback: callable which accepts list of CoalescedEvent
+        :param float interval: seconds between drains
+        :returns: EventCoalescer -- self
+        """
+        def run():
+            while not self._stopped.wait(interval):
+                updates = self.drain()
+                if updates:
+                    callback(updates)
+            updates = self.drain(force=True)
+            if updates:
+                callback(updates)
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=run, name='readycloud-coalescer')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop background thread, pending updates are released.
+        """
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def _expire_keys(self, now):
+        expired = now - self.dedupe_window
+        while self._keys:
+            key, seen = next(iter(self._keys.items()))
+            if seen > expired:
+                break
+            del self._keys[key]
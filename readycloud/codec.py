@@ -0,0 +1,105 @@
+# coding: utf-8
+"""
+readycloud.codec
+----------------------------------
+
+Module which contains JSON codecs. Codec serializes request bodies
+directly to UTF-8 bytes and deserializes response bodies from bytes.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JSONCodec(object):
+    """
+    Codec based on standard library json module.
+    """
+
+    name = 'json'
+
+    def dumps(self, data):
+        """
+        Serialize data.
+
+        :param data: JSON serializable data
+        :returns: bytes -- UTF-8 encoded JSON
+        """
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, content):
+        """
+        Deserialize data.
+
+        :param bytes content: UTF-8 encoded JSON
+        :returns: deserialized data
+        """
+        return json.loads(content)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Codec based on orjson.
+
+    Non-string dict keys are serialized as strings, like json does. Data
+    which orjson rejects (e.g. integers beyond 64 bits) is serialized with
+    json, so switching codecs doesn't break payloads json accepts.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('orjson is not installed')
+
+    def dumps(self, data):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super(OrjsonCodec, self).dumps(data)
+
+    def loads(self, content):
+        return orjson.loads(content)
+
+
+class UjsonCodec(JSONCodec):
+    """
+    Codec based on ujson. Data which ujson rejects is serialized with json.
+    """
+
+    name = 'ujson'
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError('ujson is not installed')
+
+    def dumps(self, data):
+        try:
+            return ujson.dumps(data, ensure_ascii=False).encode('utf-8')
+        except (TypeError, OverflowError):
+            return super(UjsonCodec, self).dumps(data)
+
+    def loads(self, content):
+        return ujson.loads(content)
+
+
+def get_default_codec():
+    """
+    Get the fastest installed codec: orjson, ujson or standard library.
+
+    :returns: JSONCodec -- codec instance
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    if ujson is not None:
+        return UjsonCodec()
+    return JSONCodec()
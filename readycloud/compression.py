@@ -0,0 +1,113 @@
+# coding: utf-8
+"""
+readycloud.compression
+----------------------------------
+
+Module which contains compression of request bodies.
+
+Order payloads with many items compress several times, so bulk syncs
+send much less data with compression turned on::
+
+    rc = ReadyCloud(token='token', org_id='org', compression=Compression('gzip'))
+
+Responses are decoded by HTTP libraries (urllib3 and aiohttp), including
+streamed ones, Compression only controls which encodings are advertised
+in Accept-Encoding.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+# default compression levels, chosen for speed rather than ratio
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'br': 4,
+    'zstd': 3,
+}
+
+
+def get_encodings():
+    """
+    Get content encodings which can be used for request bodies.
+
+    :returns: list -- names of encodings, gzip is always available
+    """
+    encodings = ['gzip']
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+
+
+def get_accept_encoding():
+    """
+    Get encodings of responses which can be decoded by urllib3 in this
+    environment (brotli and zstd depend on installed packages).
+
+    :returns: str -- value of Accept-Encoding header
+    """
+    return ', '.join(ACCEPT_ENCODING.split(','))
+
+
+class Compression(object):
+    """
+    Compression of request bodies larger than threshold. Smaller bodies
+    are sent as is, they don't get shorter and compressing them only
+    costs CPU.
+    """
+
+    def __init__(self, encoding='gzip', threshold=1024, level=None, accept_encoding=None):
+        """
+        :param str encoding: ``gzip``, ``br`` (requires brotli) or
+            ``zstd`` (requires zstandard)
+        :param int threshold: min size of body to compress, bytes
+        :param int level: compression level (default of encoding if None)
+        :param str accept_encoding: value of Accept-Encoding header,
+            all encodings urllib3 can decode by default
+        """
+        if encoding not in DEFAULT_LEVELS:
+            raise ValueError('Unknown encoding {0!r}'.format(encoding))
+        if encoding not in get_encodings():
+            raise ImportError('{0} encoding requires {1}'.format(
+                encoding, 'brotli' if encoding == 'br' else 'zstandard'))
+        self.encoding = encoding
+        self.threshold = threshold
+        self.level = DEFAULT_LEVELS[encoding] if level is None else level
+        self.accept_encoding = accept_encoding or get_accept_encoding()
+
+    def __repr__(self):
+        return '<Compression {0} level={1} threshold={2}>'.format(
+            self.encoding, self.level, self.threshold)
+
+    def compress(self, data):
+        """
+        Compress body if it's large enough.
+
+        :param bytes data: request body
+        :returns: tuple -- (body, encoding), encoding is None if body
+            wasn't compressed
+        """
+        if len(data) < self.threshold:
+            return data, None
+        if self.encoding == 'gzip':
+            # mtime is fixed, so equal bodies are compressed to equal bytes
+            return gzip.compress(data, compresslevel=self.level, mtime=0), 'gzip'
+        if self.encoding == 'br':
+            return brotli.compress(data, quality=self.level), 'br'
+        return zstandard.compress(data, level=self.level), 'zstd'
@@ -0,0 +1,122 @@
+# coding: utf-8
+"""
+readycloud.concurrency
+----------------------------------
+
+Module with helpers for running API calls on a thread pool.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from queue import Full, Queue
+
+
+def imap_bounded(func, iterable, workers=4, window=None, ordered=True):
+    """
+    Lazy parallel map. Calls func for every item on a thread pool and
+    yields results in the order of items (or in order of completion if
+    ordered is False).
+
+    Iterable is consumed lazily and at most window calls are pending at
+    once, so memory doesn't depend on number of items. Exception raised by
+    func is re-raised when its result is reached, pending calls are
+    cancelled.
+
+    :param func: callable which accepts one item
+    :param iterable: items
+    :param int workers: number of threads
+    :param int window: max number of submitted but not yielded calls
+        (2 * workers by default)
+    :param bool ordered: keep order of items
+    :returns: generator -- results of func
+    """
+    window = window or workers * 2
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque() if ordered else set()
+    next_result = _next_ordered if ordered else _next_completed
+    try:
+        for item in iterable:
+            future = executor.submit(func, item)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+            if len(pending) >= window:
+                yield next_result(pending)
+        while pending:
+            yield next_result(pending)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def imerge(iterables, workers=4, depth=None):
+    """
+    Consume several iterables concurrently and yield their items as soon
+    as they are produced.
+
+    At most workers iterables are consumed at once and at most depth items
+    wait for the caller, so slow caller throttles producers. Exception
+    raised by any iterable is re-raised to the caller. When caller stops
+    iteration early, producers stop after their current item.
+
+    :param iterables: iterable of iterables
+    :param int workers: number of threads
+    :param int depth: max number of produced but not yielded items
+        (2 * workers by default)
+    :returns: generator -- items of all iterables
+    """
+    queue = Queue(maxsize=depth or workers * 2)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def consume(iterable):
+        if stop.is_set():
+            return
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except BaseException as exc:
+            put((False, exc))
+        else:
+            put((False, None))
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = [executor.submit(consume, iterable) for iterable in iterables]
+    remaining = len(futures)
+    try:
+        while remaining:
+            has_item, value = queue.get()
+            if not has_item:
+                if value is not None:
+                    raise value
+                remaining -= 1
+                continue
+            yield value
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _next_ordered(pending):
+    return pending.popleft().result()
+
+
+def _next_completed(pending):
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    future = done.pop()
+    pending.remove(future)
+    return future.result()
@@ -6,23 +6,44 @@ readycloud.decorators
 Module with decorators
 """
 
-from functools import wraps
+from functools import partial, wraps
 
 from .exceptions import ReadyCloudServerError
 from .utils import get_response_json
 
 
+def check_response(resp, loads=None):
+    """
+    Check response and:
+
+        - If status 20x or 40x - returns json deserialized response
+        - If status 50x - raises ReadyCloudServerError
+
+    :param loads: function which deserializes response body bytes
+    """
+    if resp.status_code == 500:
+        raise ReadyCloudServerError(resp.content)
+    return get_response_json(resp, loads=loads)
+
+
 def safe_json_request(func):
     """
     Decorator which check response returned by func, and:
 
         - If status 20x or 40x - returns json deserialized response
         - If status 50x - raises ReadyCloudServerError
+
+    Response is deserialized with codec of the client, if it has one.
+    Decoding time is recorded to request event, if client has
+    instrumentation.
     """
     @wraps(func)
-    def wrapper(*args, **kwargs):
-        resp = func(*args, **kwargs)
-        if resp.status_code == 500:
-            raise ReadyCloudServerError(resp.content)
-        return get_response_json(resp)
+    def wrapper(self, *args, **kwargs):
+        codec = getattr(self, 'codec', None)
+        check = partial(check_response, loads=codec.loads if codec is not None else None)
+        instrumentation = getattr(self, 'instrumentation', None)
+        if instrumentation is None:
+            return check(func(self, *args, **kwargs))
+        with instrumentation.collect():
+            return instrumentation.decode(check, func(self, *args, **kwargs))
     return wrapper
@@ -3,3 +3,23 @@ from requests.exceptions import HTTPError
 
 class ReadyCloudServerError(HTTPError):
     pass
+
+
+class ReadyCloudClientError(HTTPError):
+    pass
+
+
+class ReadyCloudCircuitOpenError(ReadyCloudServerError):
+    """
+    Raised instead of sending request while circuit breaker of endpoint is
+    open.
+
+    :ivar str endpoint: endpoint template
+    :ivar float retry_after: seconds until circuit lets probe calls through
+    """
+
+    def __init__(self, endpoint, retry_after=None):
+        super(ReadyCloudCircuitOpenError, self).__init__(
+            'Circuit of {0} is open'.format(endpoint))
+        self.endpoint = endpoint
+        self.retry_after = retry_after
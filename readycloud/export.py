@@ -0,0 +1,418 @@
+# coding: utf-8
+"""
+readycloud.export
+----------------------------------
+
+Module which contains streaming export of records to NDJSON, CSV and
+Parquet files.
+
+Records are written while pages are downloaded, in chunks (NDJSON, CSV)
+or row groups (Parquet), so memory use doesn't depend on number of
+records::
+
+    export_orders(rc, 'orders.ndjson.gz', compression='gzip')
+    export_orders(rc, 'orders.csv', format='csv',
+                  columns=['id', 'number', 'status', 'customer.email'])
+"""
+
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+from .codec import get_default_codec
+from .mirror import get_path
+
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+PARQUET = 'parquet'
+
+FORMATS = (NDJSON, CSV, PARQUET)
+
+# file compressions of NDJSON and CSV, Parquet compresses its pages itself
+COMPRESSIONS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+# extensions by which compression is guessed
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+}
+
+
+def guess_compression(path):
+    """
+    Guess file compression by extension of path.
+
+    :param str path: file path
+    :returns: str -- compression name or None
+    """
+    for extension, compression in EXTENSIONS.items():
+        if path.endswith(extension):
+            return compression
+    return None
+
+
+def open_output(output, compression=None):
+    """
+    Open binary output for writing.
+
+    :param output: file path or binary file object
+    :param str compression: ``gzip``, ``bz2``, ``xz`` or None
+    :returns: tuple -- (file object, bool if file should be closed by caller)
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError('Unknown compression {0!r}'.format(compression))
+    if compression is not None:
+        return COMPRESSIONS[compression](output, 'wb'), True
+    if isinstance(output, str):
+        return open(output, 'wb'), True
+    return output, False
+
+
+def flatten(record, sep='.'):
+    """
+    Flatten nested dicts to one level, e.g. ``{'customer': {'email': e}}``
+    to ``{'customer.email': e}``. Lists are kept as is.
+
+    :param dict record: record
+    :param str sep: separator of key parts
+    :returns: dict -- flat record
+    """
+    result = {}
+    stack = [('', record)]
+    while stack:
+        prefix, data = stack.pop()
+        for key, value in data.items():
+            name = prefix + key
+            if isinstance(value, dict) and value:
+                stack.append((name + sep, value))
+            else:
+                result[name] = value
+    return result
+
+
+def get_columns(record, sep='.'):
+    """
+    Get flattened columns of record.
+
+    :param dict record: record
+    :returns: list -- dotted paths, sorted
+    """
+    return sorted(flatten(record, sep))
+
+
+def _normalize_columns(columns):
+    # list of dotted paths or dict column name -> dotted path
+    if columns is None:
+        return None
+    if isinstance(columns, dict):
+        return list(columns.items())
+    return [(column, column) for column in columns]
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'), sort_keys=True)
+    return value
+
+
+class ExportWriter(object):
+    """
+    Base class of record writers.
+
+    Writer writes to binary file object it doesn't own: closing writer
+    flushes buffered records, but leaves file open.
+    """
+
+    def __init__(self, fileobj):
+        """
+        :param fileobj: binary file object
+        """
+        self.fileobj = fileobj
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record):
+        """
+        Write record.
+
+        :param dict record: record
+        """
+        raise NotImplementedError()
+
+    def write_many(self, records):
+        """
+        Write records.
+
+        :param records: iterable of records, consumed lazily
+        :returns: int -- number of written records
+        """
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+
+    def flush(self):
+        """
+        Write buffered records to file.
+        """
+
+    def close(self):
+        """
+        Flush buffered records.
+        """
+        self.flush()
+
+
+class NDJSONWriter(ExportWriter):
+    """
+    Writer of newline delimited JSON, one record per line.
+    """
+
+    def __init__(self, fileobj, codec=None, chunk_size=1048576):
+        """
+        :param fileobj: binary file object
+        :param codec: readycloud.codec.JSONCodec to encode records
+        :param int chunk_size: size of buffered data written at once, bytes
+        """
+        super(NDJSONWriter, self).__init__(fileobj)
+        self.codec = codec or get_default_codec()
+        self.chunk_size = chunk_size
+        self._chunk = []
+        self._size = 0
+
+    def write(self, record):
+        line = self.codec.dumps(record)
+        self._chunk.append(line)
+        self._chunk.append(b'\n')
+        self._size += len(line) + 1
+        self.count += 1
+        if self._size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._chunk:
+            self.fileobj.write(b''.join(self._chunk))
+            self._chunk = []
+            self._size = 0
+
+
+class CSVWriter(ExportWriter):
+    """
+    Writer of CSV with flattened columns.
+
+    Columns are dotted paths of fields, e.g. ``customer.email``, or dict
+    of column name -> dotted path. Without columns they are taken from
+    the first record, fields missing in it aren't exported. Nested lists
+    and dicts are written as JSON.
+    """
+
+    def __init__(self, fileobj, columns=None, encoding='utf-8', **fmtparams):
+        """
+        :param fileobj: binary file object
+        :param columns: list of dotted paths or dict column name -> path
+        :param str encoding: text encoding
+        :param dict fmtparams: csv.writer format parameters
+        """
+        super(CSVWriter, self).__init__(fileobj)
+        self.columns = _normalize_columns(columns)
+        self._text = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+        self._writer = csv.writer(self._text, **fmtparams)
+
+    def write(self, record):
+        if self.columns is None:
+            self.columns = _normalize_columns(get_columns(record))
+        if self.count == 0:
+            self._writer.writerow([name for name, _ in self.columns])
+        self._writer.writerow([_cell(get_path(record, path)) for _, path in self.columns])
+        self.count += 1
+
+    def flush(self):
+        self._text.flush()
+
+    def close(self):
+        if self._text is None:
+            return
+        if self.count == 0 and self.columns is not None:
+            self._writer.writerow([name for name, _ in self.columns])
+        self.flush()
+        # leave file open, it belongs to caller
+        self._text.detach()
+        self._text = None
+
+
+class ParquetWriter(ExportWriter):
+    """
+    Writer of Parquet, requires pyarrow.
+
+    Records are buffered and written as row groups of row_group_size
+    records. Columns are the same as of CSVWriter, schema is inferred from
+    the first row group (columns without values there are strings). Values
+    of later row groups are cast to it, values of other types in string
+    columns are written as JSON; values which don't fit (e.g. fractions in
+    integer column) raise pyarrow.ArrowInvalid.
+    """
+
+    def __init__(self, fileobj, columns=None, row_group_size=10000, compression='snappy'):
+        """
+        :param fileobj: binary file object
+        :param columns: list of dotted paths or dict column name -> path
+        :param int row_group_size: number of records in row group
+        :param str compression: Parquet compression, e.g. ``snappy``,
+            ``gzip``, ``zstd`` or None
+        """
+        if pyarrow is None:
+            raise ImportError('pyarrow is required for Parquet export')
+        super(ParquetWriter, self).__init__(fileobj)
+        self.columns = _normalize_columns(columns)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._rows = []
+        self._writer = None
+        self._schema = None
+
+    def write(self, record):
+        if self.columns is None:
+            self.columns = _normalize_columns(get_columns(record))
+        self._rows.append(dict((name, _cell(get_path(record, path)))
+                               for name, path in self.columns))
+        self.count += 1
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        # row group which can't be written is dropped, not retried on close
+        rows, self._rows = self._rows, []
+        if self._writer is None:
+            table = pyarrow.Table.from_pylist(rows)
+            fields = [pyarrow.field(field.name, pyarrow.string())
+                      if pyarrow.types.is_null(field.type) else field
+                      for field in table.schema]
+            self._schema = pyarrow.schema(fields)
+            self._writer = pyarrow.parquet.ParquetWriter(self.fileobj, self._schema,
+                                                         compression=self.compression)
+        table = pyarrow.Table.from_arrays(
+            [_arrow_column([row[field.name] for row in rows], field.type)
+             for field in self._schema], schema=self._schema)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _arrow_column(values, type):
+    if pyarrow.types.is_string(type):
+        values = [value if value is None or isinstance(value, str) else json.dumps(value)
+                  for value in values]
+    # safe cast, pyarrow.array(values, type=type) truncates fractions
+    return pyarrow.array(values).cast(type)
+
+
+def create_writer(fileobj, format=NDJSON, columns=None, codec=None, row_group_size=10000,
+                  parquet_compression='snappy'):
+    """
+    Create writer of format.
+
+    :param fileobj: binary file object
+    :param str format: ``ndjson``, ``csv`` or ``parquet``
+    :param columns: columns of CSV and Parquet, see CSVWriter
+    :param codec: readycloud.codec.JSONCodec of NDJSON
+    :param int row_group_size: records in Parquet row group
+    :param str parquet_compression: compression of Parquet pages
+    :returns: ExportWriter -- writer
+    """
+    if format == NDJSON:
+        return NDJSONWriter(fileobj, codec=codec)
+    if format == CSV:
+        return CSVWriter(fileobj, columns=columns)
+    if format == PARQUET:
+        return ParquetWriter(fileobj, columns=columns, row_group_size=row_group_size,
+                             compression=parquet_compression)
+    raise ValueError('Unknown format {0!r}, expected one of {1}'.format(
+        format, ', '.join(FORMATS)))
+
+
+def export_records(records, output, format=NDJSON, columns=None, compression=None,
+                   codec=None, row_group_size=10000, progress=None, progress_every=1000):
+    """
+    Write records to file while they are produced.
+
+    :param records: iterable of records, consumed lazily
+    :param output: file path or binary file object
+    :param str format: ``ndjson``, ``csv`` or ``parquet``
+    :param columns: columns of CSV and Parquet, see CSVWriter
+    :param str compression: ``gzip``, ``bz2`` or ``xz`` for NDJSON and CSV
+        files, Parquet compression (``snappy`` by default) for Parquet
+    :param codec: readycloud.codec.JSONCodec of NDJSON
+    :param int row_group_size: records in Parquet row group
+    :param progress: callable which receives number of written records
+    :param int progress_every: number of records between progress calls
+    :returns: int -- number of written records
+    """
+    if format == PARQUET:
+        fileobj, owned = open_output(output)
+        writer = create_writer(fileobj, format, columns=columns, row_group_size=row_group_size,
+                               parquet_compression=compression or 'snappy')
+    else:
+        fileobj, owned = open_output(output, compression)
+        writer = create_writer(fileobj, format, columns=columns, codec=codec)
+    try:
+        with writer:
+            for record in records:
+                writer.write(record)
+                if progress is not None and writer.count % progress_every == 0:
+                    progress(writer.count)
+        if progress is not None and writer.count % progress_every:
+            progress(writer.count)
+    finally:
+        if owned:
+            fileobj.close()
+    return writer.count
+
+
+def export_orders(client, output, format=NDJSON, columns=None, compression=None,
+                  limit=100, prefetch=1, workers=0, progress=None, **filters):
+    """
+    Export all orders of organization to file. Pages are downloaded ahead
+    while orders of current page are written.
+
+    :param client: ReadyCloud client
+    :param output: file path or binary file object
+    :param str format: ``ndjson``, ``csv`` or ``parquet``
+    :param columns: columns of CSV and Parquet, see CSVWriter
+    :param str compression: file or Parquet compression, see export_records
+    :param int limit: page size
+    :param int prefetch: number of pages fetched ahead
+    :param int workers: number of concurrent page requests (0 - off)
+    :param progress: callable which receives number of written orders
+    :param dict filters: filters of orders
+    :returns: int -- number of exported orders
+    """
+    orders = client.iter_orders(limit=limit, prefetch=prefetch, workers=workers, **filters)
+    return export_records(orders, output, format=format, columns=columns,
+                          compression=compression, codec=client.codec, progress=progress,
+                          progress_every=limit)
@@ -0,0 +1,404 @@
+# coding: utf-8
+"""
+readycloud.instrumentation
+----------------------------------
+
+Module which contains request events and in-process metrics.
+
+Every HTTP exchange of a client is reported to its listeners as
+RequestEvent. MetricsCollector is a listener which aggregates events to
+counters and histograms and renders them in OpenMetrics (Prometheus) text
+format::
+
+    metrics = MetricsCollector()
+    rc = ReadyCloud(token='token', org_id='org', listeners=[metrics])
+    rc.get_orders()
+    print(metrics.render())
+"""
+
+import bisect
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+from .circuitbreaker import STATES as CIRCUIT_STATES
+from .utils import get_endpoint_template
+
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('queue_wait', 'ttfb', 'body_read', 'decode')
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# events of requests sent inside Instrumentation.collect(), they are
+# dispatched when response is decoded
+_pending = contextvars.ContextVar('readycloud_pending_events', default=None)
+
+
+class RequestEvent(object):
+    """
+    Report of one API request, including its retries.
+
+    Timings are in seconds, phases of retried requests are of the last
+    attempt. Phase is None when it's unknown, e.g. ``body_read`` of streamed
+    responses happens after event is emitted. Time spent opening pooled
+    connections isn't reported separately, it's part of ``ttfb``.
+
+    :ivar str method: HTTP method
+    :ivar str url: requested URL
+    :ivar int status: response status, None if request failed
+    :ivar int bytes_sent: size of request body as sent (compressed)
+    :ivar int bytes_received: size of response body as received
+        (compressed), None if it's unknown
+    :ivar int uncompressed_bytes_sent: size of request body before
+        compression
+    :ivar int uncompressed_bytes_received: size of decoded response body,
+        None if it's unknown (e.g. streamed responses)
+    :ivar int retries: number of retries
+    :ivar float queue_wait: time spent waiting for rate limiter or free slot
+    :ivar float ttfb: time to first byte (response headers)
+    :ivar float body_read: time spent reading response body
+    :ivar float decode: time spent deserializing response body
+    :ivar float duration: total time, including backoff between retries
+    :ivar error: exception if request failed
+    """
+
+    def __init__(self, method, url, started=None):
+        self.method = method
+        self.url = url
+        self.started = time.time() if started is None else started
+        self.status = None
+        self.bytes_sent = 0
+        self.bytes_received = None
+        self.uncompressed_bytes_sent = 0
+        self.uncompressed_bytes_received = None
+        self.retries = 0
+        self.queue_wait = 0.0
+        self.ttfb = None
+        self.body_read = None
+        self.decode = None
+        self.duration = None
+        self.error = None
+
+    def __repr__(self):
+        return '<RequestEvent {0} {1} {2}>'.format(self.method, self.endpoint,
+                                                   self.status or self.error)
+
+    @property
+    def endpoint(self):
+        """
+        Endpoint template of URL, e.g. ``/api/v2/orgs/{org}/orders/{id}/``.
+        """
+        return get_endpoint_template(self.url)
+
+    @property
+    def phases(self):
+        """
+        :returns: dict -- phase name -> seconds, unknown phases are skipped
+        """
+        return dict((phase, getattr(self, phase)) for phase in PHASES
+                    if getattr(self, phase) is not None)
+
+    def finish(self, response=None, error=None):
+        """
+        Record outcome of request.
+
+        :param response: response, if request wasn't failed
+        :param error: exception, if request failed
+        """
+        self.duration = time.time() - self.started
+        self.error = error
+        if response is not None:
+            self.status = response.status_code
+
+
+class Instrumentation(object):
+    """
+    Dispatches request events of client to listeners.
+
+    Listener is a callable which accepts RequestEvent. Exceptions raised by
+    listeners are logged and don't affect requests.
+    """
+
+    def __init__(self, listeners=None):
+        """
+        :param listeners: iterable of callables
+        """
+        self.listeners = list(listeners or [])
+
+    def add_listener(self, listener):
+        """
+        :param listener: callable which accepts RequestEvent
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    @contextlib.contextmanager
+    def collect(self):
+        """
+        Delay events of requests sent inside this block until its end, so
+        decoding of their responses can be recorded (see decode). Works
+        per thread and per asyncio task.
+        """
+        token = _pending.set([])
+        try:
+            yield
+        finally:
+            events = _pending.get()
+            _pending.reset(token)
+            for event in events:
+                self.dispatch(event)
+
+    def emit(self, event):
+        """
+        Dispatch event now or, inside collect block, at its end.
+
+        :param RequestEvent event: event
+        """
+        pending = _pending.get()
+        if pending is None:
+            self.dispatch(event)
+        else:
+            pending.append(event)
+
+    def decode(self, loads, response):
+        """
+        Call loads(response) and record its duration to event of the last
+        request sent inside current collect block.
+
+        :returns: result of loads
+        """
+        started = time.time()
+        try:
+            return loads(response)
+        finally:
+            pending = _pending.get()
+            if pending:
+                pending[-1].decode = time.time() - started
+
+    def dispatch(self, event):
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception('Request event listener %r failed', listener)
+
+
+class Histogram(object):
+    """
+    Histogram with fixed buckets.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets: upper bounds of buckets, +Inf bucket is implied
+        """
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """
+        :returns: list -- (upper bound, number of values <= bound) pairs,
+            the last bound is float('inf')
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class MetricsCollector(object):
+    """
+    Listener which aggregates request events per method and endpoint
+    template.
+
+    Exported metrics (with ``readycloud`` namespace):
+
+        - ``readycloud_requests_total`` by method, endpoint and status
+        - ``readycloud_request_errors_total`` by method, endpoint and error
+        - ``readycloud_request_retries_total`` by method and endpoint
+        - ``readycloud_request_sent_bytes_total`` and
+          ``readycloud_request_received_bytes_total``, compressed
+        - ``readycloud_request_sent_uncompressed_bytes_total`` and
+          ``readycloud_request_received_uncompressed_bytes_total``
+        - ``readycloud_request_duration_seconds`` histogram
+        - ``readycloud_request_phase_seconds`` histogram by phase
+        - ``readycloud_circuit_transitions_total`` by endpoint and new state
+          and ``readycloud_circuit_state`` gauge (1 for current state of
+          endpoint), from circuit breaker events passed to observe_circuit
+    """
+
+    def __init__(self, namespace='readycloud', buckets=Histogram.DEFAULT_BUCKETS):
+        """
+        :param str namespace: prefix of metric names
+        :param buckets: upper bounds of histogram buckets, seconds
+        """
+        self.namespace = namespace
+        self.buckets = buckets
+        self.requests = {}
+        self.errors = {}
+        self.retries = {}
+        self.bytes_sent = {}
+        self.bytes_received = {}
+        self.uncompressed_bytes_sent = {}
+        self.uncompressed_bytes_received = {}
+        self.durations = {}
+        self.phases = {}
+        self.circuit_transitions = {}
+        self.circuit_states = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        key = (event.method, event.endpoint)
+        status = str(event.status) if event.status is not None else 'error'
+        with self._lock:
+            _increment(self.requests, key + (status,))
+            if event.error is not None:
+                _increment(self.errors, key + (type(event.error).__name__,))
+            _increment(self.retries, key, event.retries)
+            _increment(self.bytes_sent, key, event.bytes_sent or 0)
+            _increment(self.bytes_received, key, event.bytes_received or 0)
+            _increment(self.uncompressed_bytes_sent, key, event.uncompressed_bytes_sent or 0)
+            _increment(self.uncompressed_bytes_received, key,
+                       event.uncompressed_bytes_received or 0)
+            if event.duration is not None:
+                self._histogram(self.durations, key).observe(event.duration)
+            for phase, value in event.phases.items():
+                self._histogram(self.phases, key + (phase,)).observe(value)
+
+    def observe_circuit(self, event):
+        """
+        Listener of readycloud.circuitbreaker.CircuitBreaker.
+
+        :param CircuitEvent event: state change of circuit
+        """
+        with self._lock:
+            _increment(self.circuit_transitions, (event.endpoint, event.state))
+            self.circuit_states[event.endpoint] = event.state
+
+    def _histogram(self, histograms, key):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        return histogram
+
+    def reset(self):
+        """
+        Drop all collected metrics.
+        """
+        with self._lock:
+            for metric in (self.requests, self.errors, self.retries, self.bytes_sent,
+                           self.bytes_received, self.uncompressed_bytes_sent,
+                           self.uncompressed_bytes_received, self.durations, self.phases,
+                           self.circuit_transitions, self.circuit_states):
+                metric.clear()
+
+    def render(self, openmetrics=True):
+        """
+        Render metrics in text exposition format.
+
+        :param bool openmetrics: OpenMetrics format if set, Prometheus
+            0.0.4 format otherwise (see OPENMETRICS_CONTENT_TYPE and
+            PROMETHEUS_CONTENT_TYPE)
+        :returns: str -- metrics
+        """
+        endpoint = ('method', 'endpoint')
+        lines = []
+        with self._lock:
+            self._render_counter(lines, 'requests', 'Requests sent',
+                                 endpoint + ('status',), self.requests, openmetrics)
+            self._render_counter(lines, 'request_errors', 'Requests failed without response',
+                                 endpoint + ('error',), self.errors, openmetrics)
+            self._render_counter(lines, 'request_retries', 'Retries of requests',
+                                 endpoint, self.retries, openmetrics)
+            self._render_counter(lines, 'request_sent_bytes', 'Bytes of request bodies',
+                                 endpoint, self.bytes_sent, openmetrics)
+            self._render_counter(lines, 'request_received_bytes', 'Bytes of response bodies',
+                                 endpoint, self.bytes_received, openmetrics)
+            self._render_counter(lines, 'request_sent_uncompressed_bytes',
+                                 'Bytes of request bodies before compression',
+                                 endpoint, self.uncompressed_bytes_sent, openmetrics)
+            self._render_counter(lines, 'request_received_uncompressed_bytes',
+                                 'Bytes of decoded response bodies',
+                                 endpoint, self.uncompressed_bytes_received, openmetrics)
+            self._render_histogram(lines, 'request_duration_seconds',
+                                   'Duration of requests including retries',
+                                   endpoint, self.durations)
+            self._render_histogram(lines, 'request_phase_seconds',
+                                   'Duration of phases of requests',
+                                   endpoint + ('phase',), self.phases)
+            self._render_counter(lines, 'circuit_transitions',
+                                 'State changes of circuit breaker',
+                                 ('endpoint', 'state'), self.circuit_transitions, openmetrics)
+            states = dict(((endpoint, state), int(state == current))
+                          for endpoint, current in self.circuit_states.items()
+                          for state in CIRCUIT_STATES)
+            self._render_gauge(lines, 'circuit_state', 'Current state of circuit breaker',
+                               ('endpoint', 'state'), states)
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def _render_counter(self, lines, name, help_text, labels, values, openmetrics):
+        name = '{0}_{1}'.format(self.namespace, name)
+        family = name if openmetrics else name + '_total'
+        lines.append('# HELP {0} {1}.'.format(family, help_text))
+        lines.append('# TYPE {0} counter'.format(family))
+        for key, value in sorted(values.items()):
+            lines.append('{0}_total{1} {2}'.format(name, _labels(zip(labels, key)),
+                                                   _number(value)))
+
+    def _render_gauge(self, lines, name, help_text, labels, values):
+        name = '{0}_{1}'.format(self.namespace, name)
+        lines.append('# HELP {0} {1}.'.format(name, help_text))
+        lines.append('# TYPE {0} gauge'.format(name))
+        for key, value in sorted(values.items()):
+            lines.append('{0}{1} {2}'.format(name, _labels(zip(labels, key)), _number(value)))
+
+    def _render_histogram(self, lines, name, help_text, labels, histograms):
+        name = '{0}_{1}'.format(self.namespace, name)
+        lines.append('# HELP {0} {1}.'.format(name, help_text))
+        lines.append('# TYPE {0} histogram'.format(name))
+        for key, histogram in sorted(histograms.items()):
+            pairs = list(zip(labels, key))
+            for bound, count in histogram.cumulative():
+                lines.append('{0}_bucket{1} {2}'.format(
+                    name, _labels(pairs + [('le', _number(bound))]), count))
+            lines.append('{0}_count{1} {2}'.format(name, _labels(pairs), histogram.count))
+            lines.append('{0}_sum{1} {2}'.format(name, _labels(pairs), _number(histogram.sum)))
+
+
+def _increment(counters, key, value=1):
+    counters[key] = counters.get(key, 0) + value
+
+
+def _labels(pairs):
+    return '{' + ','.join('{0}="{1}"'.format(name, _escape(value))
+                          for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
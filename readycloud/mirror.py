@@ -0,0 +1,195 @@
+# coding: utf-8
+"""
+readycloud.mirror
+----------------------------------
+
+Module which contains local SQLite mirror of orders.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+
+from .sync import is_deleted_order
+from .utils import RESPONSE_KEYS
+
+
+COLUMN_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def get_path(data, path):
+    """
+    Get value from nested dicts by dotted path.
+
+    :param dict data: data
+    :param str path: dotted path, e.g. 'customer.email'
+    :returns: value or None if path doesn't exist
+    """
+    for part in path.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+class OrderMirror(object):
+    """
+    Local copy of orders in indexed SQLite database.
+
+    Orders are stored as JSON with configured fields copied to indexed
+    columns, so lookups by them don't need API requests::
+
+        mirror = OrderMirror('orders.db')
+        rc = ReadyCloud(token='token', org_id='org', mirror=mirror)
+        for order in rc.iter_orders():
+            pass
+        mirror.find(status='new', email='john@example.com')
+
+    Client keeps mirror up to date: orders received through get_orders
+    (and everything built on it) and results of create, update and delete
+    calls are written to it.
+    """
+
+    DEFAULT_INDEXES = {
+        'number': 'number',
+        'status': 'status',
+        'email': 'email',
+    }
+
+    def __init__(self, path=':memory:', indexes=None, is_deleted=is_deleted_order):
+        """
+        :param str path: path to database file (in-memory database by default)
+        :param dict indexes: indexed column name -> dotted path in order
+        :param is_deleted: callable which checks if order was deleted,
+            such orders are removed from mirror
+        """
+        self.indexes = dict(indexes or self.DEFAULT_INDEXES)
+        for column in self.indexes:
+            if not COLUMN_RE.match(column) or column in ('id', 'data'):
+                raise ValueError('Invalid index name: {0}'.format(column))
+        self.is_deleted = is_deleted
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._create_schema(path)
+
+    def _create_schema(self, path):
+        columns = ''.join(', {0}'.format(column) for column in sorted(self.indexes))
+        with self._db:
+            if path != ':memory:':
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS orders '
+                             '(id TEXT PRIMARY KEY, data TEXT NOT NULL{0})'.format(columns))
+            for column in self.indexes:
+                self._db.execute('CREATE INDEX IF NOT EXISTS orders_{0} ON orders ({0})'
+                                 .format(column))
+        self._columns = sorted(self.indexes)
+        self._upsert_sql = 'INSERT OR REPLACE INTO orders (id, data{0}) VALUES (?, ?{1})'.format(
+            ''.join(', ' + column for column in self._columns),
+            ', ?' * len(self._columns))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def upsert(self, order):
+        """
+        Insert or replace order.
+
+        :param dict order: order, should have id
+        """
+        self.upsert_many([order])
+
+    def upsert_many(self, orders):
+        """
+        Insert or replace orders in one transaction. Orders marked as
+        deleted are removed.
+
+        :param orders: iterable of orders
+        """
+        rows = []
+        deleted = []
+        for order in orders:
+            order = dict((key, value) for key, value in order.items()
+                         if key not in RESPONSE_KEYS)
+            if order.get('id') is None:
+                continue
+            if self.is_deleted(order):
+                deleted.append((str(order['id']),))
+                continue
+            row = [str(order['id']), json.dumps(order)]
+            row.extend(_column_value(get_path(order, self.indexes[column]))
+                       for column in self._columns)
+            rows.append(row)
+        with self._lock, self._db:
+            self._db.executemany(self._upsert_sql, rows)
+            self._db.executemany('DELETE FROM orders WHERE id = ?', deleted)
+
+    def delete(self, order_id):
+        """
+        Remove order.
+
+        :param order_id: order id
+        """
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM orders WHERE id = ?', (str(order_id),))
+
+    def get(self, order_id):
+        """
+        Get order by id.
+
+        :param order_id: order id
+        :returns: dict -- order or None
+        """
+        with self._lock:
+            row = self._db.execute('SELECT data FROM orders WHERE id = ?',
+                                   (str(order_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, limit=None, **criteria):
+        """
+        Find orders by indexed fields.
+
+        :param int limit: max number of orders
+        :param dict criteria: indexed column -> value, list or tuple value
+            matches any of values
+        :returns: list -- orders
+        """
+        clauses = []
+        args = []
+        for column, value in sorted(criteria.items()):
+            if column not in self.indexes:
+                raise ValueError('{0} is not indexed'.format(column))
+            if isinstance(value, (list, tuple)):
+                clauses.append('{0} IN ({1})'.format(column, ', '.join('?' * len(value))))
+                args.extend(_column_value(v) for v in value)
+            else:
+                clauses.append('{0} = ?'.format(column))
+                args.append(_column_value(value))
+        sql = 'SELECT data FROM orders'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if limit is not None:
+            sql += ' LIMIT {0:d}'.format(limit)
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def find_one(self, **criteria):
+        """
+        Find first order by indexed fields, see find.
+
+        :returns: dict -- order or None
+        """
+        orders = self.find(limit=1, **criteria)
+        return orders[0] if orders else None
+
+
+def _column_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
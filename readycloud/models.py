@@ -0,0 +1,216 @@
+# coding: utf-8
+"""
+readycloud.models
+----------------------------------
+
+Module which contains compact typed records.
+
+Plain dicts of decoded responses take several times more memory than
+their JSON. Models keep declared top-level fields in slots and the rest
+of record (nested structures like items and addresses) as encoded JSON,
+which is decoded on first access::
+
+    orders = [Order.from_dict(order) for order in rc.iter_orders()]
+    orders[0].status        # slot
+    orders[0].items         # decoded from JSON now
+"""
+
+from collections import namedtuple
+
+from .codec import get_default_codec
+from .utils import RESPONSE_KEYS
+
+
+_codec = None
+
+
+def _get_codec():
+    global _codec
+    if _codec is None:
+        _codec = get_default_codec()
+    return _codec
+
+
+class ResponseMeta(namedtuple('ResponseMeta', ['status_code', 'ok'])):
+    """
+    Metadata of response, kept apart from records.
+    """
+
+    __slots__ = ()
+
+
+def split_response(response):
+    """
+    Split deserialized response returned by client into payload and
+    metadata.
+
+    :param dict response: deserialized response
+    :returns: tuple -- (payload dict without metadata keys, ResponseMeta)
+    """
+    payload = dict((key, value) for key, value in response.items()
+                   if key not in RESPONSE_KEYS)
+    return payload, ResponseMeta(response.get('status_code'), response.get('ok'))
+
+
+class LazyField(object):
+    """
+    Nested field decoded on first access, None if record doesn't have it.
+    Declaring known nested fields makes their access cheaper than lookup
+    of undeclared ones.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, record, owner):
+        if record is None:
+            return self
+        decoded = record._decoded
+        if decoded is None:
+            decoded = record._get_rest()
+        return decoded.get(self.name)
+
+
+class Model(object):
+    """
+    Base class of compact records.
+
+    Fields listed in FIELDS are stored in slots (missing ones are None),
+    other fields are available as attributes too, they are decoded from
+    JSON on first access of any of them.
+    """
+
+    FIELDS = ()
+
+    __slots__ = ('_rest', '_decoded')
+
+    def __init__(self, **fields):
+        self._set(fields, _get_codec())
+
+    @classmethod
+    def from_dict(cls, data, codec=None):
+        """
+        Build record from deserialized JSON object. Response metadata
+        (status_code, ok) isn't copied, see split_response.
+
+        :param dict data: record
+        :param codec: readycloud.codec.JSONCodec to encode nested fields
+        :returns: Model -- record
+        """
+        record = cls.__new__(cls)
+        record._set(data, codec or _get_codec())
+        return record
+
+    @classmethod
+    def many(cls, items, codec=None):
+        """
+        Build records lazily, e.g. from ``rc.iter_orders()``.
+
+        :param items: iterable of dicts
+        :returns: generator -- records
+        """
+        codec = codec or _get_codec()
+        for item in items:
+            yield cls.from_dict(item, codec)
+
+    def _set(self, data, codec):
+        fields = self.FIELDS
+        rest = dict((name, value) for name, value in data.items()
+                    if name not in fields and name not in RESPONSE_KEYS)
+        for name in fields:
+            setattr(self, name, data.get(name))
+        self._rest = codec.dumps(rest) if rest else None
+        self._decoded = None
+
+    def _get_rest(self):
+        if self._decoded is None:
+            self._decoded = _get_codec().loads(self._rest) if self._rest is not None else {}
+        return self._decoded
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._get_rest()[name]
+        except KeyError:
+            raise AttributeError('{0!r} object has no attribute {1!r}'.format(
+                type(self).__name__, name))
+
+    def get(self, name, default=None):
+        """
+        Get field value, default if record doesn't have it.
+        """
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            return default
+
+    def to_dict(self):
+        """
+        :returns: dict -- all fields of record, slot fields which are
+            None are skipped
+        """
+        data = dict((name, getattr(self, name)) for name in self.FIELDS
+                    if getattr(self, name) is not None)
+        data.update(self._get_rest())
+        return data
+
+    def release(self):
+        """
+        Drop decoded nested fields, they are decoded again on next access.
+        Changes made to them are lost.
+        """
+        self._decoded = None
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<{0} {1}>'.format(type(self).__name__, self.id)
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self._set(state, _get_codec())
+
+
+class Order(Model):
+    """
+    Order record.
+    """
+
+    FIELDS = ('id', 'number', 'status', 'message', 'email', 'created_at', 'updated_at')
+
+    __slots__ = FIELDS
+
+    items = LazyField('items')
+    addresses = LazyField('addresses')
+
+
+class Webhook(Model):
+    """
+    Webhook record.
+    """
+
+    FIELDS = ('id', 'entity', 'url')
+
+    __slots__ = FIELDS
+
+
+class Organization(Model):
+    """
+    Organization record.
+    """
+
+    FIELDS = ('id', 'name')
+
+    __slots__ = FIELDS
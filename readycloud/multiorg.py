@@ -0,0 +1,163 @@
+# coding: utf-8
+"""
+readycloud.multiorg
+----------------------------------
+
+Module which contains client for many organizations.
+"""
+
+import threading
+
+from .concurrency import imap_bounded, imerge
+from .readycloud import ReadyCloud
+
+
+class MultiOrgReadyCloud(object):
+    """
+    Client for working with many organizations through one connection
+    pool, rate limiter and cache.
+
+    for_org returns ReadyCloud bound to organization, which shares
+    transport (session), retry policy, rate limiter, cache, single flight,
+    codec, compression and listeners with all other organizations. Fan-out
+    methods query many organizations concurrently and yield results as
+    they arrive::
+
+        with MultiOrgReadyCloud(token='token', rate_limiter=TokenBucket(50)) as rc:
+            rc.for_org('org1').create_order(order)
+            for org_id, order in rc.iter_orders(['org1', 'org2'], status='new'):
+                process(org_id, order)
+    """
+
+    def __init__(self, token, host='https://readycloud.com/', session=None,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, timeout=None,
+                 retry=None, rate_limiter=None, cache=None, codec=None, listeners=None,
+                 compression=None, transport=None, single_flight=None, circuit_breaker=None,
+                 workers=8):
+        """
+        :param str token: your bearer token
+        :param str host: host with which you want to work (readycloud.com by default)
+        :param session: requests.Session shared by all organizations, see
+            ReadyCloud
+        :param int pool_connections: number of per-host connection pools to cache
+        :param int pool_maxsize: max number of kept-alive connections per
+            host, should be >= workers
+        :param bool pool_block: block when no free connection is available
+        :param timeout: default timeout (seconds) for every request
+        :param retry: readycloud.retry.RetryPolicy for failed requests
+        :param rate_limiter: readycloud.ratelimit.TokenBucket, limits
+            requests of all organizations together
+        :param cache: readycloud.cache.ResponseCache for GET responses of
+            all organizations
+        :param codec: readycloud.codec.JSONCodec for request and response bodies
+        :param listeners: callables which receive
+            readycloud.instrumentation.RequestEvent of every request
+        :param compression: readycloud.compression.Compression of request
+            bodies
+        :param transport: readycloud.transport.Transport shared by all
+            organizations (RequestsTransport over session by default)
+        :param single_flight: readycloud.singleflight.SingleFlight which
+            joins identical concurrent GET requests of all organizations
+        :param circuit_breaker: readycloud.circuitbreaker.CircuitBreaker
+            shared by all organizations
+        :param int workers: default number of concurrent requests of
+            fan-out methods
+        """
+        self.client = ReadyCloud(token, host=host, session=session,
+                                 pool_connections=pool_connections,
+                                 pool_maxsize=pool_maxsize, pool_block=pool_block,
+                                 timeout=timeout, retry=retry, rate_limiter=rate_limiter,
+                                 cache=cache, codec=codec, listeners=listeners,
+                                 compression=compression, transport=transport,
+                                 single_flight=single_flight,
+                                 circuit_breaker=circuit_breaker)
+        self.workers = workers
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Close shared session or transport, if client owns it.
+        """
+        self.client.close()
+
+    def for_org(self, org_id):
+        """
+        Get client bound to organization.
+
+        :param str org_id: hexahexacontadecimal encoded organization id
+        :returns: ReadyCloud -- client sharing resources of this client
+        """
+        with self._lock:
+            client = self._clients.get(org_id)
+            if client is None:
+                shared = self.client
+                client = ReadyCloud(shared.token, host=shared.host, org_id=org_id,
+                                    transport=shared.transport, timeout=shared.timeout,
+                                    retry=shared.retry, rate_limiter=shared.rate_limiter,
+                                    cache=shared.cache, codec=shared.codec,
+                                    compression=shared.compression,
+                                    single_flight=shared.single_flight,
+                                    circuit_breaker=shared.circuit_breaker)
+                client.instrumentation = shared.instrumentation
+                self._clients[org_id] = client
+            return client
+
+    def get_organizations(self, **kwargs):
+        """
+        Get organizations available for the token.
+
+        :param dict kwargs: filters, limit, offset, etc.
+        :returns: dict -- dictionary with response
+        """
+        return self.client.get_organizations(**kwargs)
+
+    def iter_organizations(self, limit=100, **kwargs):
+        """
+        Iterate over all organizations available for the token.
+
+        :returns: generator -- organizations
+        """
+        return self.client.iter_organizations(limit=limit, **kwargs)
+
+    def get_orders(self, org_ids, workers=None, **kwargs):
+        """
+        Get one page of orders of every organization concurrently.
+
+        :param org_ids: iterable of organization ids
+        :param int workers: number of concurrent requests
+        :param dict kwargs: filters, limit, offset, etc.
+        :returns: generator -- (org_id, response) pairs in order of
+            completion
+        """
+        def get_orders(org_id):
+            return org_id, self.for_org(org_id).get_orders(**kwargs)
+
+        return imap_bounded(get_orders, org_ids, workers=workers or self.workers,
+                            ordered=False)
+
+    def iter_orders(self, org_ids, limit=100, workers=None, **kwargs):
+        """
+        Iterate over all orders of organizations. Organizations are walked
+        concurrently and their orders are merged to one stream as pages
+        arrive.
+
+        :param org_ids: iterable of organization ids
+        :param int limit: page size
+        :param int workers: number of organizations walked at once
+        :param dict kwargs: filters
+        :returns: generator -- (org_id, order) pairs
+        """
+        def iter_org_orders(org_id):
+            for order in self.for_org(org_id).iter_orders(limit=limit, prefetch=0, **kwargs):
+                yield org_id, order
+
+        workers = workers or self.workers
+        return imerge((iter_org_orders(org_id) for org_id in org_ids), workers=workers,
+                      depth=limit * workers)
@@ -0,0 +1,197 @@
+# coding: utf-8
+"""
+readycloud.pagination
+----------------------------------
+
+Module with helpers for walking over paginated list endpoints.
+"""
+
+import threading
+from queue import Full, Queue
+
+from .concurrency import imap_bounded
+from .exceptions import ReadyCloudClientError
+from .utils import get_page_items, get_total_count
+
+
+def check_page(page):
+    """
+    Raise ReadyCloudClientError if page wasn't returned successfully.
+
+    :param dict page: deserialized response
+    """
+    if not page.get('ok', True):
+        raise ReadyCloudClientError(
+            'Page request failed with status {0}'.format(page.get('status_code')))
+
+
+def is_last_page(page, offset, items, limit):
+    """
+    Check if there is no pages after this one.
+
+    Uses total count or link to next page when endpoint returns them and
+    falls back to checking if page is shorter than requested limit.
+
+    :param dict page: deserialized response
+    :param int offset: offset of the page
+    :param list items: records from the page
+    :param int limit: requested page size
+    :returns: bool -- True if page is the last one
+    """
+    if not items:
+        return True
+    total = get_total_count(page)
+    if total is not None:
+        return offset + len(items) >= total
+    meta = page.get('meta') or {}
+    if 'next' in page or 'next' in meta:
+        return not (page.get('next') or meta.get('next'))
+    return len(items) < limit
+
+
+def walk_pages(fetch, limit=100, offset=0):
+    """
+    Fetch pages one by one until the last one.
+
+    :param fetch: callable which accepts limit and offset keyword arguments
+        and returns deserialized page
+    :param int limit: page size
+    :param int offset: offset of the first page
+    :returns: generator -- pages
+    """
+    while True:
+        page = fetch(limit=limit, offset=offset)
+        check_page(page)
+        items = get_page_items(page)
+        yield page
+        if is_last_page(page, offset, items, limit):
+            return
+        offset += len(items)
+
+
+def prefetch(iterable, depth=1):
+    """
+    Consume iterable in a background thread, keeping up to depth items
+    ready ahead of the caller.
+
+    Exceptions raised by iterable are re-raised to the caller. When caller
+    stops iteration early, background thread stops after current item.
+
+    :param iterable: iterable to consume
+    :param int depth: max number of items produced ahead
+    :returns: generator -- items of iterable
+    """
+    queue = Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except BaseException as exc:
+            put((False, exc))
+        else:
+            put((False, None))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            has_item, value = queue.get()
+            if not has_item:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stop.set()
+
+
+def iter_pages(fetch, limit=100, offset=0, prefetch_pages=1):
+    """
+    Iterate over pages, downloading next pages in background while caller
+    works with current one.
+
+    :param fetch: callable which accepts limit and offset keyword arguments
+        and returns deserialized page
+    :param int limit: page size
+    :param int offset: offset of the first page
+    :param int prefetch_pages: number of pages fetched ahead (0 - no
+        background fetching)
+    :returns: generator -- pages
+    """
+    pages = walk_pages(fetch, limit=limit, offset=offset)
+    if prefetch_pages > 0:
+        pages = prefetch(pages, depth=prefetch_pages)
+    return pages
+
+
+def iter_pages_parallel(fetch, limit=100, offset=0, workers=4):
+    """
+    Fetch first page to learn total count, then fetch remaining pages
+    concurrently on a thread pool. Pages are yielded in offset order.
+
+    Endpoint should return total count, otherwise pages are fetched one by
+    one. Records created or deleted during iteration may shift offsets, so
+    use stable ordering filter for exports of changing data.
+
+    :param fetch: callable which accepts limit and offset keyword arguments
+        and returns deserialized page
+    :param int limit: page size
+    :param int offset: offset of the first page
+    :param int workers: number of concurrent page requests
+    :returns: generator -- pages
+    """
+    page = fetch(limit=limit, offset=offset)
+    check_page(page)
+    items = get_page_items(page)
+    yield page
+    total = get_total_count(page)
+    if is_last_page(page, offset, items, limit):
+        return
+    if total is None:
+        for page in walk_pages(fetch, limit=limit, offset=offset + len(items)):
+            yield page
+        return
+
+    # server may cap page size, so step by the size it actually returned
+    step = len(items)
+
+    def fetch_window(window_offset):
+        window = fetch(limit=step, offset=window_offset)
+        check_page(window)
+        return window
+
+    offsets = range(offset + step, total, step)
+    for page in imap_bounded(fetch_window, offsets, workers=workers):
+        yield page
+
+
+def iter_items(fetch, limit=100, offset=0, prefetch_pages=1, workers=0):
+    """
+    Iterate over records of all pages, see iter_pages.
+
+    At most prefetch_pages + 2 pages are kept in memory at once. If workers
+    is set, pages are fetched concurrently, see iter_pages_parallel.
+
+    :returns: generator -- records
+    """
+    if workers:
+        pages = iter_pages_parallel(fetch, limit=limit, offset=offset, workers=workers)
+    else:
+        pages = iter_pages(fetch, limit=limit, offset=offset,
+                           prefetch_pages=prefetch_pages)
+    for page in pages:
+        for item in get_page_items(page):
+            yield item
@@ -0,0 +1,263 @@
+# coding: utf-8
+"""
+readycloud.pipeline
+----------------------------------
+
+Module which contains staged bulk-ingest pipeline.
+
+Records flow through three stages which run concurrently:
+
+    - source -- iterator of records (e.g. rows of partner file), read in
+      chunks by a background thread
+    - transform -- CPU-heavy mapping of records to ReadyCloud orders, run
+      on a process pool chunk by chunk
+    - upload -- API call per transformed record on a bounded thread pool
+
+Stages are connected by bounded queues, so a slow stage throttles the ones
+before it and memory doesn't depend on number of records::
+
+    pipeline = Pipeline(read_rows('orders.csv'), rc.create_order,
+                        transform=map_row, processes=4, workers=16)
+    for result in pipeline.run():
+        if not result.ok:
+            log_failure(result)
+    print(pipeline.stats)
+
+Transform must be picklable (a module-level function) when it runs on a
+process pool.
+"""
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from queue import Full, Queue
+
+from .bulk import BulkResult
+from .concurrency import imap_bounded
+
+
+SOURCE = 'source'
+TRANSFORM = 'transform'
+UPLOAD = 'upload'
+STAGES = (SOURCE, TRANSFORM, UPLOAD)
+
+
+class StageStats(object):
+    """
+    Thread-safe counters of pipeline stage.
+
+    :ivar str name: stage name
+    :ivar int items: number of processed records
+    :ivar int errors: number of records failed in this stage
+    :ivar float busy: seconds spent processing records, summed over
+        workers of the stage
+    """
+
+    def __init__(self, name, clock=time.time):
+        self.name = name
+        self.clock = clock
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        """
+        Seconds since pipeline was started until it finished (or now).
+        """
+        if self.started is None:
+            return 0.0
+        return (self.finished or self.clock()) - self.started
+
+    @property
+    def throughput(self):
+        """
+        Records per second.
+        """
+        elapsed = self.elapsed
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def add(self, items, busy, errors=0):
+        """
+        :param int items: number of processed records
+        :param float busy: seconds spent processing them
+        :param int errors: number of failed records among them
+        """
+        with self._lock:
+            self.items += items
+            self.errors += errors
+            self.busy += busy
+
+    def as_dict(self):
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'busy': self.busy,
+            'elapsed': self.elapsed,
+            'throughput': self.throughput,
+        }
+
+
+class Pipeline(object):
+    """
+    Bulk-ingest pipeline of source, transform and upload stages.
+    """
+
+    def __init__(self, source, upload, transform=None, processes=None, chunk_size=100,
+                 workers=8, queue_size=None, ordered=True, clock=time.time):
+        """
+        :param source: iterable of records, consumed lazily
+        :param upload: callable which accepts transformed record and
+            returns deserialized response, e.g. ReadyCloud.create_order
+        :param transform: callable which maps source record to record for
+            upload (records are uploaded as is by default)
+        :param int processes: size of process pool of transform stage
+            (number of CPUs by default), 0 runs transform in the source
+            thread
+        :param int chunk_size: number of records sent to process at once
+        :param int workers: number of concurrent uploads
+        :param int queue_size: max number of chunks read ahead of upload
+            stage (2 * processes by default)
+        :param bool ordered: yield results in order of source records,
+            otherwise as soon as they are uploaded
+        :param clock: function which returns current time in seconds
+        """
+        if processes is None:
+            processes = os.cpu_count() or 1
+        self.source = source
+        self.upload = upload
+        self.transform = transform
+        self.processes = processes if transform is not None else 0
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.queue_size = queue_size or max(self.processes, 1) * 2
+        self.ordered = ordered
+        self.stages = dict((name, StageStats(name, clock)) for name in STAGES)
+
+    @property
+    def stats(self):
+        """
+        :returns: dict -- stage name -> dict with items, errors, busy
+            seconds, elapsed seconds and throughput (records per second)
+        """
+        return dict((name, stage.as_dict()) for name, stage in self.stages.items())
+
+    def run(self):
+        """
+        Run pipeline.
+
+        Transform or upload errors of one record don't stop the others,
+        error of source iterator is re-raised. When caller stops iteration
+        early, reading of source stops and pending chunks are dropped.
+
+        :returns: generator -- BulkResult per source record, with source
+            record as item and error of transform or upload
+        """
+        chunks = Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        executor = ProcessPoolExecutor(self.processes) if self.processes else None
+        for stage in self.stages.values():
+            stage.started = stage.clock()
+        reader = threading.Thread(target=self._read, args=(chunks, stop, executor))
+        reader.daemon = True
+        reader.start()
+        try:
+            for result in imap_bounded(self._upload, self._transformed(chunks),
+                                       workers=self.workers, ordered=self.ordered):
+                yield result
+        finally:
+            stop.set()
+            reader.join()
+            while not chunks.empty():
+                entry = chunks.get()
+                if entry is not None and entry[2] is not None:
+                    entry[2].cancel()
+            if executor is not None:
+                executor.shutdown(wait=True)
+            for stage in self.stages.values():
+                stage.finished = stage.clock()
+
+    def _read(self, chunks, stop, executor):
+        # source stage: (start index, chunk, future of transformed chunk)
+        # entries, (None, exception, None) if source failed, None at the end
+        def put(entry):
+            while not stop.is_set():
+                try:
+                    chunks.put(entry, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        stage = self.stages[SOURCE]
+        index = 0
+        try:
+            iterator = iter(self.source)
+            while not stop.is_set():
+                started = time.time()
+                chunk = list(itertools.islice(iterator, self.chunk_size))
+                stage.add(len(chunk), time.time() - started)
+                if not chunk:
+                    break
+                if executor is not None:
+                    future = executor.submit(_transform_chunk, self.transform, chunk)
+                else:
+                    future = Future()
+                    future.set_result(_transform_chunk(self.transform, chunk))
+                if not put((index, chunk, future)):
+                    return
+                index += len(chunk)
+        except BaseException as exc:
+            put((None, exc, None))
+        else:
+            put(None)
+
+    def _transformed(self, chunks):
+        stage = self.stages[TRANSFORM]
+        while True:
+            entry = chunks.get()
+            if entry is None:
+                return
+            start, chunk, future = entry
+            if future is None:
+                raise chunk
+            try:
+                results, busy = future.result()
+            except Exception as exc:
+                # e.g. transform or its result can't be pickled
+                results, busy = [(False, exc)] * len(chunk), 0.0
+            stage.add(len(chunk), busy, errors=sum(1 for ok, _ in results if not ok))
+            for offset, (record, (ok, value)) in enumerate(zip(chunk, results)):
+                yield start + offset, record, value if ok else None, None if ok else value
+
+    def _upload(self, entry):
+        index, record, transformed, error = entry
+        if error is not None:
+            return BulkResult(index, record, None, error)
+        started = time.time()
+        try:
+            result = BulkResult(index, record, self.upload(transformed), None)
+        except Exception as exc:
+            result = BulkResult(index, record, None, exc)
+        self.stages[UPLOAD].add(1, time.time() - started, errors=int(not result.ok))
+        return result
+
+
+def _transform_chunk(transform, chunk):
+    # runs in worker process, returns (ok, record or error) per record
+    started = time.time()
+    results = []
+    for record in chunk:
+        if transform is None:
+            results.append((True, record))
+            continue
+        try:
+            results.append((True, transform(record)))
+        except Exception as exc:
+            results.append((False, exc))
+    return results, time.time() - started
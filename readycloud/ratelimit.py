@@ -0,0 +1,131 @@
+# coding: utf-8
+"""
+readycloud.ratelimit
+----------------------------------
+
+Module which contains client-side rate limiter.
+"""
+
+import asyncio
+import threading
+import time
+
+from .retry import parse_retry_after
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket which adapts its rate to server responses.
+
+    One bucket may be shared by several clients, threads and asyncio tasks.
+    Rate is adapted AIMD-style: on 429 it's multiplied by decrease_factor
+    and bucket is paused for Retry-After, every successful response adds
+    increase to the rate. When server reports remaining quota in rate-limit
+    headers, rate is capped to spread remaining requests until reset.
+    """
+
+    REMAINING_HEADERS = ('X-RateLimit-Remaining', 'RateLimit-Remaining')
+    RESET_HEADERS = ('X-RateLimit-Reset', 'RateLimit-Reset')
+
+    def __init__(self, rate=10.0, burst=None, min_rate=0.5, max_rate=None,
+                 increase=0.1, decrease_factor=0.5, clock=time.time):
+        """
+        :param float rate: initial number of requests per second
+        :param float burst: bucket capacity (rate by default)
+        :param float min_rate: rate is never decreased below this value
+        :param float max_rate: rate is never increased above this value
+            (unlimited by default)
+        :param float increase: rate increase after successful response
+        :param float decrease_factor: rate multiplier after 429 response
+        :param clock: function which returns current time in seconds
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token and return how long caller should wait before sending
+        request. Tokens may be reserved ahead, so concurrent callers are
+        spread over time instead of waking up at once.
+
+        :returns: float -- seconds to wait
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        """
+        Block current thread until request may be sent.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Wait (without blocking event loop) until request may be sent.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update(self, response):
+        """
+        Adapt rate to response.
+
+        :param response: response with status_code and headers
+        """
+        headers = response.headers
+        with self._lock:
+            if response.status_code == 429:
+                self._set_rate(self.rate * self.decrease_factor)
+                retry_after = parse_retry_after(headers.get('Retry-After'))
+                if retry_after:
+                    self._paused_until = max(self._paused_until, self.clock() + retry_after)
+                self._tokens = min(self._tokens, 0)
+            elif response.status_code < 400:
+                self._set_rate(self.rate + self.increase)
+            quota_rate = self._get_quota_rate(headers)
+            if quota_rate is not None and quota_rate < self.rate:
+                self._set_rate(quota_rate)
+
+    def _set_rate(self, rate):
+        rate = max(self.min_rate, rate)
+        if self.max_rate is not None:
+            rate = min(self.max_rate, rate)
+        self.rate = rate
+
+    def _get_quota_rate(self, headers):
+        remaining = _get_number(headers, self.REMAINING_HEADERS)
+        reset = _get_number(headers, self.RESET_HEADERS)
+        if remaining is None or reset is None:
+            return None
+        if reset > 1e9:
+            # epoch timestamp instead of number of seconds
+            reset -= self.clock()
+        return remaining / max(reset, 1.0)
+
+
+def _get_number(headers, names):
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
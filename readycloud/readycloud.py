@@ -6,86 +6,112 @@ readycloud.readycloud
 Module which contains ReadyCloud class.
 """
 
-import requests
-import json
+import time
 
+from requests.exceptions import ConnectionError, Timeout
+
+from .bulk import run_bulk
+from .codec import get_default_codec
 from .decorators import safe_json_request
-from .utils import urljoin
+from .instrumentation import Instrumentation, RequestEvent
+from .pagination import iter_items
+from .singleflight import make_key
+from .streaming import StreamingPage
+from .transport import RequestsTransport
+from .utils import urljoin, get_page_items
+from .webhooks import CREATE, UPDATE, WebhookSyncReport, diff_webhooks
 
 
-class ReadyCloud(object):
+class BaseReadyCloud(object):
     """
-    Class for working with ReadyCloud API.
+    Base class for ReadyCloud API clients.
+
+    Contains URL builders and API methods, subclasses implement HTTP verbs
+    (``get``, ``post``, ``put``, ``patch``, ``delete``). API methods return
+    whatever verbs return, so for asynchronous client they return awaitables.
     """
 
     API_V1 = 'v1'
     API_V2 = 'v2'
 
-    def __init__(self, token, host='https://readycloud.com/', org_id=None, api=API_V2):
+    def __init__(self, token, host='https://readycloud.com/', org_id=None, api=API_V2,
+                 retry=None, rate_limiter=None, codec=None, listeners=None,
+                 compression=None, circuit_breaker=None):
         """
         :param str token: your bearer token
         :param str host: host with which you want to work (readycloud.com by default)
         :param str org_id: hexahexacontadecimal encoded organization id
         :param str api: api version (v2 by default)
+        :param retry: readycloud.retry.RetryPolicy for failed requests
+            (no retries by default)
+        :param rate_limiter: readycloud.ratelimit.TokenBucket, may be shared
+            between clients
+        :param codec: readycloud.codec.JSONCodec for request and response
+            bodies (fastest installed by default)
+        :param listeners: callables which receive
+            readycloud.instrumentation.RequestEvent of every request
+        :param compression: readycloud.compression.Compression of request
+            bodies (bodies are sent uncompressed by default)
+        :param circuit_breaker: readycloud.circuitbreaker.CircuitBreaker
+            which fails calls to failing endpoints fast, may be shared
+            between clients (off by default)
         """
         self.token = token
         self.host = host
         self.api = api
         self.org_id = org_id
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.codec = codec or get_default_codec()
+        self.instrumentation = Instrumentation(listeners)
+        self.compression = compression
+        self.circuit_breaker = circuit_breaker
 
-    @safe_json_request
-    def get(self, url, params):
+    def encode_body(self, event, kwargs):
         """
-        Do GET request to ReadyCloud.
+        Compress request body in kwargs of request according to
+        compression settings and record its sizes to event.
 
-        :param str url: URL to which you want to do request
-        :param dict params: dict with request params
-        :returns: dict -- dictionary with response
+        :param RequestEvent event: event of request
+        :param dict kwargs: arguments of request with ``headers``
         """
-        return requests.get(url, params=params, headers=self.get_headers())
+        data = kwargs.get('data')
+        if not isinstance(data, bytes):
+            return
+        event.uncompressed_bytes_sent = len(data)
+        if self.compression is not None:
+            data, encoding = self.compression.compress(data)
+            if encoding is not None:
+                headers = dict(kwargs['headers'])
+                headers['Content-Encoding'] = encoding
+                kwargs['headers'] = headers
+                kwargs['data'] = data
+        event.bytes_sent = len(data)
 
-    @safe_json_request
-    def post(self, url, data):
+    def get_retry_delay(self, method, attempt, response=None, error=None):
         """
-        Do POST request to ReadyCloud.
+        Get delay before retry of failed request.
 
-        :param str url: URL to which you want to do request
-        :param dict data: dict with POST data
-        :returns: dict -- dictionary with response
+        :returns: float -- seconds to wait or None if request shouldn't be retried
         """
-        return requests.post(url, data=json.dumps(data), headers=self.get_headers())
+        if self.retry is None:
+            return None
+        return self.retry.next_delay(method, attempt, response=response, error=error)
 
-    @safe_json_request
-    def put(self, url, data):
-        """
-        Do PUT request to ReadyCloud.
+    def get(self, url, params):
+        raise NotImplementedError()
 
-        :param str url: URL to which you want to do request
-        :param dict data: dict with data which you want to PUT
-        :returns: dict -- dictionary with response
-        """
-        return requests.put(url, data=json.dumps(data), headers=self.get_headers())
+    def post(self, url, data):
+        raise NotImplementedError()
 
-    @safe_json_request
-    def patch(self, url, data):
-        """
-        Do PATCH request to ReadyCloud.
+    def put(self, url, data):
+        raise NotImplementedError()
 
-        :param str url: URL to which you want to do request
-        :param dict data: dict with data which you want to PUT
-        :returns: dict -- dictionary with response
-        """
-        return requests.patch(url, data=json.dumps(data), headers=self.get_headers())
+    def patch(self, url, data):
+        raise NotImplementedError()
 
-    @safe_json_request
     def delete(self, url):
-        """
-        Do DELETE request to ReadyCloud.
-
-        :param str url: URL to which you want to do request
-        :returns: dict -- dictionary with response
-        """
-        return requests.delete(url, headers=self.get_headers())
+        raise NotImplementedError()
 
     def get_orders(self, **kwargs):
         """
@@ -281,3 +307,425 @@ class ReadyCloud(object):
         :returns: str -- absolute URL to organizations endpoint
         """
         return urljoin(self.host, '/api/v2/orgs/')
+
+
+class ReadyCloud(BaseReadyCloud):
+    """
+    Class for working with ReadyCloud API.
+    """
+
+    def __init__(self, token, host='https://readycloud.com/', org_id=None, api=BaseReadyCloud.API_V2,
+                 session=None, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 timeout=None, retry=None, rate_limiter=None, cache=None, mirror=None,
+                 codec=None, listeners=None, compression=None, transport=None,
+                 single_flight=None, circuit_breaker=None):
+        """
+        :param str token: your bearer token
+        :param str host: host with which you want to work (readycloud.com by default)
+        :param str org_id: hexahexacontadecimal encoded organization id
+        :param str api: api version (v2 by default)
+        :param session: requests.Session to use for all requests. If not
+            provided, client creates (and owns) its own keep-alive session.
+            Ignored if transport is set.
+        :param int pool_connections: number of per-host connection pools to cache
+        :param int pool_maxsize: max number of kept-alive connections per host,
+            should be >= number of threads which share this client
+        :param bool pool_block: block when no free connection is available
+            instead of opening a throwaway one
+        :param timeout: default timeout (seconds) for every request
+        :param retry: readycloud.retry.RetryPolicy for failed requests
+            (no retries by default)
+        :param rate_limiter: readycloud.ratelimit.TokenBucket, may be shared
+            between clients and threads
+        :param cache: readycloud.cache.ResponseCache for GET responses
+            (no caching by default)
+        :param mirror: readycloud.mirror.OrderMirror which is kept up to
+            date with orders received and changed through this client
+        :param codec: readycloud.codec.JSONCodec for request and response
+            bodies (orjson or ujson if installed, json otherwise)
+        :param listeners: callables which receive
+            readycloud.instrumentation.RequestEvent of every request,
+            e.g. readycloud.instrumentation.MetricsCollector
+        :param compression: readycloud.compression.Compression of request
+            bodies, also sets Accept-Encoding of requests (bodies are sent
+            uncompressed by default)
+        :param transport: readycloud.transport.Transport which sends
+            requests, RequestsTransport over session by default. Transport
+            passed by the caller isn't closed by client.
+        :param single_flight: readycloud.singleflight.SingleFlight which
+            joins identical concurrent GET requests, may be shared between
+            clients (off by default)
+        :param circuit_breaker: readycloud.circuitbreaker.CircuitBreaker
+            which fails calls to failing endpoints fast, may be shared
+            between clients (off by default)
+        """
+        super(ReadyCloud, self).__init__(token, host=host, org_id=org_id, api=api,
+                                         retry=retry, rate_limiter=rate_limiter,
+                                         codec=codec, listeners=listeners,
+                                         compression=compression,
+                                         circuit_breaker=circuit_breaker)
+        self.timeout = timeout
+        self.cache = cache
+        self.mirror = mirror
+        self.single_flight = single_flight
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = RequestsTransport(session, pool_connections=pool_connections,
+                                          pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.transport = transport
+
+    @property
+    def session(self):
+        """
+        requests.Session of RequestsTransport, None for other transports.
+        """
+        return getattr(self.transport, 'session', None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Close underlying HTTP session and release pooled connections.
+
+        Session or transport passed by the caller is left open, caller
+        owns it.
+        """
+        if self._owns_transport:
+            self.transport.close()
+
+    def get_headers(self):
+        """
+        Get http headers for request, with Accept-Encoding if compression
+        is set.
+
+        :returns: dict -- dictionary with headers
+        """
+        headers = super(ReadyCloud, self).get_headers()
+        if self.compression is not None:
+            headers['Accept-Encoding'] = self.compression.accept_encoding
+        return headers
+
+    def request(self, method, url, **kwargs):
+        """
+        Send request through the transport, waiting for rate limiter
+        and retrying according to retry policy. Writes invalidate cached
+        responses of changed URL. Request is reported to listeners and
+        circuit breaker.
+
+        :param str method: HTTP method
+        :param str url: URL to which you want to do request
+        :param dict kwargs: extra arguments for transport (params, data,
+            headers, timeout, stream)
+        :returns: requests.Response -- raw response
+        :raises ReadyCloudCircuitOpenError: if circuit of endpoint is open
+        """
+        event = RequestEvent(method, url)
+        admitted = None
+        try:
+            if self.circuit_breaker is not None:
+                admitted = self.circuit_breaker.acquire(url)
+            response = self._send(method, url, event, **kwargs)
+        except Exception as exc:
+            event.finish(error=exc)
+            raise
+        else:
+            event.finish(response)
+            return response
+        finally:
+            if admitted is not None:
+                self.circuit_breaker.record(event, admitted)
+            self.instrumentation.emit(event)
+            if self.cache is not None and method != 'GET':
+                self.cache.invalidate(url)
+
+    def _send(self, method, url, event, **kwargs):
+        kwargs.setdefault('headers', self.get_headers())
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        self.encode_body(event, kwargs)
+        attempt = 0
+        while True:
+            event.retries = attempt
+            if self.rate_limiter is not None:
+                started = time.time()
+                self.rate_limiter.acquire()
+                event.queue_wait += time.time() - started
+            started = time.time()
+            try:
+                response = self.transport.request(method, url, **kwargs)
+            except (ConnectionError, Timeout) as exc:
+                delay = self.get_retry_delay(method, attempt, error=exc)
+                if delay is None:
+                    raise
+            else:
+                _record_timings(event, response, time.time() - started, kwargs.get('stream'))
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(response)
+                delay = self.get_retry_delay(method, attempt, response=response)
+                if delay is None:
+                    return response
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    @safe_json_request
+    def get(self, url, params):
+        """
+        Do GET request to ReadyCloud. Identical requests of other threads
+        which are in flight are joined, if single_flight is set.
+
+        :param str url: URL to which you want to do request
+        :param dict params: dict with request params
+        :returns: dict -- dictionary with response
+        """
+        if self.single_flight is None:
+            return self._get(url, params)
+        return self.single_flight.do(make_key(url, params, self.token),
+                                     lambda: self._get(url, params))
+
+    def _get(self, url, params):
+        if self.cache is None:
+            return self.request('GET', url, params=params)
+
+        def send(validators):
+            headers = self.get_headers()
+            headers.update(validators)
+            return self.request('GET', url, params=params, headers=headers)
+        return self.cache.get(url, params, self.token, send)
+
+    @safe_json_request
+    def post(self, url, data):
+        """
+        Do POST request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :param dict data: dict with POST data
+        :returns: dict -- dictionary with response
+        """
+        return self.request('POST', url, data=self.codec.dumps(data))
+
+    @safe_json_request
+    def put(self, url, data):
+        """
+        Do PUT request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :param dict data: dict with data which you want to PUT
+        :returns: dict -- dictionary with response
+        """
+        return self.request('PUT', url, data=self.codec.dumps(data))
+
+    @safe_json_request
+    def patch(self, url, data):
+        """
+        Do PATCH request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :param dict data: dict with data which you want to PUT
+        :returns: dict -- dictionary with response
+        """
+        return self.request('PATCH', url, data=self.codec.dumps(data))
+
+    @safe_json_request
+    def delete(self, url):
+        """
+        Do DELETE request to ReadyCloud.
+
+        :param str url: URL to which you want to do request
+        :returns: dict -- dictionary with response
+        """
+        return self.request('DELETE', url)
+
+    def stream(self, url, params, chunk_size=65536):
+        """
+        Do GET request to list endpoint and decode records while response
+        is downloaded.
+
+        :param str url: URL to which you want to do request
+        :param dict params: dict with request params
+        :param int chunk_size: size of chunks read from socket
+        :returns: readycloud.streaming.StreamingPage -- page with records
+        """
+        response = self.request('GET', url, params=params, stream=True)
+        return StreamingPage(response, chunk_size=chunk_size)
+
+    def stream_orders(self, chunk_size=65536, **kwargs):
+        """
+        Get page of orders, decoding orders one by one while page is
+        downloaded. Peak memory doesn't depend on page size.
+
+        :param int chunk_size: size of chunks read from socket
+        :param dict kwargs: filters, limit, offset, etc.
+        :returns: readycloud.streaming.StreamingPage -- page with orders
+        """
+        return self.stream(self.get_orders_url(), params=kwargs, chunk_size=chunk_size)
+
+    def get_orders(self, **kwargs):
+        """
+        Get orders, received orders are written to mirror.
+        """
+        response = super(ReadyCloud, self).get_orders(**kwargs)
+        if self.mirror is not None and response.get('ok'):
+            self.mirror.upsert_many(get_page_items(response))
+        return response
+
+    def create_order(self, order):
+        """
+        Create a new order, created order is written to mirror.
+        """
+        response = super(ReadyCloud, self).create_order(order)
+        if self.mirror is not None and response.get('ok'):
+            self.mirror.upsert(response)
+        return response
+
+    def update_order(self, order_id, order):
+        """
+        Update an existing order, updated order is written to mirror.
+        """
+        response = super(ReadyCloud, self).update_order(order_id, order)
+        if self.mirror is not None and response.get('ok'):
+            if response.get('id') is None:
+                response_order = dict(order, id=order_id)
+            else:
+                response_order = response
+            self.mirror.upsert(response_order)
+        return response
+
+    def delete_order(self, order_id):
+        """
+        Delete order, deleted order is removed from mirror.
+        """
+        response = super(ReadyCloud, self).delete_order(order_id)
+        if self.mirror is not None and response.get('ok'):
+            self.mirror.delete(order_id)
+        return response
+
+    def iter_orders(self, limit=100, prefetch=1, workers=0, **kwargs):
+        """
+        Iterate over all orders, page by page. Next pages are downloaded in
+        background while caller processes current one.
+
+        With workers set, first page is fetched to learn total count and the
+        rest of pages are fetched concurrently (for full exports).
+
+        :param int limit: page size
+        :param int prefetch: number of pages fetched ahead
+        :param int workers: number of concurrent page requests (0 - off)
+        :param dict kwargs: filters
+        :returns: generator -- orders
+        """
+        return self._iter(self.get_orders, kwargs, limit, prefetch, workers)
+
+    def iter_webhooks(self, limit=100, prefetch=1, workers=0, **kwargs):
+        """
+        Iterate over all registered webhooks, see iter_orders.
+
+        :returns: generator -- webhooks
+        """
+        return self._iter(self.get_webhooks, kwargs, limit, prefetch, workers)
+
+    def iter_organizations(self, limit=100, prefetch=1, workers=0, **kwargs):
+        """
+        Iterate over all organizations, see iter_orders.
+
+        :returns: generator -- organizations
+        """
+        return self._iter(self.get_organizations, kwargs, limit, prefetch, workers)
+
+    def _iter(self, method, filters, limit, prefetch, workers):
+        def fetch(**page):
+            params = dict(filters)
+            params.update(page)
+            return method(**params)
+        return iter_items(fetch, limit=limit, prefetch_pages=prefetch, workers=workers)
+
+    def bulk_create_orders(self, orders, workers=8, ordered=True):
+        """
+        Create many orders with bounded parallelism.
+
+        :param orders: iterable or generator of orders, consumed lazily
+        :param int workers: number of concurrent requests
+        :param bool ordered: yield results in order of orders
+        :returns: generator -- readycloud.bulk.BulkResult per order
+        """
+        return run_bulk(self.create_order, orders, workers=workers, ordered=ordered)
+
+    def bulk_update_orders(self, orders, workers=8, ordered=True):
+        """
+        Update many orders with bounded parallelism.
+
+        :param orders: iterable of (order_id, order) pairs
+        :param int workers: number of concurrent requests
+        :param bool ordered: yield results in order of orders
+        :returns: generator -- readycloud.bulk.BulkResult per order
+        """
+        return run_bulk(lambda pair: self.update_order(*pair), orders,
+                        workers=workers, ordered=ordered)
+
+    def bulk_delete_orders(self, order_ids, workers=8, ordered=True):
+        """
+        Delete many orders with bounded parallelism.
+
+        :param order_ids: iterable of order ids
+        :param int workers: number of concurrent requests
+        :param bool ordered: yield results in order of ids
+        :returns: generator -- readycloud.bulk.BulkResult per order
+        """
+        return run_bulk(self.delete_order, order_ids, workers=workers, ordered=ordered)
+
+    def sync_webhooks(self, desired, prune=False, dry_run=False, workers=8):
+        """
+        Bring registered webhooks to desired set with the least number of
+        API calls.
+
+        Registered webhooks are fetched once (page by page), only needed
+        creates, updates and deletes are sent, concurrently. See
+        readycloud.webhooks.diff_webhooks.
+
+        :param desired: iterable of (entity, url) pairs or dict entity -> url
+        :param bool prune: delete (or reuse) webhooks which aren't desired,
+            across all entities. Stale webhooks are kept by default.
+        :param bool dry_run: only compute changes, don't apply them
+        :param int workers: number of concurrent requests
+        :returns: readycloud.webhooks.WebhookSyncReport -- report
+        """
+        if isinstance(desired, dict):
+            desired = desired.items()
+        existing = list(self.iter_webhooks())
+        changes = diff_webhooks(existing, desired, prune=prune)
+        unchanged = len(existing) - sum(1 for change in changes if change.webhook_id is not None)
+        results = []
+        if not dry_run:
+            results = list(run_bulk(self._apply_webhook_change, changes, workers=workers))
+        return WebhookSyncReport(changes, results, unchanged, dry_run)
+
+    def _apply_webhook_change(self, change):
+        if change.action == CREATE:
+            return self.create_webhook(change.entity, change.url)
+        if change.action == UPDATE:
+            return self.update_webhook(change.webhook_id, change.entity, change.url)
+        return self.delete_webhook(change.webhook_id)
+
+
+def _record_timings(event, response, duration, stream):
+    # requests measures elapsed until response headers are parsed, body of
+    # not streamed response is read after that
+    event.ttfb = response.elapsed.total_seconds()
+    encoded = response.headers.get('Content-Encoding', 'identity') != 'identity'
+    if stream:
+        event.body_read = None
+        event.uncompressed_bytes_received = None
+        length = response.headers.get('Content-Length')
+        event.bytes_received = int(length) if length and length.isdigit() else None
+        if not encoded:
+            event.uncompressed_bytes_received = event.bytes_received
+    else:
+        event.body_read = max(0.0, duration - event.ttfb)
+        event.uncompressed_bytes_received = len(response.content)
+        # urllib3 counts bytes read from socket, before they are decoded
+        event.bytes_received = (response.raw.tell() if encoded
+                                else event.uncompressed_bytes_received)
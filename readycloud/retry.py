@@ -0,0 +1,110 @@
+# coding: utf-8
+"""
+readycloud.retry
+----------------------------------
+
+Module which contains retry policy for failed requests.
+"""
+
+import random
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+
+def parse_retry_after(value):
+    """
+    Parse Retry-After header value.
+
+    :param str value: number of seconds or HTTP date
+    :returns: float -- seconds to wait or None if value can't be parsed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, mktime_tz(parsed) - time.time())
+
+
+class RetryPolicy(object):
+    """
+    Retry policy with jittered exponential backoff.
+
+    Idempotent requests are retried on connection errors and on
+    RETRY_STATUSES. Requests rejected with 429 are retried for any method,
+    since server didn't process them. Retry-After header is respected.
+
+    Subclass and override ``should_retry`` or ``get_backoff`` to customize.
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30,
+                 jitter=True, statuses=None, methods=None):
+        """
+        :param int max_retries: max number of retries for one request
+        :param float backoff_factor: base delay, delay before retry N is
+            backoff_factor * 2 ** N
+        :param float max_backoff: max delay between retries
+        :param bool jitter: pick random delay between 0 and backoff (full
+            jitter), so that clients don't retry in lockstep
+        :param statuses: statuses to retry (RETRY_STATUSES by default)
+        :param methods: methods to retry (IDEMPOTENT_METHODS by default)
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses or self.RETRY_STATUSES)
+        self.methods = frozenset(methods or self.IDEMPOTENT_METHODS)
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        """
+        Check if request should be retried.
+
+        :param str method: HTTP method
+        :param int attempt: number of retries already done
+        :param response: received response (None if error was raised)
+        :param Exception error: connection error
+        :returns: bool -- True if request should be retried
+        """
+        if attempt >= self.max_retries:
+            return False
+        if error is not None:
+            return method.upper() in self.methods
+        if response.status_code == 429:
+            return True
+        return (response.status_code in self.statuses and
+                method.upper() in self.methods)
+
+    def get_backoff(self, attempt, response=None):
+        """
+        Get delay before next retry.
+
+        :param int attempt: number of retries already done
+        :param response: received response (None if error was raised)
+        :returns: float -- seconds to wait
+        """
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        backoff = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+        return backoff
+
+    def next_delay(self, method, attempt, response=None, error=None):
+        """
+        Get delay before next retry or None if request shouldn't be retried.
+
+        :returns: float -- seconds to wait or None
+        """
+        if not self.should_retry(method, attempt, response=response, error=error):
+            return None
+        return self.get_backoff(attempt, response=response)
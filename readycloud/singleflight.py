@@ -0,0 +1,149 @@
+# coding: utf-8
+"""
+readycloud.singleflight
+----------------------------------
+
+Module which contains coalescing of identical concurrent requests.
+
+When many threads (or tasks) ask for the same resource at once, only the
+first of them sends request, the others wait for it and receive its
+response or error::
+
+    rc = ReadyCloud(token='token', org_id='org', single_flight=SingleFlight())
+    # 16 threads calling rc.get_organization('org') at once send 1 request
+"""
+
+import asyncio
+import threading
+
+
+def make_key(url, params, auth):
+    """
+    Get key of GET request, requests with equal keys are coalesced.
+
+    :param str url: URL
+    :param dict params: query params
+    :param str auth: credentials, requests are coalesced per credentials
+    :returns: tuple -- hashable key
+    """
+    return url, tuple(sorted((k, repr(v)) for k, v in (params or {}).items())), auth
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self, done):
+        self.done = done
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Thread-safe coalescing of identical in-flight calls.
+
+    May be shared between clients, keys include credentials.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        """
+        Coalescing counters.
+
+        :returns: dict -- calls (sent), collapsed (calls which waited for
+            identical call instead of sending) and in_flight
+        """
+        return {
+            'calls': self.calls,
+            'collapsed': self.collapsed,
+            'in_flight': len(self._calls),
+        }
+
+    def do(self, key, func):
+        """
+        Call func unless call with the same key is in flight, in which
+        case wait for it.
+
+        :param key: hashable key of call
+        :param func: callable without arguments
+        :returns: result of func, shared by all coalesced callers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(threading.Event())
+                self.calls += 1
+            else:
+                self.collapsed += 1
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except BaseException as exc:
+                call.error = exc
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class AsyncSingleFlight(object):
+    """
+    Coalescing of identical in-flight calls of asyncio tasks. Should be
+    used in one event loop.
+
+    Call runs in its own task, so cancellation of any caller (including the
+    first one) doesn't cancel it for the others.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._calls = {}
+
+    @property
+    def stats(self):
+        """
+        Coalescing counters, see SingleFlight.stats.
+        """
+        return {
+            'calls': self.calls,
+            'collapsed': self.collapsed,
+            'in_flight': len(self._calls),
+        }
+
+    async def do(self, key, func):
+        """
+        Await func() unless call with the same key is in flight, in which
+        case wait for it.
+
+        :param key: hashable key of call
+        :param func: callable without arguments which returns awaitable
+        :returns: result of func, shared by all coalesced callers
+        """
+        task = self._calls.get(key)
+        if task is None or task.done():
+            task = self._calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.calls += 1
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # mark exception retrieved, all callers may be cancelled
+            task.exception()
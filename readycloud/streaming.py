@@ -0,0 +1,197 @@
+# coding: utf-8
+"""
+readycloud.streaming
+----------------------------------
+
+Module which contains incremental JSON decoding of list responses.
+"""
+
+import codecs
+import json
+
+from .exceptions import ReadyCloudServerError
+
+
+WHITESPACE = ' \t\n\r'
+
+# characters which continue number cut by end of chunk, e.g. '1.' or '1e'
+NUMBER_CONTINUATION = '.eE+-'
+
+ITEMS_KEYS = ('results', 'objects')
+
+
+class JSONStreamScanner(object):
+    """
+    Incremental scanner over JSON text received in chunks.
+
+    Only scanner's own position is tracked, values are decoded with
+    json.JSONDecoder.raw_decode as soon as they are fully received.
+    """
+
+    # consumed text is dropped from buffer when it grows above this size
+    COMPACT_SIZE = 65536
+
+    def __init__(self, chunks, decoder=None):
+        """
+        :param chunks: iterable of bytes
+        :param decoder: json.JSONDecoder to decode values
+        """
+        self.chunks = iter(chunks)
+        self.decoder = decoder or json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Read next chunk to buffer.
+
+        :returns: bool -- False if there is no more data
+        """
+        if self.eof:
+            return False
+        if self.pos > self.COMPACT_SIZE:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self.text_decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self):
+        """
+        Skip whitespace and get next character without consuming it.
+
+        :returns: str -- next character or None at the end of data
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, chars):
+        """
+        Consume next character, which should be one of chars.
+
+        :returns: str -- consumed character
+        """
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ValueError('Expected one of {0!r} at position {1}, got {2!r}'.format(
+                chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Decode next JSON value, reading more chunks until it's complete.
+
+        :returns: decoded value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            # number at the end of buffer may continue in the next chunk,
+            # raw_decode also stops before incomplete fraction or exponent
+            if ((end == len(self.buffer) or self.buffer[end] in NUMBER_CONTINUATION) and
+                    self.fill()):
+                continue
+            self.pos = end
+            return value
+
+
+class StreamingPage(object):
+    """
+    Page of list endpoint, decoded while it's downloaded.
+
+    Records of ``results`` array are yielded one by one, so only one
+    record is decoded at a time. Other top-level fields are collected to
+    ``meta``: fields before the array are available after first record,
+    all of them after iteration::
+
+        with rc.stream_orders(limit=10000) as page:
+            for order in page:
+                process(order)
+            print(page.meta['count'])
+    """
+
+    def __init__(self, response, items_keys=ITEMS_KEYS, chunk_size=65536, decoder=None):
+        """
+        :param response: requests response opened with stream=True
+        :param items_keys: names of field with records
+        :param int chunk_size: size of chunks read from socket
+        :param decoder: json.JSONDecoder to decode records
+        """
+        if response.status_code == 500:
+            content = response.content
+            response.close()
+            raise ReadyCloudServerError(content)
+        self.response = response
+        self.status_code = response.status_code
+        self.ok = response.ok
+        self.items_keys = items_keys
+        self.meta = {}
+        self._scanner = JSONStreamScanner(response.iter_content(chunk_size), decoder=decoder)
+        self._started = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError('Page can be iterated only once')
+        self._started = True
+        try:
+            for item in self._iter_items():
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Close response and release connection.
+        """
+        self.response.close()
+
+    def _iter_items(self):
+        scanner = self._scanner
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            key = scanner.value()
+            scanner.expect(':')
+            if key in self.items_keys and scanner.peek() == '[':
+                scanner.expect('[')
+                if scanner.peek() == ']':
+                    scanner.expect(']')
+                else:
+                    while True:
+                        yield scanner.value()
+                        if scanner.expect(',]') == ']':
+                            break
+            elif key in self.items_keys:
+                # v1 style dict of records
+                items = scanner.value() or {}
+                for item_key in sorted(items, key=int):
+                    yield items[item_key]
+            else:
+                self.meta[key] = scanner.value()
+            if scanner.expect(',}') == '}':
+                return
@@ -0,0 +1,262 @@
+# coding: utf-8
+"""
+readycloud.sync
+----------------------------------
+
+Module which contains incremental orders sync with persisted checkpoints.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import namedtuple
+
+from .pagination import check_page, is_last_page
+from .utils import get_page_items
+
+
+SyncEvent = namedtuple('SyncEvent', ['action', 'order'])
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+class CheckpointStore(object):
+    """
+    Base class for checkpoint stores. Checkpoint is JSON serializable dict.
+    """
+
+    def load(self, key):
+        """
+        Load checkpoint.
+
+        :param str key: checkpoint key
+        :returns: dict -- checkpoint or None if there is no checkpoint
+        """
+        raise NotImplementedError()
+
+    def save(self, key, checkpoint):
+        """
+        Save checkpoint.
+
+        :param str key: checkpoint key
+        :param dict checkpoint: checkpoint
+        """
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """
+        Delete checkpoint.
+
+        :param str key: checkpoint key
+        """
+        raise NotImplementedError()
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """
+    Checkpoint store which keeps checkpoints in memory (not restart-safe).
+    """
+
+    def __init__(self):
+        self.checkpoints = {}
+
+    def load(self, key):
+        return self.checkpoints.get(key)
+
+    def save(self, key, checkpoint):
+        self.checkpoints[key] = checkpoint
+
+    def delete(self, key):
+        self.checkpoints.pop(key, None)
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Checkpoint store which keeps checkpoints in JSON file. File is replaced
+    atomically, so it's never left half written.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: path to JSON file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        return self._read().get(key)
+
+    def save(self, key, checkpoint):
+        with self._lock:
+            checkpoints = self._read()
+            checkpoints[key] = checkpoint
+            self._write(checkpoints)
+
+    def delete(self, key):
+        with self._lock:
+            checkpoints = self._read()
+            if checkpoints.pop(key, None) is not None:
+                self._write(checkpoints)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError):
+            return {}
+
+    def _write(self, checkpoints):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(checkpoints, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    Checkpoint store which keeps checkpoints in SQLite database.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: path to database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute('CREATE TABLE IF NOT EXISTS checkpoints '
+                             '(key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+
+    def load(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT value FROM checkpoints WHERE key = ?',
+                                   (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, key, checkpoint):
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO checkpoints (key, value) VALUES (?, ?)',
+                             (key, json.dumps(checkpoint)))
+
+    def delete(self, key):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM checkpoints WHERE key = ?', (key,))
+
+    def close(self):
+        self._db.close()
+
+
+def is_deleted_order(order):
+    """
+    Default check if order received by sync was deleted.
+
+    :param dict order: order
+    :returns: bool -- True if order is marked as deleted
+    """
+    return bool(order.get('deleted') or order.get('is_deleted'))
+
+
+class OrderSync(object):
+    """
+    Incremental orders sync.
+
+    Every run fetches only orders updated since high-water mark (last seen
+    updated timestamp) of previous run, ordered by update time, and yields
+    them as SyncEvent(action, order) with action UPSERT or DELETE::
+
+        sync = OrderSync(rc, FileCheckpointStore('checkpoints.json'))
+        for event in sync.run():
+            if event.action == UPSERT:
+                warehouse.upsert(event.order)
+            else:
+                warehouse.delete(event.order['id'])
+
+    Pages are fetched by keyset: every page is requested with filter set to
+    the last seen timestamp instead of growing offset, so orders updated
+    during the run don't shift unseen ones past the next page.
+
+    Checkpoint is saved after caller handled all events of a page, so
+    interrupted run continues from the last handled page. Events may be
+    delivered again after a crash, so handlers should be idempotent.
+    """
+
+    def __init__(self, client, store, key=None, updated_field='updated_at',
+                 since_param='updated_at__gte', ordering_param='ordering',
+                 is_deleted=is_deleted_order, limit=100):
+        """
+        :param client: ReadyCloud client
+        :param store: CheckpointStore
+        :param str key: checkpoint key ('orders:<org_id>' by default)
+        :param str updated_field: order field with last update timestamp
+        :param str since_param: filter for orders updated at or after time
+        :param str ordering_param: param which sets ordering of orders
+        :param is_deleted: callable which checks if order was deleted
+        :param int limit: page size
+        """
+        self.client = client
+        self.store = store
+        self.key = key or 'orders:{0}'.format(client.org_id)
+        self.updated_field = updated_field
+        self.since_param = since_param
+        self.ordering_param = ordering_param
+        self.is_deleted = is_deleted
+        self.limit = limit
+
+    def reset(self):
+        """
+        Drop checkpoint, next run fetches all orders.
+        """
+        self.store.delete(self.key)
+
+    def run(self, **filters):
+        """
+        Fetch orders changed since previous run.
+
+        :param dict filters: extra filters
+        :returns: generator -- SyncEvent per changed order
+        """
+        checkpoint = self.store.load(self.key) or {}
+        since = checkpoint.get(self.updated_field)
+        # ids already seen at `since`, they are returned again by >= filter
+        seen = set(checkpoint.get('ids', []))
+
+        params = dict(filters)
+        params[self.ordering_param] = self.updated_field
+        offset = 0
+        while True:
+            if since is not None:
+                params[self.since_param] = since
+            page = self.client.get_orders(limit=self.limit, offset=offset, **params)
+            check_page(page)
+            items = get_page_items(page)
+            page_since = since
+            for order in items:
+                updated = order.get(self.updated_field)
+                order_id = order.get('id')
+                if updated is not None and updated == since and order_id in seen:
+                    continue
+                if updated is not None and (since is None or updated > since):
+                    since = updated
+                    seen = set()
+                if updated == since:
+                    seen.add(order_id)
+                action = DELETE if self.is_deleted(order) else UPSERT
+                yield SyncEvent(action, order)
+            if since is not None:
+                self.store.save(self.key, {self.updated_field: since, 'ids': list(seen)})
+            if is_last_page(page, offset, items, self.limit):
+                return
+            # offset only moves over a page of orders updated at the same
+            # time, otherwise next page starts at the new high-water mark
+            offset = offset + len(items) if since == page_since else 0
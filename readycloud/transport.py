@@ -0,0 +1,425 @@
+# coding: utf-8
+"""
+readycloud.transport
+----------------------------------
+
+Module which contains HTTP transports of ReadyCloud client.
+
+Transport sends one HTTP request and returns requests.Response, everything
+else (headers, retries, rate limiting, caching, instrumentation) is done
+by client, so transports are interchangeable:
+
+    - RequestsTransport -- pooled requests session (default)
+    - HTTPXTransport -- httpx client, multiplexes requests over HTTP/2
+      connection (requires ``httpx[http2]``)
+    - InMemoryTransport -- routes requests to Python handler, for tests
+      and measuring client overhead without network
+    - CassetteTransport -- records responses of another transport to JSON
+      file and replays them offline::
+
+        rc = ReadyCloud(token='token', org_id='org',
+                        transport=CassetteTransport('orders.json', mode=RECORD))
+"""
+
+import base64
+import collections
+import datetime
+import gzip
+import io
+import json
+import threading
+import time
+import zlib
+
+import requests
+from requests.compat import urlencode, urlsplit
+from requests.exceptions import ConnectionError, Timeout
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .utils import create_session
+
+
+RECORD = 'record'
+REPLAY = 'replay'
+AUTO = 'auto'
+
+# response headers which don't describe content decoded by transport
+DECODED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+def build_response(status_code=200, content=b'', headers=None, url=None, elapsed=0.0,
+                   raw=None):
+    """
+    Build requests.Response with already read content.
+
+    :param int status_code: status
+    :param content: body, bytes or JSON serializable data
+    :param dict headers: response headers
+    :param str url: requested URL
+    :param float elapsed: seconds until response headers were received
+    :param raw: file-like object with body (for streamed responses, its
+        read(size) returns decoded data)
+    :returns: requests.Response -- response
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.url = url
+    response.elapsed = datetime.timedelta(seconds=elapsed)
+    response.encoding = 'utf-8'
+    if raw is not None:
+        response.raw = raw
+        return response
+    if not isinstance(content, bytes):
+        content = json.dumps(content).encode('utf-8')
+        response.headers.setdefault('Content-Type', 'application/json')
+    response.raw = io.BytesIO(content)
+    response._content = content
+    response._content_consumed = True
+    return response
+
+
+class TransportRequest(collections.namedtuple('TransportRequest',
+                                              ['method', 'url', 'params', 'headers', 'data'])):
+    """
+    Request passed to handler of InMemoryTransport.
+    """
+
+    __slots__ = ()
+
+    @property
+    def path(self):
+        return urlsplit(self.url).path
+
+    def json(self):
+        """
+        Deserialize request body, decompressing it if needed.
+
+        :returns: deserialized body or None if request has no body
+        """
+        if not self.data:
+            return None
+        data = self.data
+        encoding = CaseInsensitiveDict(self.headers or {}).get('Content-Encoding')
+        if encoding == 'gzip':
+            data = gzip.decompress(data)
+        elif encoding == 'deflate':
+            data = zlib.decompress(data)
+        return json.loads(data)
+
+
+class Transport(object):
+    """
+    Base class of transports.
+    """
+
+    def request(self, method, url, params=None, data=None, headers=None, timeout=None,
+                stream=False):
+        """
+        Send request.
+
+        Connection failures should be raised as requests ConnectionError
+        or Timeout, so they can be retried by client.
+
+        :param str method: HTTP method
+        :param str url: URL
+        :param dict params: query parameters
+        :param bytes data: request body
+        :param dict headers: request headers
+        :param timeout: timeout, seconds
+        :param bool stream: don't read body before returning response
+        :returns: requests.Response -- response
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Release connections of transport.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    Transport which sends requests through pooled keep-alive requests
+    session.
+    """
+
+    def __init__(self, session=None, pool_connections=10, pool_maxsize=10, pool_block=False):
+        """
+        :param session: requests.Session. If not provided, transport
+            creates (and owns) its own session.
+        :param int pool_connections: number of per-host connection pools to cache
+        :param int pool_maxsize: max number of kept-alive connections per host
+        :param bool pool_block: block when no free connection is available
+        """
+        self._owns_session = session is None
+        if session is None:
+            session = create_session(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session = session
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """
+        Close session, if transport owns it.
+        """
+        if self._owns_session:
+            self.session.close()
+
+
+class _HTTPXBody(object):
+    # file-like view of streamed httpx response for requests.Response.raw
+
+    def __init__(self, response):
+        self.response = response
+        self._chunks = None
+        self._buffer = b''
+
+    def read(self, size=-1):
+        if self._chunks is None:
+            self._chunks = self.response.iter_bytes()
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def tell(self):
+        return self.response.num_bytes_downloaded
+
+    def close(self):
+        self.response.close()
+
+    release_conn = close
+
+
+class HTTPXTransport(Transport):
+    """
+    Transport based on httpx. With HTTP/2 concurrent requests of all
+    threads are multiplexed over one connection per host instead of
+    holding one connection per request.
+    """
+
+    def __init__(self, client=None, http2=True, max_connections=100,
+                 max_keepalive_connections=20):
+        """
+        :param client: httpx.Client. If not provided, transport creates
+            (and owns) its own client.
+        :param bool http2: use HTTP/2 (requires h2 package)
+        :param int max_connections: max number of connections
+        :param int max_keepalive_connections: max number of idle connections
+        """
+        if httpx is None:
+            raise ImportError('httpx is required for HTTPXTransport')
+        self._owns_client = client is None
+        if client is None:
+            limits = httpx.Limits(max_connections=max_connections,
+                                  max_keepalive_connections=max_keepalive_connections)
+            client = httpx.Client(http2=http2, limits=limits)
+        self.client = client
+
+    def request(self, method, url, params=None, data=None, headers=None, timeout=None,
+                stream=False):
+        if timeout is None:
+            # None would disable timeouts configured on client
+            timeout = httpx.USE_CLIENT_DEFAULT
+        request = self.client.build_request(method, url, params=params, content=data,
+                                            headers=headers, timeout=timeout)
+        try:
+            response = self.client.send(request, stream=stream)
+        except httpx.TimeoutException as exc:
+            raise Timeout(exc)
+        except httpx.TransportError as exc:
+            raise ConnectionError(exc)
+        url = str(response.url)
+        if stream:
+            # elapsed is known only after body is read
+            return build_response(response.status_code, headers=response.headers, url=url,
+                                  raw=_HTTPXBody(response))
+        result = build_response(response.status_code, response.content,
+                                headers=response.headers, url=url,
+                                elapsed=response.elapsed.total_seconds())
+        # size of encoded body is reported by tell(), see ReadyCloud
+        result.raw = _HTTPXBody(response)
+        return result
+
+    def close(self):
+        """
+        Close client, if transport owns it.
+        """
+        if self._owns_client:
+            self.client.close()
+
+
+class InMemoryTransport(Transport):
+    """
+    Transport which calls Python handler instead of sending requests.
+
+    Handler accepts TransportRequest and returns requests.Response (see
+    build_response) or (status_code, content) pair, where content is bytes
+    or JSON serializable data::
+
+        def handler(request):
+            if request.method == 'GET':
+                return 200, {'count': 0, 'results': []}
+            return 201, dict(request.json(), id=1)
+
+        rc = ReadyCloud(token='token', org_id='org', transport=InMemoryTransport(handler))
+    """
+
+    def __init__(self, handler):
+        """
+        :param handler: callable which accepts TransportRequest
+        """
+        self.handler = handler
+
+    def request(self, method, url, params=None, data=None, headers=None, timeout=None,
+                stream=False):
+        response = self.handler(TransportRequest(method, url, params or {}, headers or {},
+                                                 data))
+        if isinstance(response, tuple):
+            status_code, content = response
+            response = build_response(status_code, content, url=url)
+        return response
+
+
+class CassetteTransport(Transport):
+    """
+    Transport which records responses to JSON file and replays them.
+
+    Requests are matched by method, URL, query parameters and body.
+    Responses of repeated requests are replayed in order of recording, the
+    last one is replayed after that. Request headers (including token)
+    aren't recorded.
+
+    Modes:
+
+        - RECORD -- send requests through transport and record them
+        - REPLAY -- only replay, unknown request raises ConnectionError
+        - AUTO -- replay recorded requests, send and record others
+    """
+
+    def __init__(self, path, mode=REPLAY, transport=None):
+        """
+        :param str path: path to cassette file
+        :param str mode: RECORD, REPLAY or AUTO
+        :param transport: Transport which sends requests while recording
+            (RequestsTransport by default)
+        """
+        if mode not in (RECORD, REPLAY, AUTO):
+            raise ValueError('Unknown cassette mode {0!r}'.format(mode))
+        self.path = path
+        self.mode = mode
+        self.transport = transport
+        self.interactions = []
+        self._responses = {}
+        self._lock = threading.Lock()
+        if mode != RECORD:
+            self.load()
+        if mode != REPLAY and transport is None:
+            self.transport = RequestsTransport()
+
+    def load(self):
+        """
+        Load recorded interactions from cassette file, missing file is
+        an empty cassette.
+        """
+        try:
+            with open(self.path) as f:
+                self.interactions = json.load(f)
+        except (IOError, OSError):
+            self.interactions = []
+        self._responses = {}
+        for interaction in self.interactions:
+            key = _request_key(**interaction['request'])
+            self._responses.setdefault(key, collections.deque()).append(interaction['response'])
+
+    def save(self):
+        """
+        Write recorded interactions to cassette file.
+        """
+        with self._lock:
+            interactions = list(self.interactions)
+        with open(self.path, 'w') as f:
+            json.dump(interactions, f, indent=1, sort_keys=True)
+
+    def request(self, method, url, params=None, data=None, headers=None, timeout=None,
+                stream=False):
+        recorded = _encode_body(data)
+        key = _request_key(method, url, params, recorded)
+        if self.mode != RECORD:
+            with self._lock:
+                responses = self._responses.get(key)
+                recorded_response = None
+                if responses:
+                    recorded_response = responses[0]
+                    if len(responses) > 1:
+                        responses.popleft()
+            if recorded_response is not None:
+                return build_response(recorded_response['status_code'],
+                                      _decode_body(recorded_response['body']),
+                                      headers=recorded_response['headers'], url=url)
+            if self.mode == REPLAY:
+                raise ConnectionError('Request {0} {1} is not recorded in cassette {2}'.format(
+                    method, url, self.path))
+
+        started = time.time()
+        response = self.transport.request(method, url, params=params, data=data,
+                                          headers=headers, timeout=timeout)
+        content = response.content
+        headers = dict((name, value) for name, value in response.headers.items()
+                       if name.lower() not in DECODED_HEADERS)
+        interaction = {
+            'request': {'method': method, 'url': url, 'params': params, 'body': recorded},
+            'response': {'status_code': response.status_code, 'headers': headers,
+                         'body': _encode_body(content)},
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+        return build_response(response.status_code, content, headers=headers, url=url,
+                              elapsed=time.time() - started)
+
+    def close(self):
+        """
+        Save recorded interactions and close underlying transport.
+        """
+        if self.mode != REPLAY:
+            self.save()
+        if self.transport is not None:
+            self.transport.close()
+
+
+def _request_key(method, url, params, body):
+    query = urlencode(sorted((params or {}).items()), doseq=True)
+    return method, url, query, json.dumps(body, sort_keys=True)
+
+
+def _encode_body(data):
+    # text bodies are kept readable, binary ones are base64 encoded
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        return {'text': data.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(data).decode('ascii')}
+
+
+def _decode_body(body):
+    if body is None:
+        return b''
+    if 'text' in body:
+        return body['text'].encode('utf-8')
+    return base64.b64decode(body['base64'])
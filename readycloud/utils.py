@@ -6,6 +6,18 @@ readycloud.utils
 Module which contains different utils, helpers, etc.
 """
 
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import urlsplit
+
+
+API_PREFIX_RE = re.compile(r'^api/v\d+$')
+
+# keys which get_response_json adds to deserialized responses
+RESPONSE_KEYS = ('status_code', 'ok')
+
 
 def urljoin(*args):
     """
@@ -18,17 +30,22 @@ def urljoin(*args):
     return '/'.join(s.strip('/') for s in args) + '/'
 
 
-def get_response_json(response):
+def get_response_json(response, loads=None):
     """
     Safe loads JSON response. If response is not json serialized - return it
     as content key.
 
     :param response: response
     :type response: requests response object
+    :param loads: function which deserializes response body bytes
+        (response.json by default)
     :returns: dict -- dictionary with loaded json response
     """
     try:
-        response_json = response.json()
+        if loads is None:
+            response_json = response.json()
+        else:
+            response_json = loads(response.content)
     except ValueError:
         response_json = {
             'content': response.content,
@@ -38,3 +55,73 @@ def get_response_json(response):
         'ok': response.ok,
     })
     return response_json
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False):
+    """
+    Create keep-alive requests session with tuned connection pool.
+
+    :param int pool_connections: number of per-host connection pools to cache
+    :param int pool_maxsize: max number of connections kept alive per host
+    :param bool pool_block: block when pool is exhausted instead of opening
+        extra (not reused) connection
+    :returns: requests.Session -- configured session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_page_items(page):
+    """
+    Get list of records from page returned by list endpoint.
+
+    Supports both v2 (``results``) and v1 (``objects``) page formats.
+
+    :param dict page: deserialized response
+    :returns: list -- records from page
+    """
+    items = page.get('results')
+    if items is None:
+        items = page.get('objects')
+    if isinstance(items, dict):
+        items = [items[key] for key in sorted(items, key=int)]
+    return items or []
+
+
+def get_total_count(page):
+    """
+    Get total number of records from page returned by list endpoint.
+
+    :param dict page: deserialized response
+    :returns: int -- total count or None if page doesn't contain it
+    """
+    if 'count' in page:
+        return page['count']
+    return (page.get('meta') or {}).get('total_count')
+
+
+def get_endpoint_template(url):
+    """
+    Get endpoint of URL with ids replaced by placeholders, so requests to
+    different records of the same endpoint can be aggregated.
+
+    ``https://readycloud.com/api/v2/orgs/abc/orders/12/`` becomes
+    ``/api/v2/orgs/{org}/orders/{id}/``.
+
+    :param str url: absolute URL or path
+    :returns: str -- endpoint template
+    """
+    path = urlsplit(url).path
+    parts = [part for part in path.split('/') if part]
+    start = 2 if len(parts) > 1 and API_PREFIX_RE.match('/'.join(parts[:2])) else 0
+    for i in range(start + 1, len(parts), 2):
+        parts[i] = '{org}' if parts[i - 1] == 'orgs' else '{id}'
+    template = '/' + '/'.join(parts)
+    if path.endswith('/') and parts:
+        template += '/'
+    return template
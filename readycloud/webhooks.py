@@ -0,0 +1,352 @@
+# coding: utf-8
+"""
+readycloud.webhooks
+----------------------------------
+
+Module which contains receiver of webhook deliveries and reconciliation
+of registered webhooks.
+"""
+
+import asyncio
+import collections
+import logging
+import threading
+import time
+from queue import Empty, Full, Queue
+
+from .codec import get_default_codec
+from .concurrency import imap_bounded
+
+
+logger = logging.getLogger(__name__)
+
+STATUSES = {
+    202: '202 Accepted',
+    405: '405 Method Not Allowed',
+    413: '413 Payload Too Large',
+    503: '503 Service Unavailable',
+}
+
+_STOP = object()
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+
+class WebhookChange(collections.namedtuple('WebhookChange',
+                                           ['action', 'webhook_id', 'entity', 'url',
+                                            'previous_url'])):
+    """
+    API call needed to bring registered webhooks to desired state.
+
+    :ivar str action: CREATE, UPDATE or DELETE
+    :ivar webhook_id: id of updated or deleted webhook (None for CREATE)
+    :ivar str entity: entity of webhook
+    :ivar str url: URL of webhook (new URL for UPDATE)
+    :ivar str previous_url: URL which is replaced by UPDATE
+    """
+
+    __slots__ = ()
+
+
+class WebhookSyncReport(collections.namedtuple('WebhookSyncReport',
+                                               ['changes', 'results', 'unchanged',
+                                                'dry_run'])):
+    """
+    Result of ReadyCloud.sync_webhooks.
+
+    :ivar list changes: WebhookChange per needed API call
+    :ivar list results: readycloud.bulk.BulkResult per change, with change
+        as item (empty in dry run)
+    :ivar int unchanged: number of registered webhooks left as is
+    :ivar bool dry_run: changes weren't applied
+    """
+
+    __slots__ = ()
+
+    @property
+    def failed(self):
+        """
+        :returns: list -- results of failed changes
+        """
+        return [result for result in self.results if not result.ok]
+
+
+def diff_webhooks(existing, desired, prune=False):
+    """
+    Get changes which turn existing webhooks into desired ones with the
+    least number of API calls.
+
+    Duplicates of desired webhooks are deleted. With prune, webhooks which
+    aren't desired are reused for missing URLs of the same entity (one
+    update instead of create and delete) and the rest of them are deleted,
+    otherwise they are left as is.
+
+    :param existing: registered webhooks, dicts with id, entity and url
+    :param desired: iterable of (entity, url) pairs
+    :param bool prune: delete webhooks which aren't desired (including
+        ones of entities which aren't in desired)
+    :returns: list -- WebhookChange per needed API call
+    """
+    desired = sorted(set(desired))
+    wanted = set(desired)
+    registered = set()
+    stale = collections.OrderedDict()
+    changes = []
+    for webhook in existing:
+        pair = (webhook.get('entity'), webhook.get('url'))
+        if pair not in wanted:
+            stale.setdefault(pair[0], []).append(webhook)
+        elif pair in registered:
+            changes.append(WebhookChange(DELETE, webhook['id'], pair[0], pair[1], None))
+        else:
+            registered.add(pair)
+    for entity, url in desired:
+        if (entity, url) in registered:
+            continue
+        reusable = stale.get(entity) if prune else None
+        if reusable:
+            webhook = reusable.pop(0)
+            changes.append(WebhookChange(UPDATE, webhook['id'], entity, url, webhook.get('url')))
+        else:
+            changes.append(WebhookChange(CREATE, None, entity, url, None))
+    if prune:
+        for webhooks in stale.values():
+            for webhook in webhooks:
+                changes.append(WebhookChange(DELETE, webhook['id'], webhook.get('entity'),
+                                             webhook.get('url'), None))
+    return changes
+
+
+class WebhookReceiver(object):
+    """
+    WSGI and ASGI application which receives webhook deliveries.
+
+    Deliveries are acknowledged (202) as soon as their body is read and put
+    on a bounded queue. Background dispatcher collects queued deliveries to
+    batches and calls handler with list of decoded payloads on a worker
+    pool. When queue is full deliveries are rejected with 503, so ReadyCloud
+    redelivers them later::
+
+        def handle(events):
+            for event in events:
+                process(event)
+
+        receiver = WebhookReceiver(handle, workers=8)
+        # WSGI: gunicorn module:receiver, ASGI: uvicorn module:receiver.asgi
+
+    Dispatcher is started with first delivery (after fork of server
+    workers) or explicitly with start(). Handler errors are logged, batch
+    isn't retried.
+    """
+
+    def __init__(self, handler, batch_size=100, batch_timeout=0.05, max_queue=10000,
+                 workers=4, codec=None, max_body_size=10 * 1024 * 1024, retry_after=1):
+        """
+        :param handler: callable which accepts list of decoded payloads
+        :param int batch_size: max number of payloads in batch
+        :param float batch_timeout: max time (seconds) to wait for batch
+            to fill after its first payload is queued
+        :param int max_queue: max number of queued deliveries
+        :param int workers: number of threads which run handler
+        :param codec: readycloud.codec.JSONCodec to decode payloads
+        :param int max_body_size: bigger deliveries are rejected with 413
+        :param int retry_after: Retry-After (seconds) of 503 responses
+        """
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.workers = workers
+        self.codec = codec or get_default_codec()
+        self.max_body_size = max_body_size
+        self.retry_after = retry_after
+        self.queue = Queue(max_queue)
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def stats(self):
+        """
+        Receiver counters.
+
+        :returns: dict -- received (queued), rejected (queue was full),
+            processed and failed payloads, handled batches and current
+            queue size
+        """
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'processed': self.processed,
+            'failed': self.failed,
+            'batches': self.batches,
+            'queued': self.queue.qsize(),
+        }
+
+    def start(self):
+        """
+        Start dispatcher thread, if it isn't running.
+
+        :returns: WebhookReceiver -- self
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch,
+                                                name='readycloud-webhooks')
+                self._thread.daemon = True
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Handle queued deliveries and stop dispatcher.
+
+        :param float timeout: max time (seconds) to wait
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def submit(self, body):
+        """
+        Queue raw delivery body without blocking.
+
+        :param bytes body: JSON payload
+        :returns: bool -- False if queue is full and delivery was rejected
+        """
+        if self._thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait(body)
+        except Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.received += 1
+        return True
+
+    def __call__(self, environ, start_response):
+        """
+        WSGI application.
+        """
+        if environ['REQUEST_METHOD'] != 'POST':
+            status = 405
+        else:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            if length > self.max_body_size:
+                status = 413
+            else:
+                status = self._accept(environ['wsgi.input'].read(length))
+        start_response(STATUSES[status], self._headers(status))
+        return [b'']
+
+    async def asgi(self, scope, receive, send):
+        """
+        ASGI application.
+        """
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        status = 405 if scope['method'] != 'POST' else None
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_size:
+                status = 413
+            elif status is None:
+                chunks.append(chunk)
+            more_body = message.get('more_body', False)
+        if status is None:
+            status = self._accept(b''.join(chunks))
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in self._headers(status)],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.stop)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _accept(self, body):
+        return 202 if self.submit(body) else 503
+
+    def _headers(self, status):
+        headers = [('Content-Length', '0')]
+        if status == 503:
+            headers.append(('Retry-After', str(self.retry_after)))
+        return headers
+
+    def _dispatch(self):
+        for _ in imap_bounded(self._handle, self._batches(), workers=self.workers,
+                              ordered=False):
+            pass
+
+    def _batches(self):
+        while True:
+            body = self.queue.get()
+            if body is _STOP:
+                return
+            batch = [body]
+            deadline = time.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                try:
+                    body = self.queue.get(timeout=max(0, deadline - time.time()))
+                except Empty:
+                    break
+                if body is _STOP:
+                    yield batch
+                    return
+                batch.append(body)
+            yield batch
+
+    def _handle(self, batch):
+        payloads = []
+        for body in batch:
+            try:
+                payloads.append(self.codec.loads(body))
+            except ValueError:
+                logger.warning('Invalid webhook payload: %r', body[:100])
+        failed = len(batch) - len(payloads)
+        processed = 0
+        try:
+            if payloads:
+                self.handler(payloads)
+            processed = len(payloads)
+        except Exception:
+            logger.exception('Webhook handler failed on batch of %d payloads', len(payloads))
+            failed += len(payloads)
+        with self._lock:
+            self.processed += processed
+            self.failed += failed
+            self.batches += 1
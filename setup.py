@@ -32,7 +32,20 @@ setup(
     ],
     package_dir={'readycloud': 'readycloud'},
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'readycloud = readycloud.cli:main',
+        ],
+    },
+    python_requires='>=3.8',
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp'],
+        'fast-json': ['orjson'],
+        'compression': ['brotli', 'zstandard'],
+        'parquet': ['pyarrow'],
+        'http2': ['httpx[http2]'],
+    },
     license="BSD",
     zip_safe=False,
     keywords='readycloud-python-client',
@@ -41,13 +54,13 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: BSD License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        "Programming Language :: Python :: 2.6",
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
     ],
     test_suite='tests',
     tests_require=test_requirements
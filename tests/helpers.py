@@ -0,0 +1,40 @@
+# coding: utf-8
+"""
+tests.helpers
+----------------------------------
+
+Fakes shared by test modules.
+"""
+
+import json
+from datetime import timedelta
+
+from mock import Mock
+
+
+class Clock(object):
+    """
+    Fake clock, tests move time by changing ``now``.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def response(status_code=200, payload=None, headers=None, content=None, elapsed=0):
+    """
+    :param int status_code: response status
+    :param payload: JSON body, ``{}`` by default
+    :param dict headers: response headers
+    :param bytes content: raw body, overrides payload
+    :param float elapsed: seconds until response headers were received
+    :returns: Mock -- requests.Response as returned by patched
+        requests.Session.request
+    """
+    if content is None:
+        content = json.dumps(payload if payload is not None else {}).encode('utf-8')
+    return Mock(status_code=status_code, ok=status_code < 400, headers=headers or {},
+                content=content, elapsed=timedelta(seconds=elapsed))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_aio
+----------------------------------
+
+Tests for `readycloud.aio` module.
+"""
+
+import asyncio
+import json
+import unittest
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+except ImportError:
+    web = None
+
+from readycloud import AsyncReadyCloud
+from readycloud.circuitbreaker import OPEN, CircuitBreaker
+from readycloud.compression import Compression
+from readycloud.singleflight import AsyncSingleFlight
+from readycloud.exceptions import ReadyCloudCircuitOpenError, ReadyCloudServerError
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class AsyncReadyCloudTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def handler(request):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            body = await request.read()
+            self.requests.append((request.method, request.path_qs,
+                                  request.headers.get('AUTHORIZATION'), body))
+            if request.path.endswith('/500/'):
+                return web.Response(status=500, text='boom')
+            if request.path.endswith('/html/'):
+                return web.Response(text='<h1>Test<h1>')
+            return web.json_response({'test': 'test'})
+
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.rc = AsyncReadyCloud(token='12345', host=str(self.server.make_url('/')),
+                                  org_id='1', concurrency=5)
+
+    async def asyncTearDown(self):
+        await self.rc.close()
+        await self.server.close()
+
+    async def test_get_orders_should_send_get_with_right_params(self):
+        response = await self.rc.get_orders(limit=2)
+        self.assertEqual(response, {'test': 'test', 'status_code': 200, 'ok': True})
+        self.assertEqual(self.requests, [
+            ('GET', '/api/v2/orgs/1/orders/?limit=2', 'bearer 12345', b''),
+        ])
+
+    async def test_create_order_should_send_post_with_json_body(self):
+        await self.rc.create_order({'message': 'test'})
+        method, path, _, body = self.requests[0]
+        self.assertEqual((method, path), ('POST', '/api/v2/orgs/1/orders/'))
+        self.assertEqual(json.loads(body.decode('utf-8')), {'message': 'test'})
+
+    async def test_webhook_and_organization_methods_should_use_url_builders(self):
+        await self.rc.update_orders_webhook(1, 'https://example.com/')
+        await self.rc.delete_webhook(1)
+        await self.rc.get_organization('1')
+        self.assertEqual([r[:2] for r in self.requests], [
+            ('PUT', '/api/v1/webhooks/1/'),
+            ('DELETE', '/api/v1/webhooks/1/'),
+            ('GET', '/api/v2/orgs/1/'),
+        ])
+
+    async def test_requests_should_be_reported_to_listeners(self):
+        events = []
+        self.rc.instrumentation.add_listener(events.append)
+        await self.rc.create_order({'message': 'test'})
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events[0].method, events[0].endpoint, events[0].status),
+                         ('POST', '/api/v2/orgs/{org}/orders/', 200))
+        self.assertEqual(events[0].bytes_received, len(b'{"test": "test"}'))
+        self.assertGreater(events[0].ttfb, 0)
+        self.assertIsNotNone(events[0].decode)
+
+    async def test_large_body_should_be_sent_compressed(self):
+        events = []
+        self.rc.instrumentation.add_listener(events.append)
+        self.rc.compression = Compression(threshold=100)
+        order = {'items': [{'sku': 'SKU-{0}'.format(i)} for i in range(100)]}
+        await self.rc.create_order(order)
+        self.assertEqual(json.loads(self.requests[0][3].decode('utf-8')), order)
+        self.assertLess(events[0].bytes_sent, events[0].uncompressed_bytes_sent)
+
+    async def test_identical_gets_should_share_one_request(self):
+        self.rc.single_flight = AsyncSingleFlight()
+        responses = await asyncio.gather(*[self.rc.get_orders(limit=2) for _ in range(5)])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(responses, [{'test': 'test', 'status_code': 200, 'ok': True}] * 5)
+        self.assertEqual(self.rc.single_flight.stats['collapsed'], 4)
+
+    async def test_if_rc_returns_500_should_raise_exception(self):
+        with self.assertRaises(ReadyCloudServerError):
+            await self.rc.get(self.rc.get_order_url('500'), params={})
+
+    async def test_open_circuit_should_fail_fast(self):
+        self.rc.circuit_breaker = CircuitBreaker(window=2, min_calls=2)
+        url = self.rc.get_order_url('500')
+        for _ in range(2):
+            with self.assertRaises(ReadyCloudServerError):
+                await self.rc.get(url, params={})
+        self.assertEqual(self.rc.circuit_breaker.get_state(url), OPEN)
+        with self.assertRaises(ReadyCloudCircuitOpenError):
+            await self.rc.get(url, params={})
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_non_json_response_should_be_returned_as_content(self):
+        response = await self.rc.get(self.rc.get_order_url('html'), params={})
+        self.assertEqual(response['content'], b'<h1>Test<h1>')
+
+    async def test_in_flight_requests_should_be_limited_by_concurrency(self):
+        await asyncio.gather(*[self.rc.get_orders() for _ in range(20)])
+        self.assertEqual(len(self.requests), 20)
+        self.assertLessEqual(self.max_in_flight, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
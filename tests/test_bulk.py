@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_bulk
+----------------------------------
+
+Tests for `readycloud.bulk` module.
+"""
+
+import unittest
+
+from mock import patch
+
+from readycloud import ReadyCloud
+from readycloud.bulk import run_bulk
+from readycloud.exceptions import ReadyCloudServerError
+
+from tests.helpers import response
+
+
+class RunBulkTestCase(unittest.TestCase):
+    def test_errors_should_not_abort_batch(self):
+        def func(item):
+            if item == 2:
+                raise ValueError('bad order')
+            return {'ok': True, 'item': item}
+
+        results = list(run_bulk(func, iter(range(5)), workers=2))
+        self.assertEqual([r.index for r in results], [0, 1, 2, 3, 4])
+        self.assertEqual([r.ok for r in results], [True, True, False, True, True])
+        self.assertIsInstance(results[2].error, ValueError)
+        self.assertIsNone(results[2].response)
+
+    def test_unordered_results_should_cover_all_items(self):
+        results = run_bulk(lambda item: {'ok': True}, range(20), workers=4, ordered=False)
+        self.assertEqual(sorted(r.item for r in results), list(range(20)))
+
+
+class ReadyCloudBulkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rc = ReadyCloud(token='12345', org_id='1')
+
+    @patch('requests.Session.request')
+    def test_bulk_create_orders_should_return_result_per_order(self, request):
+        request.side_effect = [
+            response(201, {'id': 1}),
+            response(400, {'number': ['required']}),
+            response(500),
+        ]
+        results = list(self.rc.bulk_create_orders(
+            ({'message': str(i)} for i in range(3)), workers=1))
+        self.assertEqual(results[0].response, {'id': 1, 'status_code': 201, 'ok': True})
+        self.assertEqual(results[1].response,
+                         {'number': ['required'], 'status_code': 400, 'ok': False})
+        self.assertFalse(results[1].ok)
+        self.assertIsInstance(results[2].error, ReadyCloudServerError)
+
+    @patch('requests.Session.request')
+    def test_bulk_update_orders_should_put_every_order(self, request):
+        request.return_value = response(200)
+        results = list(self.rc.bulk_update_orders([('1', {'a': 1}), ('2', {'a': 2})]))
+        self.assertTrue(all(r.ok for r in results))
+        urls = sorted(call[0][1] for call in request.call_args_list)
+        self.assertEqual(urls, [
+            'https://readycloud.com/api/v2/orgs/1/orders/1/',
+            'https://readycloud.com/api/v2/orgs/1/orders/2/',
+        ])
+
+    @patch('requests.Session.request')
+    def test_bulk_delete_orders_should_delete_every_order(self, request):
+        request.return_value = response(204)
+        results = list(self.rc.bulk_delete_orders(['1', '2', '3']))
+        self.assertEqual([r.item for r in results], ['1', '2', '3'])
+        self.assertEqual(request.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
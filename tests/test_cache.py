@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_cache
+----------------------------------
+
+Tests for `readycloud.cache` module.
+"""
+
+import unittest
+
+from mock import patch, Mock
+
+from readycloud import ReadyCloud
+from readycloud.cache import ResponseCache
+
+from tests.helpers import Clock, response
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock(0)
+        self.cache = ResponseCache(max_entries=2, default_ttl=10, clock=self.clock,
+                                   ttls=[(r'/orders/', None), (r'/webhooks/', 1)])
+        self.send = Mock(return_value=response(headers={'ETag': '"v1"'}))
+
+    def test_fresh_response_should_be_served_from_cache(self):
+        first = self.cache.get('/orgs/1/', {}, 'token', self.send)
+        second = self.cache.get('/orgs/1/', {}, 'token', self.send)
+        self.assertIs(first, second)
+        self.assertEqual(self.send.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_responses_should_be_cached_per_params_and_credentials(self):
+        self.cache.get('/orgs/', {'limit': 1}, 'token', self.send)
+        self.cache.get('/orgs/', {'limit': 2}, 'token', self.send)
+        self.cache.get('/orgs/', {'limit': 2}, 'other', self.send)
+        self.assertEqual(self.send.call_count, 3)
+
+    def test_stale_response_should_be_revalidated_with_etag(self):
+        cached = self.cache.get('/webhooks/', {}, 'token', self.send)
+        self.clock.now = 5
+        self.send.return_value = response(304)
+        self.assertIs(self.cache.get('/webhooks/', {}, 'token', self.send), cached)
+        self.send.assert_called_with({'If-None-Match': '"v1"'})
+        self.assertEqual(self.cache.revalidations, 1)
+        # revalidated entry is fresh again
+        self.assertIs(self.cache.get('/webhooks/', {}, 'token', self.send), cached)
+        self.assertEqual(self.send.call_count, 2)
+
+    def test_endpoints_without_ttl_should_not_be_cached(self):
+        self.cache.get('/orgs/1/orders/', {}, 'token', self.send)
+        self.cache.get('/orgs/1/orders/', {}, 'token', self.send)
+        self.assertEqual(self.send.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_should_be_evicted(self):
+        for url in ('/a/', '/b/', '/a/', '/c/'):
+            self.cache.get(url, {}, 'token', self.send)
+        self.cache.get('/a/', {}, 'token', self.send)
+        self.assertEqual(self.send.call_count, 3)
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_invalidate_should_drop_url_and_parent_collection(self):
+        self.cache = ResponseCache(default_ttl=10, clock=self.clock)
+        for url in ('/hooks/', '/hooks/1/', '/hooks/2/'):
+            self.cache.get(url, {'limit': 1}, 'token', self.send)
+        self.cache.invalidate('/hooks/1/')
+        self.assertEqual([entry.url for entry in self.cache._entries.values()], ['/hooks/2/'])
+
+
+class ReadyCloudCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rc = ReadyCloud(token='12345', org_id='1', cache=ResponseCache())
+
+    @patch('requests.Session.request')
+    def test_get_organization_should_be_cached(self, request):
+        request.return_value = response(payload={'id': '1'})
+        self.assertEqual(self.rc.get_organization('1'), self.rc.get_organization('1'))
+        self.assertEqual(request.call_count, 1)
+
+    @patch('requests.Session.request')
+    def test_orders_should_not_be_cached_by_default(self, request):
+        request.return_value = response(payload={'count': 0, 'results': []})
+        self.rc.get_orders()
+        self.rc.get_orders()
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(len(self.rc.cache), 0)
+
+    @patch('requests.Session.request')
+    def test_write_should_invalidate_cached_list(self, request):
+        request.return_value = response()
+        self.rc.get_webhooks()
+        self.rc.delete_webhook(1)
+        self.rc.get_webhooks()
+        self.assertEqual([call[0][0] for call in request.call_args_list],
+                         ['GET', 'DELETE', 'GET'])
+
+
+if __name__ == '__main__':
+    unittest.main()
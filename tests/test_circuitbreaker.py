@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_circuitbreaker
+----------------------------------
+
+Tests for `readycloud.circuitbreaker` module.
+"""
+
+import unittest
+
+from requests.exceptions import ConnectionError
+
+from readycloud import MultiOrgReadyCloud, ReadyCloud
+from readycloud.circuitbreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitEvent
+from readycloud.exceptions import ReadyCloudCircuitOpenError, ReadyCloudServerError
+from readycloud.instrumentation import MetricsCollector, RequestEvent
+from readycloud.transport import InMemoryTransport
+
+from tests.helpers import Clock
+
+
+ORDER_URL = 'https://readycloud.com/api/v2/orgs/a/orders/1/'
+
+
+def event(url=ORDER_URL, status=200, error=None, ttfb=0.01):
+    result = RequestEvent('GET', url)
+    result.status = status
+    result.error = error
+    result.ttfb = ttfb
+    return result
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.events = []
+        self.breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4,
+                                      open_duration=10, clock=self.clock,
+                                      listeners=[self.events.append])
+
+    def call(self, url=ORDER_URL, **kwargs):
+        admitted = self.breaker.acquire(url)
+        self.breaker.record(event(url, **kwargs), admitted)
+
+    def trip(self):
+        for _ in range(4):
+            self.call(status=503)
+
+    def test_circuit_should_open_when_failure_rate_is_reached(self):
+        self.call()
+        self.call()
+        self.call(status=500)
+        self.assertEqual(self.breaker.get_state(ORDER_URL), CLOSED)
+        self.call(error=ConnectionError())
+        self.assertEqual(self.breaker.get_state(ORDER_URL), OPEN)
+        self.assertEqual(self.events, [
+            CircuitEvent('/api/v2/orgs/{org}/orders/{id}/', CLOSED, OPEN, 1000.0)])
+
+    def test_client_errors_should_not_count_as_failures(self):
+        for _ in range(4):
+            self.call(status=404)
+        self.assertEqual(self.breaker.get_state(ORDER_URL), CLOSED)
+
+    def test_circuit_should_open_when_calls_are_slow(self):
+        self.breaker.slow_call_duration = 1.0
+        self.breaker.slow_call_rate = 0.75
+        for ttfb in (0.1, 2, 3, 4):
+            self.call(ttfb=ttfb)
+        self.assertEqual(self.breaker.get_state(ORDER_URL), OPEN)
+
+    def test_open_circuit_should_reject_calls(self):
+        self.trip()
+        self.clock.now += 4
+        with self.assertRaises(ReadyCloudCircuitOpenError) as context:
+            self.breaker.acquire('https://readycloud.com/api/v2/orgs/b/orders/2/')
+        self.assertEqual(context.exception.endpoint, '/api/v2/orgs/{org}/orders/{id}/')
+        self.assertEqual(context.exception.retry_after, 6)
+        self.assertIsInstance(context.exception, ReadyCloudServerError)
+        self.breaker.acquire('https://readycloud.com/api/v2/orgs/a/orders/')
+        self.assertEqual(self.breaker.stats['/api/v2/orgs/{org}/orders/{id}/']['rejected'], 1)
+
+    def test_half_open_circuit_should_let_limited_probes_through(self):
+        self.trip()
+        self.clock.now += 10
+        admitted = self.breaker.acquire(ORDER_URL)
+        self.assertEqual(admitted, HALF_OPEN)
+        self.assertRaises(ReadyCloudCircuitOpenError, self.breaker.acquire, ORDER_URL)
+        self.breaker.record(event(), admitted)
+        self.assertEqual(self.breaker.get_state(ORDER_URL), CLOSED)
+        self.assertEqual([e.state for e in self.events], [OPEN, HALF_OPEN, CLOSED])
+
+    def test_failed_probe_should_reopen_circuit(self):
+        self.trip()
+        self.clock.now += 10
+        self.breaker.record(event(status=502), self.breaker.acquire(ORDER_URL))
+        self.assertEqual(self.breaker.get_state(ORDER_URL), OPEN)
+        self.assertRaises(ReadyCloudCircuitOpenError, self.breaker.acquire, ORDER_URL)
+        self.assertEqual(self.breaker.stats['/api/v2/orgs/{org}/orders/{id}/']['opened'], 2)
+
+    def test_calls_admitted_before_opening_should_be_ignored(self):
+        admitted = self.breaker.acquire(ORDER_URL)
+        self.trip()
+        self.clock.now += 10
+        probe = self.breaker.acquire(ORDER_URL)
+        self.breaker.record(event(status=500), admitted)
+        self.assertEqual(self.breaker.get_state(ORDER_URL), HALF_OPEN)
+        self.breaker.record(event(), probe)
+        self.assertEqual(self.breaker.get_state(ORDER_URL), CLOSED)
+
+    def test_failed_listener_should_not_affect_calls(self):
+        def listener(event):
+            raise ValueError(event)
+
+        self.breaker.add_listener(listener)
+        with self.assertLogs('readycloud.circuitbreaker', 'ERROR'):
+            self.trip()
+        self.assertEqual(len(self.events), 1)
+
+
+class ReadyCloudCircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.status = 500
+
+        def handler(request):
+            self.requests.append(request)
+            return self.status, {'detail': 'error'}
+
+        self.clock = Clock()
+        self.metrics = MetricsCollector()
+        self.breaker = CircuitBreaker(window=2, min_calls=2, open_duration=5, clock=self.clock,
+                                      listeners=[self.metrics.observe_circuit])
+        self.rc = ReadyCloud(token='12345', org_id='a', transport=InMemoryTransport(handler),
+                             circuit_breaker=self.breaker, listeners=[self.metrics])
+
+    def get_order(self, order_id, rc=None):
+        rc = rc or self.rc
+        return rc.get(rc.get_order_url(order_id), params={})
+
+    def test_open_circuit_should_fail_fast(self):
+        for _ in range(2):
+            self.assertRaises(ReadyCloudServerError, self.get_order, 1)
+        self.assertRaises(ReadyCloudCircuitOpenError, self.get_order, 2)
+        self.assertEqual(len(self.requests), 2)
+        # other endpoints have their own circuits
+        self.assertRaises(ReadyCloudServerError, self.rc.get_orders)
+        self.assertEqual(len(self.requests), 3)
+
+        self.status = 200
+        self.clock.now += 5
+        self.assertEqual(self.get_order(1)['status_code'], 200)
+        self.assertEqual(self.breaker.get_state(self.rc.get_order_url(1)), CLOSED)
+
+        lines = self.metrics.render().splitlines()
+        self.assertIn('readycloud_circuit_transitions_total{'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",state="open"} 1', lines)
+        self.assertIn('readycloud_circuit_state{'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",state="closed"} 1', lines)
+        self.assertIn('readycloud_request_errors_total{method="GET",'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",'
+                      'error="ReadyCloudCircuitOpenError"} 1', lines)
+
+    def test_organizations_should_share_breaker(self):
+        client = MultiOrgReadyCloud(token='12345', transport=self.rc.transport,
+                                    circuit_breaker=self.breaker)
+        for org_id in ('a', 'b'):
+            self.assertRaises(ReadyCloudServerError, self.get_order, 1, client.for_org(org_id))
+        self.assertRaises(ReadyCloudCircuitOpenError, self.get_order, 1, client.for_org('c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_cli
+----------------------------------
+
+Tests for `readycloud.cli` module.
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from mock import patch
+
+from readycloud.cli import Progress, main, parse_pair
+
+from tests.helpers import response
+
+
+class FakeAPI(object):
+    def __init__(self, orders=None, webhooks=None):
+        self.orders = orders or []
+        self.webhooks = webhooks or []
+        self.calls = []
+
+    def __call__(self, method, url, params=None, data=None, **kwargs):
+        path = url.split('readycloud.com', 1)[1]
+        self.calls.append((method, path))
+        body = json.loads(data) if data else None
+        if body is not None and body.get('fail'):
+            return response(400, {'detail': 'invalid'})
+        if path.startswith('/api/v1/webhooks/') and method == 'GET':
+            offset = params.get('offset', 0)
+            return response(payload={'count': len(self.webhooks),
+                                     'results': self.webhooks[offset:offset + params['limit']]})
+        if method == 'GET':
+            offset = params.get('offset', 0)
+            return response(payload={'count': len(self.orders),
+                                     'results': self.orders[offset:offset + params['limit']]})
+        return response(201 if method == 'POST' else 200, {'id': 1})
+
+
+class CommandsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.api = FakeAPI()
+        self.patcher = patch('requests.Session.request', side_effect=self.api)
+        self.patcher.start()
+        self.stdout = patch('sys.stdout', new_callable=io.StringIO).start()
+        self.stderr = patch('sys.stderr', new_callable=io.StringIO).start()
+
+    def tearDown(self):
+        patch.stopall()
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def run_command(self, *args):
+        return main(['--token', '12345', '--org', 'a', '--workers', '4'] + list(args))
+
+    def write_orders(self, name, orders):
+        with gzip.open(self.path(name), 'wt') as f:
+            for order in orders:
+                f.write(json.dumps(order) + '\n')
+        return self.path(name)
+
+    def test_import_orders_should_resume_from_checkpoint(self):
+        path = self.write_orders('orders.ndjson.gz', [{'number': i} for i in range(5)])
+        checkpoint = self.path('checkpoint.json')
+        self.assertEqual(self.run_command('import-orders', path, '--checkpoint', checkpoint), 0)
+        self.assertEqual(self.api.calls, [('POST', '/api/v2/orgs/a/orders/')] * 5)
+        self.assertIn('5 orders, 0 failed, 0 skipped', self.stdout.getvalue())
+
+        self.write_orders('orders.ndjson.gz', [{'number': i} for i in range(7)])
+        self.assertEqual(self.run_command('import-orders', path, '--checkpoint', checkpoint), 0)
+        self.assertEqual(len(self.api.calls), 7)
+
+    def test_interrupted_import_should_not_repeat_finished_calls(self):
+        path = self.write_orders('orders.ndjson.gz', [{'number': i} for i in range(20)])
+        checkpoint = self.path('checkpoint.json')
+        update = Progress.update
+
+        def interrupt(progress, *args, **kwargs):
+            update(progress, *args, **kwargs)
+            if progress.done == 3:
+                # let calls of other workers finish before interrupt
+                time.sleep(0.05)
+                raise KeyboardInterrupt()
+
+        with patch.object(Progress, 'update', interrupt):
+            self.assertEqual(self.run_command('import-orders', path,
+                                              '--checkpoint', checkpoint), 130)
+        sent = len(self.api.calls)
+        self.assertGreater(sent, 3)
+        self.assertEqual(self.run_command('import-orders', path, '--checkpoint', checkpoint), 0)
+        self.assertEqual(len(self.api.calls), 20)
+        self.assertIn('{0} orders, 0 failed, {1} skipped'.format(20 - sent, sent),
+                      self.stdout.getvalue())
+
+    def test_import_orders_should_report_failures(self):
+        path = self.write_orders('orders.ndjson.gz', [{'id': 1}, {'id': 2, 'fail': True}])
+        errors = self.path('errors.ndjson')
+        self.assertEqual(self.run_command('--progress', 'import-orders', path, '--update',
+                                          '--errors', errors), 1)
+        self.assertEqual(sorted(self.api.calls), [('PUT', '/api/v2/orgs/a/orders/1/'),
+                                                  ('PUT', '/api/v2/orgs/a/orders/2/')])
+        with open(errors) as f:
+            failures = [json.loads(line) for line in f]
+        self.assertEqual([(f['index'], f['status_code']) for f in failures], [(1, 400)])
+        self.assertIn('2 orders, 1 failed', self.stderr.getvalue())
+
+    def test_delete_orders(self):
+        self.assertEqual(self.run_command('delete-orders', '1', '2'), 0)
+        self.assertEqual(sorted(self.api.calls), [('DELETE', '/api/v2/orgs/a/orders/1/'),
+                                                  ('DELETE', '/api/v2/orgs/a/orders/2/')])
+
+    def test_export_orders(self):
+        self.api.orders = [{'id': i, 'customer': {'email': 'c{0}@example.com'.format(i)}}
+                           for i in range(3)]
+        path = self.path('orders.csv.gz')
+        self.assertEqual(self.run_command('export-orders', path, '--limit', '2',
+                                          '--columns', 'id,customer.email',
+                                          '--filter', 'status=new'), 0)
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual(f.read().split(), ['id,customer.email', '0,c0@example.com',
+                                                '1,c1@example.com', '2,c2@example.com'])
+
+    def test_sync_webhooks(self):
+        self.api.webhooks = [
+            {'id': 1, 'entity': 'orders', 'url': 'https://a.com/'},
+            {'id': 2, 'entity': 'orders', 'url': 'https://old.com/'},
+        ]
+        self.assertEqual(self.run_command('sync-webhooks', 'orders=https://a.com/',
+                                          'orders=https://b.com/', '--prune'), 0)
+        self.assertEqual(self.api.calls[1:], [('PUT', '/api/v1/webhooks/2/')])
+        self.assertEqual(self.stdout.getvalue().splitlines(), [
+            'update 2 orders https://old.com/ -> https://b.com/',
+        ])
+
+    def test_sync_webhooks_dry_run(self):
+        self.api.webhooks = [
+            {'id': 1, 'entity': 'orders', 'url': 'https://a.com/'},
+            {'id': 2, 'entity': 'orders', 'url': 'https://a.com/'},
+        ]
+        self.assertEqual(self.run_command('sync-webhooks', 'orders=https://a.com/',
+                                          'orders=https://b.com/', '--dry-run'), 0)
+        self.assertEqual([call[0] for call in self.api.calls], ['GET'])
+        self.assertEqual(self.stdout.getvalue().splitlines(), [
+            'delete 2 orders https://a.com/',
+            'create orders https://b.com/',
+        ])
+
+
+class ProgressTestCase(unittest.TestCase):
+    def test_progress_should_be_reported_once_per_interval(self):
+        now = [0.0]
+        stream = io.StringIO()
+        progress = Progress('orders', stream=stream, interval=1, clock=lambda: now[0])
+        progress.update()
+        now[0] = 2.0
+        progress.update(3, failed=1)
+        progress.update()
+        progress.finish()
+        self.assertEqual(stream.getvalue(),
+                         '\r4 orders, 1 failed, 2.0/s\r5 orders, 1 failed, 2.5/s\n')
+
+
+class ParsePairTestCase(unittest.TestCase):
+    def test_parse_pair(self):
+        self.assertEqual(parse_pair('orders=https://a.com/?x=1'), ('orders', 'https://a.com/?x=1'))
+        with self.assertRaises(argparse.ArgumentTypeError) as context:
+            parse_pair('foo')
+        self.assertIn("got 'foo'", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_coalesce
+----------------------------------
+
+Tests for `readycloud.coalesce` module.
+"""
+
+import threading
+import unittest
+
+from mock import Mock
+
+from readycloud.coalesce import EventCoalescer, get_event_key, get_event_order_id
+
+from tests.helpers import Clock
+
+
+class EventHelpersTestCase(unittest.TestCase):
+    def test_get_event_key(self):
+        self.assertEqual(get_event_key({'event_id': 5, 'id': 1}), 'event_id:5')
+        self.assertEqual(get_event_key({'id': 1, 'status': 'new'}),
+                         get_event_key({'status': 'new', 'id': 1}))
+        self.assertNotEqual(get_event_key({'id': 1, 'status': 'new'}),
+                            get_event_key({'id': 1, 'status': 'shipped'}))
+
+    def test_get_event_order_id(self):
+        self.assertEqual(get_event_order_id({'order_id': 3, 'id': 9}), 3)
+        self.assertEqual(get_event_order_id({'id': 9, 'data': {'id': 4}}), 4)
+        self.assertEqual(get_event_order_id({'id': 9}), 9)
+        self.assertIsNone(get_event_order_id({}))
+
+
+class EventCoalescerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.coalescer = EventCoalescer(window=2, dedupe_window=10, clock=self.clock)
+
+    def test_duplicates_should_be_dropped(self):
+        self.assertTrue(self.coalescer.add({'event_id': 'a', 'order_id': 1}))
+        self.assertFalse(self.coalescer.add({'event_id': 'a', 'order_id': 1}))
+        self.assertTrue(self.coalescer.add({'id': 1, 'status': 'new'}))
+        self.assertFalse(self.coalescer.add({'id': 1, 'status': 'new'}))
+        self.assertEqual(self.coalescer.stats['duplicates'], 2)
+
+    def test_duplicate_keys_should_expire(self):
+        self.coalescer.add({'id': 1})
+        self.clock.now += 11
+        self.assertTrue(self.coalescer.add({'id': 1}))
+
+    def test_burst_should_be_collapsed_to_latest_event(self):
+        self.coalescer.add({'id': 1, 'status': 'new'})
+        self.clock.now += 1
+        self.coalescer.add({'id': 2, 'status': 'new'})
+        self.coalescer.add({'id': 1, 'status': 'paid'})
+        self.assertEqual(self.coalescer.drain(), [])
+
+        self.clock.now += 1
+        updates = self.coalescer.drain()
+        self.assertEqual([(u.order_id, u.event['status'], u.count) for u in updates],
+                         [(1, 'paid', 2)])
+        self.assertEqual((updates[0].first_seen, updates[0].last_seen), (1000.0, 1001.0))
+
+        updates = self.coalescer.drain(force=True)
+        self.assertEqual([u.order_id for u in updates], [2])
+        self.assertEqual(self.coalescer.stats['coalesced'], 1)
+        self.assertEqual(self.coalescer.stats['released'], 2)
+
+    def test_memory_should_be_bounded(self):
+        coalescer = EventCoalescer(window=60, max_keys=3, max_pending=2, clock=self.clock)
+        coalescer.add_many({'id': i} for i in range(5))
+        self.assertEqual(coalescer.stats['keys'], 3)
+        self.assertEqual(coalescer.stats['evicted'], 2)
+        self.assertEqual(coalescer.stats['pending'], 2)
+        self.assertEqual((coalescer.stats['overflowed'], coalescer.stats['dropped']), (3, 1))
+        self.assertEqual([u.order_id for u in coalescer.drain()], [1, 2])
+        self.assertEqual([u.order_id for u in coalescer.drain(force=True)], [3, 4])
+
+    def test_pending_orders_should_be_bounded_without_drain(self):
+        coalescer = EventCoalescer(window=60, max_pending=10, clock=self.clock)
+        coalescer.add_many({'id': i} for i in range(5000))
+        self.assertEqual(coalescer.stats['pending'], 10)
+        self.assertEqual(coalescer.stats['dropped'], 4980)
+        self.assertEqual(len(coalescer.drain()), 10)
+
+    def test_released_orders_should_be_fetched(self):
+        def get(url, params):
+            if url == '/orders/2/':
+                raise ValueError('bad')
+            return {'id': url, 'ok': True}
+
+        client = Mock(get_order_url=lambda order_id: '/orders/{0}/'.format(order_id))
+        client.get.side_effect = get
+        coalescer = EventCoalescer(window=0, client=client, clock=self.clock)
+        coalescer.add_many([{'id': 1}, {'id': 2}, {'id': 1, 'status': 'paid'}])
+        updates = coalescer.drain()
+        self.assertEqual(updates[0].order, {'id': '/orders/1/', 'ok': True})
+        self.assertIsNone(updates[0].error)
+        self.assertIsNone(updates[1].order)
+        self.assertIsInstance(updates[1].error, ValueError)
+        self.assertEqual(client.get.call_count, 2)
+
+    def test_background_drain_should_release_pending_on_stop(self):
+        released = []
+        coalescer = EventCoalescer(window=60)
+        coalescer.add({'id': 1})
+        coalescer.start(released.extend, interval=0.01)
+        coalescer.stop()
+        self.assertEqual([u.order_id for u in released], [1])
+
+    def test_add_should_be_thread_safe(self):
+        def add(start):
+            for i in range(500):
+                self.coalescer.add({'id': i % 50, 'seq': start + i})
+
+        threads = [threading.Thread(target=add, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        updates = self.coalescer.drain(force=True)
+        self.assertEqual(len(updates), 50)
+        self.assertEqual(sum(u.count for u in updates), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_codec
+----------------------------------
+
+Tests for `readycloud.codec` module.
+"""
+
+import json
+import unittest
+from datetime import timedelta
+
+from mock import patch, Mock
+
+from readycloud import ReadyCloud
+from readycloud import codec
+from readycloud.codec import JSONCodec, OrjsonCodec, UjsonCodec, get_default_codec
+
+
+ORDER = {
+    'id': 1,
+    'message': u'caf\xe9 ☃',
+    'items': [{'sku': 'A', 'quantity': 2, 'price': 9.99, 'gift': False, 'note': None}],
+}
+
+
+class CodecTestCase(unittest.TestCase):
+    def check_codec(self, instance):
+        content = instance.dumps(ORDER)
+        self.assertIsInstance(content, bytes)
+        self.assertEqual(json.loads(content.decode('utf-8')), ORDER)
+        self.assertEqual(instance.loads(content), ORDER)
+        self.assertRaises(ValueError, instance.loads, b'<h1>Test</h1>')
+        # payloads accepted by json are accepted by every codec
+        data = {'items': {1: 'a', 2.5: 'b', None: 'c'}, 'big': 2 ** 70}
+        self.assertEqual(json.loads(instance.dumps(data).decode('utf-8')),
+                         json.loads(json.dumps(data)))
+        self.assertRaises(TypeError, instance.dumps, {'order': object()})
+
+    def test_json_codec(self):
+        self.check_codec(JSONCodec())
+
+    @unittest.skipIf(codec.orjson is None, 'orjson is not installed')
+    def test_orjson_codec(self):
+        self.check_codec(OrjsonCodec())
+
+    @unittest.skipIf(codec.ujson is None, 'ujson is not installed')
+    def test_ujson_codec(self):
+        self.check_codec(UjsonCodec())
+
+    def test_default_codec_should_fall_back_to_json(self):
+        with patch.object(codec, 'orjson', None), patch.object(codec, 'ujson', None):
+            self.assertIsInstance(get_default_codec(), JSONCodec)
+            self.assertRaises(ImportError, OrjsonCodec)
+
+
+class ReadyCloudCodecTestCase(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_client_should_use_codec_for_bodies(self, request):
+        request.return_value = Mock(status_code=201, ok=True, content=b'raw',
+                                    elapsed=timedelta(0), headers={})
+        custom = Mock(dumps=Mock(return_value=b'body'), loads=Mock(return_value={'id': 1}))
+        rc = ReadyCloud(token='12345', org_id='1', codec=custom)
+        self.assertEqual(rc.create_order(ORDER), {'id': 1, 'status_code': 201, 'ok': True})
+        self.assertEqual(request.call_args[1]['data'], b'body')
+        custom.loads.assert_called_once_with(b'raw')
+
+    @patch('requests.Session.request')
+    def test_default_codec_should_accept_non_str_keys(self, request):
+        request.return_value = Mock(status_code=201, ok=True, content=b'{}',
+                                    elapsed=timedelta(0), headers={})
+        ReadyCloud(token='12345', org_id='1').create_order({'items': {1: 'a'}})
+        self.assertEqual(json.loads(request.call_args[1]['data'].decode('utf-8')),
+                         {'items': {'1': 'a'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_compression
+----------------------------------
+
+Tests for `readycloud.compression` module.
+"""
+
+import gzip
+import io
+import json
+import unittest
+
+from mock import patch
+from requests import PreparedRequest
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+from readycloud import ReadyCloud
+from readycloud.compression import Compression, get_accept_encoding, get_encodings
+
+
+ORDER = {'message': 'test', 'items': [{'sku': 'SKU-{0}'.format(i), 'quantity': 1}
+                                      for i in range(100)]}
+
+
+def gzip_response(payload, url='https://readycloud.com/api/v2/orgs/1/orders/'):
+    """
+    Build requests response with gzip encoded body, decoded by urllib3
+    like responses received from network.
+    """
+    body = gzip.compress(json.dumps(payload).encode('utf-8'))
+    raw = HTTPResponse(body=io.BytesIO(body), status=200, preload_content=False,
+                       headers={'Content-Encoding': 'gzip', 'Content-Length': str(len(body))})
+    request = PreparedRequest()
+    request.prepare('GET', url)
+    return HTTPAdapter().build_response(request, raw), len(body)
+
+
+class CompressionTestCase(unittest.TestCase):
+    def test_small_bodies_should_not_be_compressed(self):
+        compression = Compression(threshold=100)
+        self.assertEqual(compression.compress(b'{}'), (b'{}', None))
+
+    def test_large_bodies_should_be_compressed(self):
+        data = json.dumps(ORDER).encode('utf-8')
+        body, encoding = Compression(threshold=100).compress(data)
+        self.assertEqual(encoding, 'gzip')
+        self.assertLess(len(body), len(data))
+        self.assertEqual(gzip.decompress(body), data)
+        self.assertEqual(Compression(threshold=100).compress(data)[0], body)
+
+    def test_unknown_or_missing_encodings_should_be_rejected(self):
+        self.assertRaises(ValueError, Compression, 'lzma')
+        for encoding in ('br', 'zstd'):
+            if encoding not in get_encodings():
+                self.assertRaises(ImportError, Compression, encoding)
+
+    def test_accept_encoding(self):
+        self.assertIn('gzip', get_accept_encoding())
+        self.assertEqual(Compression().accept_encoding, get_accept_encoding())
+        self.assertEqual(Compression(accept_encoding='gzip').accept_encoding, 'gzip')
+
+
+class ReadyCloudCompressionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.rc = ReadyCloud(token='12345', org_id='1', listeners=[self.events.append],
+                             compression=Compression(threshold=100))
+
+    def test_headers_should_advertise_encodings(self):
+        self.assertEqual(self.rc.get_headers()['Accept-Encoding'], get_accept_encoding())
+        self.assertNotIn('Accept-Encoding', ReadyCloud(token='12345').get_headers())
+
+    @patch('requests.Session.request')
+    def test_large_body_should_be_sent_compressed(self, request):
+        request.return_value = gzip_response({'id': 1})[0]
+        self.rc.create_order(ORDER)
+        kwargs = request.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(kwargs['data'])), ORDER)
+        event = self.events[0]
+        self.assertEqual(event.bytes_sent, len(kwargs['data']))
+        self.assertEqual(event.uncompressed_bytes_sent, len(self.rc.codec.dumps(ORDER)))
+
+    @patch('requests.Session.request')
+    def test_small_body_should_be_sent_as_is(self, request):
+        request.return_value = gzip_response({'id': 1})[0]
+        self.rc.create_webhook('orders', 'https://example.com/')
+        kwargs = request.call_args[1]
+        self.assertNotIn('Content-Encoding', kwargs['headers'])
+        self.assertEqual(self.events[0].bytes_sent, self.events[0].uncompressed_bytes_sent)
+
+    @patch('requests.Session.request')
+    def test_compressed_response_should_be_decoded(self, request):
+        payload = {'count': 100, 'results': ORDER['items']}
+        request.return_value, size = gzip_response(payload)
+        response = self.rc.get_orders()
+        self.assertEqual(response['results'], ORDER['items'])
+        event = self.events[0]
+        self.assertEqual(event.bytes_received, size)
+        self.assertEqual(event.uncompressed_bytes_received, len(json.dumps(payload)))
+
+    @patch('requests.Session.request')
+    def test_compressed_response_should_be_decoded_while_streamed(self, request):
+        payload = {'count': 100, 'results': ORDER['items']}
+        request.return_value, size = gzip_response(payload)
+        with self.rc.stream_orders(chunk_size=64) as page:
+            self.assertEqual(list(page), ORDER['items'])
+        self.assertEqual(self.events[0].bytes_received, size)
+        self.assertIsNone(self.events[0].uncompressed_bytes_received)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_concurrency
+----------------------------------
+
+Tests for `readycloud.concurrency` module.
+"""
+
+import threading
+import time
+import unittest
+
+from readycloud.concurrency import imap_bounded, imerge
+
+
+class ImapBoundedTestCase(unittest.TestCase):
+    def test_should_yield_results_in_order(self):
+        def func(i):
+            time.sleep(0.001 * (10 - i))
+            return i * 2
+
+        self.assertEqual(list(imap_bounded(func, range(10), workers=4)),
+                         [i * 2 for i in range(10)])
+
+    def test_should_consume_iterable_lazily(self):
+        consumed = []
+
+        def source():
+            for i in range(1000):
+                consumed.append(i)
+                yield i
+
+        results = imap_bounded(lambda i: i, source(), workers=2, window=4)
+        self.assertEqual(next(results), 0)
+        self.assertLessEqual(len(consumed), 4)
+        results.close()
+
+    def test_should_run_calls_concurrently(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def func(i):
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+
+        list(imap_bounded(func, range(20), workers=4))
+        self.assertGreater(state['max'], 1)
+        self.assertLessEqual(state['max'], 4)
+
+    def test_unordered_should_yield_results_as_completed(self):
+        def func(i):
+            time.sleep(0.05 if i == 0 else 0)
+            return i
+
+        results = list(imap_bounded(func, range(4), workers=4, ordered=False))
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        self.assertEqual(results[-1], 0)
+
+    def test_should_reraise_exceptions(self):
+        def func(i):
+            if i == 3:
+                raise KeyError(i)
+            return i
+
+        self.assertRaises(KeyError, list, imap_bounded(func, range(10)))
+
+
+class ImergeTestCase(unittest.TestCase):
+    def slow(self, name, count, delay):
+        for i in range(count):
+            time.sleep(delay)
+            yield name, i
+
+    def test_should_yield_items_of_all_iterables_as_produced(self):
+        items = list(imerge([self.slow('a', 3, 0.03), self.slow('b', 3, 0.001)], workers=2))
+        self.assertEqual(sorted(items), [(name, i) for name in 'ab' for i in range(3)])
+        self.assertEqual(items[:3], [('b', 0), ('b', 1), ('b', 2)])
+
+    def test_should_limit_number_of_consumed_iterables(self):
+        active = []
+        max_active = []
+
+        def source(i):
+            active.append(i)
+            max_active.append(len(active))
+            time.sleep(0.01)
+            active.remove(i)
+            yield i
+
+        self.assertEqual(sorted(imerge([source(i) for i in range(6)], workers=2)),
+                         list(range(6)))
+        self.assertLessEqual(max(max_active), 2)
+
+    def test_should_reraise_exceptions(self):
+        def broken():
+            yield 1
+            raise KeyError('broken')
+
+        self.assertRaises(KeyError, list, imerge([self.slow('a', 2, 0), broken()]))
+
+    def test_early_exit_should_stop_producers(self):
+        produced = []
+
+        def source():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        items = imerge([source()], workers=1, depth=1)
+        self.assertEqual(next(items), 0)
+        items.close()
+        time.sleep(0.3)
+        self.assertLess(len(produced), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
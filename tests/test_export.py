@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_export
+----------------------------------
+
+Tests for `readycloud.export` module.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+
+from readycloud.codec import JSONCodec
+from readycloud.export import (CSVWriter, NDJSONWriter, ParquetWriter, export_orders,
+                               export_records, flatten, get_columns, guess_compression,
+                               pyarrow)
+
+
+ORDERS = [
+    {'id': 1, 'number': 'RC-1', 'customer': {'email': 'a@example.com', 'name': 'A'},
+     'items': [{'sku': 'A'}]},
+    {'id': 2, 'number': 'RC-2', 'customer': {'email': 'b@example.com'}, 'items': []},
+]
+
+
+class HelpersTestCase(unittest.TestCase):
+    def test_flatten(self):
+        self.assertEqual(flatten(ORDERS[0]), {
+            'id': 1, 'number': 'RC-1', 'customer.email': 'a@example.com',
+            'customer.name': 'A', 'items': [{'sku': 'A'}],
+        })
+        self.assertEqual(get_columns(ORDERS[1]),
+                         ['customer.email', 'id', 'items', 'number'])
+
+    def test_guess_compression(self):
+        self.assertEqual(guess_compression('orders.ndjson.gz'), 'gzip')
+        self.assertEqual(guess_compression('orders.csv.xz'), 'xz')
+        self.assertIsNone(guess_compression('orders.csv'))
+
+
+class WritersTestCase(unittest.TestCase):
+    def test_ndjson_writer_should_write_chunks(self):
+        output = io.BytesIO()
+        with NDJSONWriter(output, codec=JSONCodec(), chunk_size=10) as writer:
+            writer.write(ORDERS[0])
+            self.assertGreater(len(output.getvalue()), 0)
+            writer.write(ORDERS[1])
+        lines = output.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], ORDERS)
+
+    def test_csv_writer_should_write_flattened_columns(self):
+        output = io.BytesIO()
+        with CSVWriter(output, columns={'id': 'id', 'email': 'customer.email',
+                                        'items': 'items'}) as writer:
+            self.assertEqual(writer.write_many(ORDERS), 2)
+        self.assertFalse(output.closed)
+        rows = list(csv.reader(io.StringIO(output.getvalue().decode('utf-8'))))
+        self.assertEqual(rows, [
+            ['id', 'email', 'items'],
+            ['1', 'a@example.com', '[{"sku":"A"}]'],
+            ['2', 'b@example.com', '[]'],
+        ])
+
+    def test_csv_writer_should_take_columns_from_first_record(self):
+        output = io.BytesIO()
+        with CSVWriter(output) as writer:
+            writer.write_many(reversed(ORDERS))
+        rows = list(csv.reader(io.StringIO(output.getvalue().decode('utf-8'))))
+        self.assertEqual(rows[0], ['customer.email', 'id', 'items', 'number'])
+        self.assertEqual(rows[2], ['a@example.com', '1', '[{"sku":"A"}]', 'RC-1'])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_writer_should_write_row_groups(self):
+        import pyarrow.parquet
+
+        output = io.BytesIO()
+        with ParquetWriter(output, columns=['id', 'customer.email'], row_group_size=1) as writer:
+            writer.write_many(ORDERS)
+        parquet = pyarrow.parquet.ParquetFile(io.BytesIO(output.getvalue()))
+        self.assertEqual(parquet.num_row_groups, 2)
+        self.assertEqual(parquet.read().to_pylist(), [
+            {'id': 1, 'customer.email': 'a@example.com'},
+            {'id': 2, 'customer.email': 'b@example.com'},
+        ])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_writer_should_keep_schema_of_first_row_group(self):
+        import pyarrow.parquet
+
+        records = [
+            {'id': 1, 'total': None, 'weight': 1.5, 'items': None},
+            {'id': 2, 'total': 12.5, 'weight': 2, 'items': [{'sku': 'A'}]},
+            {'id': 3, 'total': True, 'weight': None, 'items': None},
+        ]
+        output = io.BytesIO()
+        with ParquetWriter(output, columns=['id', 'total', 'weight', 'items'],
+                           row_group_size=1) as writer:
+            writer.write_many(records)
+        table = pyarrow.parquet.read_table(io.BytesIO(output.getvalue()))
+        self.assertEqual(str(table.schema.field('total').type), 'string')
+        self.assertEqual(str(table.schema.field('weight').type), 'double')
+        self.assertEqual(table.to_pylist(), [
+            {'id': 1, 'total': None, 'weight': 1.5, 'items': None},
+            {'id': 2, 'total': '12.5', 'weight': 2.0, 'items': '[{"sku":"A"}]'},
+            {'id': 3, 'total': 'true', 'weight': None, 'items': None},
+        ])
+
+        with ParquetWriter(io.BytesIO(), columns=['id'], row_group_size=1) as writer:
+            writer.write({'id': 1})
+            self.assertRaises(pyarrow.ArrowInvalid, writer.write, {'id': 2.5})
+
+    @unittest.skipIf(pyarrow is not None, 'pyarrow is installed')
+    def test_parquet_writer_should_require_pyarrow(self):
+        self.assertRaises(ImportError, ParquetWriter, io.BytesIO())
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_export_records_should_compress_file(self):
+        path = os.path.join(self.directory, 'orders.ndjson.gz')
+        progress = []
+        count = export_records(iter(ORDERS), path, compression='gzip',
+                               progress=progress.append, progress_every=1)
+        self.assertEqual(count, 2)
+        self.assertEqual(progress, [1, 2])
+        with gzip.open(path) as f:
+            self.assertEqual([json.loads(line) for line in f], ORDERS)
+
+    def test_export_records_should_reject_unknown_format(self):
+        self.assertRaises(ValueError, export_records, ORDERS, io.BytesIO(), format='xml')
+        self.assertRaises(ValueError, export_records, ORDERS, io.BytesIO(), compression='rar')
+
+    def test_export_orders_should_walk_all_pages(self):
+        client = Mock(codec=JSONCodec())
+        client.iter_orders.return_value = iter(ORDERS)
+        output = io.BytesIO()
+        count = export_orders(client, output, format='csv', columns=['id'],
+                              limit=50, status='new')
+        self.assertEqual(count, 2)
+        self.assertEqual(output.getvalue().decode('utf-8').split(), ['id', '1', '2'])
+        client.iter_orders.assert_called_once_with(limit=50, prefetch=1, workers=0,
+                                                   status='new')
+
+
+if __name__ == '__main__':
+    unittest.main()
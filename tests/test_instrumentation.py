@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_instrumentation
+----------------------------------
+
+Tests for `readycloud.instrumentation` module.
+"""
+
+import unittest
+
+from mock import patch, Mock
+from requests.exceptions import ConnectionError
+
+from readycloud import ReadyCloud
+from readycloud.cache import ResponseCache
+from readycloud.instrumentation import (Histogram, Instrumentation, MetricsCollector,
+                                        RequestEvent)
+from readycloud.retry import RetryPolicy
+
+from tests.helpers import response
+
+
+def event(method='GET', url='https://readycloud.com/api/v2/orgs/a/orders/1/', status=200,
+          duration=0.3, **phases):
+    result = RequestEvent(method, url)
+    result.status = status
+    result.duration = duration
+    result.bytes_sent = 10
+    result.bytes_received = 100
+    for phase, value in phases.items():
+        setattr(result, phase, value)
+    return result
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def test_events_should_be_delayed_inside_collect_block(self):
+        events = []
+        instrumentation = Instrumentation([events.append])
+        with instrumentation.collect():
+            instrumentation.emit(event())
+            self.assertEqual(instrumentation.decode(lambda value: value * 2, 21), 42)
+            self.assertEqual(events, [])
+        self.assertEqual(len(events), 1)
+        self.assertIsNotNone(events[0].decode)
+
+        instrumentation.emit(event())
+        self.assertEqual(len(events), 2)
+
+    def test_failed_listener_should_not_stop_other_listeners(self):
+        events = []
+        instrumentation = Instrumentation([Mock(side_effect=ValueError), events.append])
+        instrumentation.emit(event())
+        self.assertEqual(len(events), 1)
+
+
+class ReadyCloudInstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.rc = ReadyCloud(token='12345', org_id='abc', listeners=[self.events.append])
+
+    @patch('requests.Session.request', return_value=response(201, {'id': 1}, elapsed=0.25))
+    def test_request_should_be_reported_with_phases(self, request):
+        self.rc.create_order({'message': 'test'})
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertEqual(event.method, 'POST')
+        self.assertEqual(event.endpoint, '/api/v2/orgs/{org}/orders/')
+        self.assertEqual(event.status, 201)
+        self.assertEqual(event.bytes_sent, len(self.rc.codec.dumps({'message': 'test'})))
+        self.assertEqual(event.bytes_received, len(b'{"id": 1}'))
+        self.assertEqual(event.retries, 0)
+        self.assertEqual(event.ttfb, 0.25)
+        self.assertEqual(sorted(event.phases),
+                         ['body_read', 'decode', 'queue_wait', 'ttfb'])
+        self.assertIsNone(event.error)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_retries_should_be_counted_in_one_event(self, request, sleep):
+        self.rc.retry = RetryPolicy(max_retries=2, jitter=False)
+        request.side_effect = [ConnectionError('reset'), response(503), response(elapsed=0.25)]
+        self.rc.get(self.rc.get_order_url(1), params={})
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].retries, 2)
+        self.assertEqual(self.events[0].status, 200)
+
+    @patch('requests.Session.request', side_effect=ConnectionError('reset'))
+    def test_failed_request_should_be_reported_with_error(self, request):
+        self.assertRaises(ConnectionError, self.rc.delete_order, 1)
+        self.assertIsNone(self.events[0].status)
+        self.assertIsInstance(self.events[0].error, ConnectionError)
+        self.assertEqual(self.events[0].endpoint, '/api/v2/orgs/{org}/orders/{id}/')
+
+    @patch('requests.Session.request', return_value=response(elapsed=0.25))
+    def test_cache_hits_should_not_be_reported(self, request):
+        self.rc.cache = ResponseCache()
+        self.rc.get_organization('abc')
+        self.rc.get_organization('abc')
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(len(self.events), 1)
+
+
+class HistogramTestCase(unittest.TestCase):
+    def test_cumulative_counts(self):
+        histogram = Histogram(buckets=(1, 0.1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.65)
+
+
+class MetricsCollectorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsCollector(buckets=(0.1, 1))
+        self.metrics(event(ttfb=0.05, decode=0.01))
+        self.metrics(event(url='https://readycloud.com/api/v2/orgs/b/orders/2/', status=404))
+        failed = event(method='POST', url='/api/v2/orgs/a/orders/', status=None)
+        failed.error = ConnectionError()
+        failed.retries = 3
+        self.metrics(failed)
+
+    def test_events_should_be_aggregated_by_endpoint(self):
+        orders = ('GET', '/api/v2/orgs/{org}/orders/{id}/')
+        self.assertEqual(self.metrics.requests, {
+            orders + ('200',): 1,
+            orders + ('404',): 1,
+            ('POST', '/api/v2/orgs/{org}/orders/', 'error'): 1,
+        })
+        self.assertEqual(self.metrics.bytes_received[orders], 200)
+        self.assertEqual(self.metrics.durations[orders].count, 2)
+        self.assertEqual(self.metrics.phases[orders + ('ttfb',)].count, 1)
+
+    def test_render_openmetrics(self):
+        text = self.metrics.render()
+        lines = text.splitlines()
+        self.assertEqual(lines[-1], '# EOF')
+        self.assertIn('# TYPE readycloud_requests counter', lines)
+        self.assertIn('readycloud_requests_total{method="GET",'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",status="404"} 1', lines)
+        self.assertIn('readycloud_request_errors_total{method="POST",'
+                      'endpoint="/api/v2/orgs/{org}/orders/",error="ConnectionError"} 1', lines)
+        self.assertIn('readycloud_request_retries_total{method="POST",'
+                      'endpoint="/api/v2/orgs/{org}/orders/"} 3', lines)
+        self.assertIn('readycloud_request_duration_seconds_bucket{method="GET",'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",le="1.0"} 2', lines)
+        self.assertIn('readycloud_request_duration_seconds_bucket{method="GET",'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",le="+Inf"} 2', lines)
+        self.assertIn('readycloud_request_phase_seconds_count{method="GET",'
+                      'endpoint="/api/v2/orgs/{org}/orders/{id}/",phase="decode"} 1', lines)
+
+    def test_render_prometheus(self):
+        text = self.metrics.render(openmetrics=False)
+        self.assertIn('# TYPE readycloud_requests_total counter\n', text)
+        self.assertNotIn('# EOF', text)
+
+    def test_label_values_should_be_escaped(self):
+        metrics = MetricsCollector()
+        metrics(event(method='GET"\\\n'))
+        self.assertIn('method="GET\\"\\\\\\n"', metrics.render())
+
+    def test_reset(self):
+        self.metrics.reset()
+        self.assertEqual(self.metrics.requests, {})
+        self.assertTrue(all(line.startswith('#')
+                            for line in self.metrics.render().splitlines()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_mirror
+----------------------------------
+
+Tests for `readycloud.mirror` module.
+"""
+
+import unittest
+
+from mock import patch
+
+from readycloud import ReadyCloud
+from readycloud.mirror import OrderMirror
+
+from tests.helpers import response
+
+
+class OrderMirrorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.mirror = OrderMirror(indexes={'number': 'number', 'email': 'customer.email'})
+        self.mirror.upsert_many([
+            {'id': 1, 'number': 'A-1', 'customer': {'email': 'a@example.com'}},
+            {'id': 2, 'number': 'A-2', 'customer': {'email': 'b@example.com'}},
+            {'id': 3, 'number': 'A-3', 'customer': {'email': 'a@example.com'}},
+        ])
+
+    def test_find_should_use_indexed_fields(self):
+        self.assertEqual([o['id'] for o in self.mirror.find(email='a@example.com')], [1, 3])
+        self.assertEqual(self.mirror.find_one(number='A-2')['id'], 2)
+        self.assertEqual(len(self.mirror.find(number=['A-1', 'A-2'])), 2)
+        self.assertIsNone(self.mirror.find_one(number='missing'))
+
+    def test_find_by_not_indexed_field_should_raise_error(self):
+        self.assertRaises(ValueError, self.mirror.find, status='new')
+
+    def test_upsert_should_replace_order(self):
+        self.mirror.upsert({'id': 1, 'number': 'B-1', 'status_code': 200, 'ok': True})
+        self.assertEqual(self.mirror.get(1), {'id': 1, 'number': 'B-1'})
+        self.assertEqual(len(self.mirror), 3)
+
+    def test_deleted_orders_should_be_removed(self):
+        self.mirror.upsert({'id': 1, 'deleted': True})
+        self.mirror.delete(2)
+        self.assertEqual([o['id'] for o in self.mirror.find()], [3])
+
+    def test_invalid_index_name_should_raise_error(self):
+        self.assertRaises(ValueError, OrderMirror, indexes={'a; DROP': 'a'})
+
+
+class ReadyCloudMirrorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.mirror = OrderMirror()
+        self.rc = ReadyCloud(token='12345', org_id='1', mirror=self.mirror)
+
+    @patch('requests.Session.request')
+    def test_client_should_keep_mirror_up_to_date(self, request):
+        request.return_value = response(200, {'count': 2, 'results': [
+            {'id': 1, 'number': 'A-1'}, {'id': 2, 'number': 'A-2'}]})
+        list(self.rc.iter_orders(prefetch=0))
+        request.return_value = response(201, {'id': 3, 'number': 'A-3'})
+        self.rc.create_order({'number': 'A-3'})
+        request.return_value = response(200, {})
+        self.rc.update_order(1, {'number': 'B-1'})
+        request.return_value = response(204, {})
+        self.rc.delete_order(2)
+        self.assertEqual(sorted(o['number'] for o in self.mirror.find()), ['A-3', 'B-1'])
+
+    @patch('requests.Session.request')
+    def test_failed_calls_should_not_change_mirror(self, request):
+        request.return_value = response(400, {'id': 1, 'number': 'A-1'})
+        self.rc.create_order({'number': 'A-1'})
+        self.assertEqual(len(self.mirror), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
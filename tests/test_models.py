@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_models
+----------------------------------
+
+Tests for `readycloud.models` module.
+"""
+
+import pickle
+import unittest
+
+from readycloud.models import Order, Organization, ResponseMeta, Webhook, split_response
+
+
+ORDER = {
+    'id': 1,
+    'number': 'RC-1',
+    'status': 'new',
+    'items': [{'sku': 'A', 'quantity': 2}],
+    'addresses': {'shipping': {'city': 'Springfield'}},
+    'gift': True,
+}
+
+
+class ModelTestCase(unittest.TestCase):
+    def test_fields_should_be_available_as_attributes(self):
+        order = Order.from_dict(dict(ORDER, status_code=200, ok=True))
+        self.assertEqual((order.id, order.number, order.status), (1, 'RC-1', 'new'))
+        self.assertIsNone(order.email)
+        self.assertEqual(order.items, [{'sku': 'A', 'quantity': 2}])
+        self.assertEqual(order.addresses['shipping']['city'], 'Springfield')
+        self.assertTrue(order.gift)
+        self.assertRaises(AttributeError, getattr, order, 'status_code')
+        self.assertEqual(order.get('missing', 'default'), 'default')
+        self.assertEqual(order.to_dict(), ORDER)
+
+    def test_nested_fields_should_be_decoded_on_first_access(self):
+        order = Order.from_dict(ORDER)
+        self.assertIsInstance(order._rest, bytes)
+        self.assertIsNone(order._decoded)
+        order.items
+        self.assertIsNotNone(order._decoded)
+        order.release()
+        self.assertIsNone(order._decoded)
+        self.assertEqual(order.items, ORDER['items'])
+
+    def test_structured_value_of_slot_field_should_be_kept(self):
+        order = Order.from_dict({'id': 1, 'status': {'code': 'new'}})
+        self.assertEqual(order.status, {'code': 'new'})
+        self.assertEqual(order.to_dict(), {'id': 1, 'status': {'code': 'new'}})
+        self.assertIsNone(order._rest)
+
+    def test_models_should_not_have_instance_dict(self):
+        for model in (Order(id=1), Webhook(id=1, url='u'), Organization(id='a', name='A')):
+            self.assertFalse(hasattr(model, '__dict__'))
+
+    def test_record_without_nested_fields(self):
+        webhook = Webhook.from_dict({'id': 1, 'entity': 'orders', 'url': 'https://e.com/'})
+        self.assertIsNone(webhook._rest)
+        self.assertEqual(webhook.to_dict(), {'id': 1, 'entity': 'orders', 'url': 'https://e.com/'})
+
+    def test_equality_and_pickling(self):
+        order = Order.from_dict(ORDER)
+        self.assertEqual(order, Order.from_dict(dict(ORDER)))
+        self.assertNotEqual(order, Order.from_dict(dict(ORDER, status='paid')))
+        self.assertEqual(pickle.loads(pickle.dumps(order)), order)
+
+    def test_many_should_build_records_lazily(self):
+        orders = Order.many(iter([ORDER, dict(ORDER, id=2)]))
+        self.assertEqual(next(orders).id, 1)
+        self.assertEqual([order.id for order in orders], [2])
+
+    def test_split_response(self):
+        payload, meta = split_response(dict(ORDER, status_code=201, ok=True))
+        self.assertEqual(payload, ORDER)
+        self.assertEqual(meta, ResponseMeta(201, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_multiorg
+----------------------------------
+
+Tests for `readycloud.multiorg` module.
+"""
+
+import re
+import unittest
+
+from mock import patch
+
+from readycloud import MultiOrgReadyCloud
+from readycloud.cache import ResponseCache
+from readycloud.exceptions import ReadyCloudClientError
+from readycloud.ratelimit import TokenBucket
+
+from tests.helpers import response
+
+
+ORDERS_RE = re.compile(r'/api/v2/orgs/(\w+)/orders/$')
+
+
+def fake_api(orders_per_org):
+    def request(method, url, params=None, **kwargs):
+        org_id = ORDERS_RE.search(url).group(1)
+        if org_id not in orders_per_org:
+            return response(404, {'detail': 'Not found'})
+        orders = orders_per_org[org_id]
+        offset = params.get('offset', 0)
+        limit = params.get('limit', 100)
+        return response(payload={
+            'count': len(orders),
+            'results': orders[offset:offset + limit],
+        })
+    return request
+
+
+class MultiOrgReadyCloudTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rc = MultiOrgReadyCloud(token='12345', rate_limiter=TokenBucket(rate=1000),
+                                     cache=ResponseCache(), workers=4)
+        self.orders = {
+            'a': [{'id': 'a{0}'.format(i)} for i in range(5)],
+            'b': [{'id': 'b{0}'.format(i)} for i in range(3)],
+            'c': [],
+        }
+
+    def test_org_clients_should_share_resources(self):
+        a = self.rc.for_org('a')
+        b = self.rc.for_org('b')
+        self.assertIs(self.rc.for_org('a'), a)
+        self.assertEqual((a.org_id, b.org_id), ('a', 'b'))
+        for attr in ('transport', 'session', 'rate_limiter', 'cache', 'codec', 'instrumentation'):
+            self.assertIs(getattr(a, attr), getattr(self.rc.client, attr))
+            self.assertIs(getattr(b, attr), getattr(self.rc.client, attr))
+        self.assertEqual(a.get_orders_url(), 'https://readycloud.com/api/v2/orgs/a/orders/')
+
+    def test_close_should_close_shared_session_once(self):
+        with patch.object(self.rc.client.session, 'close') as close:
+            self.rc.for_org('a').close()
+            self.rc.close()
+        close.assert_called_once_with()
+
+    @patch('requests.Session.request')
+    def test_get_orders_should_query_all_orgs(self, request):
+        request.side_effect = fake_api(self.orders)
+        pages = dict(self.rc.get_orders(['a', 'b', 'x'], limit=2))
+        self.assertEqual(sorted(pages), ['a', 'b', 'x'])
+        self.assertEqual(pages['a']['results'], self.orders['a'][:2])
+        self.assertEqual(pages['x']['status_code'], 404)
+
+    @patch('requests.Session.request')
+    def test_iter_orders_should_merge_orders_of_all_orgs(self, request):
+        request.side_effect = fake_api(self.orders)
+        orders = list(self.rc.iter_orders(['a', 'b', 'c'], limit=2, status='new'))
+        self.assertEqual(sorted((org_id, order['id']) for org_id, order in orders),
+                         sorted((org_id, order['id']) for org_id in 'abc'
+                                for order in self.orders[org_id]))
+        self.assertEqual(request.call_count, 3 + 2 + 1)
+        self.assertTrue(all(call[1]['params']['status'] == 'new'
+                            for call in request.call_args_list))
+
+    @patch('requests.Session.request')
+    def test_iter_orders_should_raise_errors_of_orgs(self, request):
+        request.side_effect = fake_api(self.orders)
+        self.assertRaises(ReadyCloudClientError, list, self.rc.iter_orders(['a', 'x']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_pagination
+----------------------------------
+
+Tests for `readycloud.pagination` module.
+"""
+
+import time
+import unittest
+
+from mock import patch
+
+from readycloud import ReadyCloud
+from readycloud.exceptions import ReadyCloudClientError
+from readycloud.pagination import iter_items, iter_pages, iter_pages_parallel, prefetch
+
+
+def make_fetch(total, calls=None):
+    def fetch(limit, offset):
+        if calls is not None:
+            calls.append((limit, offset))
+        results = list(range(offset, min(offset + limit, total)))
+        return {'count': total, 'results': results, 'status_code': 200, 'ok': True}
+    return fetch
+
+
+class PaginationTestCase(unittest.TestCase):
+    def test_iter_items_should_yield_records_of_all_pages(self):
+        calls = []
+        self.assertEqual(list(iter_items(make_fetch(25, calls), limit=10)), list(range(25)))
+        self.assertEqual(calls, [(10, 0), (10, 10), (10, 20)])
+
+    def test_iter_items_without_prefetch_should_not_start_thread(self):
+        with patch('threading.Thread') as thread:
+            self.assertEqual(list(iter_items(make_fetch(5), limit=2, prefetch_pages=0)),
+                             list(range(5)))
+        self.assertFalse(thread.called)
+
+    def test_iter_pages_should_stop_when_next_link_is_empty(self):
+        pages = [
+            {'results': [1, 2], 'next': 'url'},
+            {'results': [3], 'next': None},
+        ]
+
+        def fetch(limit, offset):
+            return pages.pop(0)
+
+        self.assertEqual(len(list(iter_pages(fetch, limit=2))), 2)
+
+    def test_iter_pages_should_support_v1_pages(self):
+        pages = [
+            {'objects': {'1': 'b', '0': 'a'}, 'meta': {'total_count': 3}},
+            {'objects': {'0': 'c'}, 'meta': {'total_count': 3}},
+        ]
+
+        def fetch(limit, offset):
+            return pages.pop(0)
+
+        self.assertEqual(list(iter_items(fetch, limit=2)), ['a', 'b', 'c'])
+
+    def test_failed_page_should_raise_client_error(self):
+        def fetch(limit, offset):
+            return {'status_code': 403, 'ok': False}
+
+        self.assertRaises(ReadyCloudClientError, list, iter_items(fetch))
+
+    def test_prefetch_should_keep_bounded_number_of_items_ahead(self):
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        items = prefetch(source(), depth=2)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.3)
+        # one item taken by caller, two in queue and one waiting to be put
+        self.assertLessEqual(len(produced), 4)
+        items.close()
+
+    def test_prefetch_should_reraise_errors(self):
+        def source():
+            yield 1
+            raise KeyError('test')
+
+        items = prefetch(source())
+        self.assertEqual(next(items), 1)
+        self.assertRaises(KeyError, next, items)
+
+
+class ParallelPaginationTestCase(unittest.TestCase):
+    def test_iter_items_with_workers_should_yield_records_in_order(self):
+        calls = []
+        self.assertEqual(list(iter_items(make_fetch(95, calls), limit=10, workers=4)),
+                         list(range(95)))
+        self.assertEqual(sorted(calls), [(10, offset) for offset in range(0, 95, 10)])
+
+    def test_parallel_pages_should_step_by_page_size_returned_by_server(self):
+        def fetch(limit, offset):
+            return make_fetch(10)(min(limit, 3), offset)
+
+        self.assertEqual(list(iter_items(fetch, limit=100, workers=2)), list(range(10)))
+
+    def test_parallel_pages_without_total_should_fetch_sequentially(self):
+        def fetch(limit, offset):
+            page = make_fetch(5)(limit, offset)
+            del page['count']
+            return page
+
+        self.assertEqual(len(list(iter_pages_parallel(fetch, limit=2, workers=3))), 3)
+
+    def test_parallel_pages_should_raise_on_failed_page(self):
+        def fetch(limit, offset):
+            if offset == 20:
+                return {'status_code': 500, 'ok': False}
+            return make_fetch(50)(limit, offset)
+
+        self.assertRaises(ReadyCloudClientError, list, iter_items(fetch, limit=10, workers=2))
+
+
+class ReadyCloudIterTestCase(unittest.TestCase):
+    def test_iter_orders_should_pass_filters_with_page_params(self):
+        rc = ReadyCloud(token='12345', org_id='1')
+        calls = []
+
+        def get_orders(**kwargs):
+            calls.append(kwargs)
+            return make_fetch(3)(kwargs['limit'], kwargs['offset'])
+
+        with patch.object(rc, 'get_orders', side_effect=get_orders):
+            self.assertEqual(list(rc.iter_orders(limit=2, status='new')), [0, 1, 2])
+        self.assertEqual(calls, [
+            {'status': 'new', 'limit': 2, 'offset': 0},
+            {'status': 'new', 'limit': 2, 'offset': 2},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
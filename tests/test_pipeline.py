@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_pipeline
+----------------------------------
+
+Tests for `readycloud.pipeline` module.
+"""
+
+import threading
+import time
+import unittest
+
+from readycloud import ReadyCloud
+from readycloud.pipeline import SOURCE, TRANSFORM, UPLOAD, Pipeline
+from readycloud.transport import InMemoryTransport
+
+
+def to_order(row):
+    if row['qty'] < 0:
+        raise ValueError('negative quantity')
+    return {'number': 'RC-{0}'.format(row['id']), 'items': [{'quantity': row['qty']}]}
+
+
+def rows(count):
+    for i in range(count):
+        yield {'id': i, 'qty': -1 if i == 3 else i}
+
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.uploaded = []
+        self.lock = threading.Lock()
+
+    def upload(self, order):
+        with self.lock:
+            self.uploaded.append(order)
+        if order['number'] == 'RC-5':
+            return {'status_code': 400, 'ok': False}
+        return dict(order, id=order['number'], status_code=201, ok=True)
+
+    def test_records_should_be_transformed_on_process_pool_and_uploaded(self):
+        pipeline = Pipeline(rows(20), self.upload, transform=to_order, processes=2,
+                            chunk_size=3, workers=4)
+        results = list(pipeline.run())
+        self.assertEqual([result.index for result in results], list(range(20)))
+        self.assertEqual(results[0].item, {'id': 0, 'qty': 0})
+        self.assertEqual(results[0].response['id'], 'RC-0')
+        self.assertIsInstance(results[3].error, ValueError)
+        self.assertFalse(results[5].ok)
+        self.assertEqual(len(self.uploaded), 19)
+
+        stats = pipeline.stats
+        self.assertEqual((stats[SOURCE]['items'], stats[SOURCE]['errors']), (20, 0))
+        self.assertEqual((stats[TRANSFORM]['items'], stats[TRANSFORM]['errors']), (20, 1))
+        self.assertEqual((stats[UPLOAD]['items'], stats[UPLOAD]['errors']), (19, 1))
+        self.assertGreater(stats[UPLOAD]['throughput'], 0)
+
+    def test_transform_may_run_in_source_thread(self):
+        pipeline = Pipeline(rows(5), self.upload, transform=lambda row: to_order(row),
+                            processes=0)
+        self.assertEqual(sum(1 for result in pipeline.run() if result.ok), 4)
+
+    def test_records_should_be_uploaded_as_is_without_transform(self):
+        orders = [{'number': 'RC-{0}'.format(i)} for i in range(3)]
+        results = list(Pipeline(orders, self.upload, ordered=False).run())
+        self.assertEqual(sorted(result.response['id'] for result in results),
+                         ['RC-0', 'RC-1', 'RC-2'])
+
+    def test_slow_upload_should_throttle_source(self):
+        read = []
+
+        def source():
+            for row in rows(1000):
+                read.append(row)
+                yield row
+
+        def upload(order):
+            time.sleep(0.001)
+            return {'ok': True}
+
+        pipeline = Pipeline(source(), upload, transform=to_order, processes=0,
+                            chunk_size=10, workers=2, queue_size=2)
+        results = pipeline.run()
+        for _ in range(5):
+            next(results)
+        time.sleep(0.05)
+        self.assertLess(len(read), 100)
+        results.close()
+        self.assertLess(len(read), 100)
+
+    def test_source_error_should_be_raised(self):
+        def source():
+            yield {'id': 1, 'qty': 1}
+            raise IOError('broken file')
+
+        pipeline = Pipeline(source(), self.upload, transform=to_order, processes=0,
+                            chunk_size=1)
+        self.assertRaises(IOError, list, pipeline.run())
+
+    def test_orders_should_be_created_through_client(self):
+        def handler(request):
+            return 201, dict(request.json(), id=1)
+
+        rc = ReadyCloud(token='12345', org_id='a', transport=InMemoryTransport(handler))
+        results = list(Pipeline(rows(3), rc.create_order, transform=to_order,
+                                processes=1).run())
+        self.assertEqual([result.response['number'] for result in results],
+                         ['RC-0', 'RC-1', 'RC-2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
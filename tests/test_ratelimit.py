@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_ratelimit
+----------------------------------
+
+Tests for `readycloud.ratelimit` module.
+"""
+
+import unittest
+
+from mock import patch, Mock
+
+from readycloud import ReadyCloud
+from readycloud.ratelimit import TokenBucket
+
+from tests.helpers import Clock, response
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock(1700000000.0)
+        self.bucket = TokenBucket(rate=2, burst=2, increase=1, clock=self.clock)
+
+    def test_reserve_should_allow_burst_and_then_spread_requests(self):
+        self.assertEqual([self.bucket.reserve() for _ in range(4)], [0, 0, 0.5, 1.0])
+
+    def test_tokens_should_refill_with_time(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+        self.clock.now += 1
+        self.assertEqual(self.bucket.reserve(), 0)
+
+    def test_429_should_decrease_rate_and_pause_for_retry_after(self):
+        self.bucket.update(response(429, headers={'Retry-After': '5'}))
+        self.assertEqual(self.bucket.rate, 1)
+        self.assertEqual(self.bucket.reserve(), 5)
+
+    def test_rate_should_not_go_below_min_rate(self):
+        for _ in range(10):
+            self.bucket.update(response(429))
+        self.assertEqual(self.bucket.rate, self.bucket.min_rate)
+
+    def test_success_should_increase_rate_up_to_max_rate(self):
+        self.bucket.max_rate = 3.5
+        for _ in range(3):
+            self.bucket.update(response(200))
+        self.assertEqual(self.bucket.rate, 3.5)
+
+    def test_rate_limit_headers_should_cap_rate(self):
+        self.bucket.update(response(200, headers={'X-RateLimit-Remaining': '10',
+                                                  'X-RateLimit-Reset': '20'}))
+        self.assertEqual(self.bucket.rate, 0.5)
+        self.bucket.rate = 2
+        self.bucket.update(response(200, headers={'RateLimit-Remaining': '30',
+                                                  'RateLimit-Reset': str(self.clock.now + 20)}))
+        self.assertEqual(self.bucket.rate, 1.5)
+
+
+class ReadyCloudRateLimitTestCase(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_shared_limiter_should_be_used_by_every_client(self, request):
+        request.return_value = response(200)
+        bucket = Mock()
+        rc1 = ReadyCloud(token='12345', org_id='1', rate_limiter=bucket)
+        rc2 = ReadyCloud(token='12345', org_id='2', rate_limiter=bucket)
+        rc1.get_orders()
+        rc2.delete_order('1')
+        self.assertEqual(bucket.acquire.call_count, 2)
+        bucket.update.assert_called_with(request.return_value)
+
+
+if __name__ == '__main__':
+    unittest.main()
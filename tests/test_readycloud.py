@@ -8,19 +8,24 @@ test_readycloud
 Tests for `readycloud.readycloud` module.
 """
 
-import json
 import unittest
+from datetime import timedelta
 
 from mock import patch, Mock
 
 from readycloud import ReadyCloud
+from readycloud.codec import JSONCodec
 from readycloud.exceptions import ReadyCloudServerError
 
+OK_RESPONSE = Mock(status_code=200, ok=True, content=b'{}', elapsed=timedelta(0), headers={})
+
 
 class ReadyCloudTestCase(unittest.TestCase):
     def setUp(self):
-        self.rc = ReadyCloud(token='12345', host='https://readycloud.com/', api=ReadyCloud.API_V1)
-        self.rc_v2 = ReadyCloud(token='12345', host='https://readycloud.com/', org_id='1', api=ReadyCloud.API_V2)
+        self.rc = ReadyCloud(token='12345', host='https://readycloud.com/', api=ReadyCloud.API_V1,
+                             codec=JSONCodec())
+        self.rc_v2 = ReadyCloud(token='12345', host='https://readycloud.com/', org_id='1', api=ReadyCloud.API_V2,
+                                codec=JSONCodec())
 
     def test_get_orders_url_should_return_full_orders_url(self):
         self.assertEqual(self.rc.get_orders_url(), 'https://readycloud.com/api/v1/orders/')
@@ -35,157 +40,191 @@ class ReadyCloudTestCase(unittest.TestCase):
         }
         self.assertEqual(self.rc.get_headers(), expected_headers)
 
-    @patch('requests.get')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_get_orders_should_send_get_with_right_params(self, get):
         self.rc.get_orders(limit=2)
         get.assert_called_once_with(
-            'https://readycloud.com/api/v1/orders/',
+            'GET', 'https://readycloud.com/api/v1/orders/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
             params={'limit': 2})
 
-    @patch('requests.get')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_get_orders_via_api_2_should_send_get_with_right_params(self, get):
         self.rc_v2.get_orders(limit=2)
         get.assert_called_once_with(
-            'https://readycloud.com/api/v2/orgs/1/orders/',
+            'GET', 'https://readycloud.com/api/v2/orgs/1/orders/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
             params={'limit': 2})
 
-    @patch('requests.post')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_created_order_should_send_post_with_right_params(self, post):
         order = {
             'message': 'test',
         }
         self.rc.create_order(order)
         post.assert_called_once_with(
-            'https://readycloud.com/api/v1/orders/',
+            'POST', 'https://readycloud.com/api/v1/orders/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
-            data=json.dumps(order))
+            data=JSONCodec().dumps(order))
 
-    @patch('requests.post')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_created_order_via_api_2_should_send_post_with_right_params(self, post):
         order = {
             'message': 'test',
         }
         self.rc_v2.create_order(order)
         post.assert_called_once_with(
-            'https://readycloud.com/api/v2/orgs/1/orders/',
+            'POST', 'https://readycloud.com/api/v2/orgs/1/orders/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
-            data=json.dumps(order))
+            data=JSONCodec().dumps(order))
 
-    @patch('requests.put')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_update_order_should_send_put_with_right_params(self, put):
         order = {
             'message': 'test',
         }
         self.rc.update_order('1', order)
         put.assert_called_once_with(
-            'https://readycloud.com/api/v1/orders/1/',
+            'PUT', 'https://readycloud.com/api/v1/orders/1/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
-            data=json.dumps(order))
+            data=JSONCodec().dumps(order))
 
-    @patch('requests.put')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_update_order_via_api_2_should_send_put_with_right_params(self, put):
         order = {
             'message': 'test',
         }
         self.rc_v2.update_order('1', order)
         put.assert_called_once_with(
-            'https://readycloud.com/api/v2/orgs/1/orders/1/',
+            'PUT', 'https://readycloud.com/api/v2/orgs/1/orders/1/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
-            data=json.dumps(order))
+            data=JSONCodec().dumps(order))
 
-    @patch('requests.delete')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_delete_order_should_send_delete(self, delete):
         self.rc.delete_order('1')
         delete.assert_called_once_with(
-            'https://readycloud.com/api/v1/orders/1/',
+            'DELETE', 'https://readycloud.com/api/v1/orders/1/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'})
 
-    @patch('requests.get')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_if_rc_returns_500_should_raise_exception(self, get):
-        get.return_value = Mock(status_code=500)
+        get.return_value = Mock(status_code=500, content=b'', elapsed=timedelta(0), headers={})
         self.assertRaises(ReadyCloudServerError, self.rc.get_orders, limit=2)
 
-    @patch('requests.post')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_create_orders_webhooks_should_send_post_with_right_params(self, post):
         self.rc.create_orders_webhook('https://example.com/test')
         post.assert_called_once_with(
-            'https://readycloud.com/api/v1/webhooks/',
+            'POST', 'https://readycloud.com/api/v1/webhooks/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
-            data=json.dumps({
+            data=JSONCodec().dumps({
                 'entity': 'orders',
                 'url': 'https://example.com/test',
             }))
 
-    @patch('requests.get')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_get_webhooks_should_send_get_with_right_params(self, get):
         self.rc.get_webhooks(limit=2)
         get.assert_called_once_with(
-            'https://readycloud.com/api/v1/webhooks/',
+            'GET', 'https://readycloud.com/api/v1/webhooks/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
             params={'limit': 2})
 
-    @patch('requests.put')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_update_orders_webhook_should_send_put_with_right_params(self, put):
         self.rc.update_orders_webhook(1, 'https://example.com/new-url')
         put.assert_called_once_with(
-            'https://readycloud.com/api/v1/webhooks/1/',
+            'PUT', 'https://readycloud.com/api/v1/webhooks/1/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
-            data=json.dumps({
+            data=JSONCodec().dumps({
                 'entity': 'orders',
                 'url': 'https://example.com/new-url',
             }))
 
-    @patch('requests.delete')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_delete_webhook_should_send_delete(self, delete):
         self.rc.delete_webhook(1)
         delete.assert_called_once_with(
-            'https://readycloud.com/api/v1/webhooks/1/',
+            'DELETE', 'https://readycloud.com/api/v1/webhooks/1/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'})
 
-    @patch('requests.get')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_get_organizations_should_return_right_params(self, get):
         self.rc_v2.get_organizations()
         get.assert_called_once_with(
-            'https://readycloud.com/api/v2/orgs/',
+            'GET', 'https://readycloud.com/api/v2/orgs/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
             params={})
 
-    @patch('requests.get')
+    @patch('requests.Session.request', return_value=OK_RESPONSE)
     def test_get_organization_with_pk_should_return_right_params(self, get):
         self.rc_v2.get_organization('1')
         get.assert_called_once_with(
-            'https://readycloud.com/api/v2/orgs/1/',
+            'GET', 'https://readycloud.com/api/v2/orgs/1/',
             headers={
                 'content-type': 'application/json',
                 'AUTHORIZATION': 'bearer 12345'},
             params={})
 
 
+class ReadyCloudSessionTestCase(unittest.TestCase):
+    def test_client_should_reuse_one_session_for_all_requests(self):
+        rc = ReadyCloud(token='12345', api=ReadyCloud.API_V1)
+        with patch.object(rc.session, 'request', return_value=OK_RESPONSE) as request:
+            rc.get_orders()
+            rc.delete_order('1')
+        self.assertEqual(request.call_count, 2)
+
+    def test_pool_size_should_be_applied_to_adapters(self):
+        rc = ReadyCloud(token='12345', pool_connections=3, pool_maxsize=7)
+        adapter = rc.session.get_adapter('https://readycloud.com/')
+        self.assertEqual(adapter._pool_connections, 3)
+        self.assertEqual(adapter._pool_maxsize, 7)
+
+    def test_context_manager_should_close_owned_session(self):
+        rc = ReadyCloud(token='12345')
+        with patch.object(rc.session, 'close') as close:
+            with rc:
+                pass
+        close.assert_called_once_with()
+
+    def test_close_should_not_close_external_session(self):
+        session = Mock()
+        with ReadyCloud(token='12345', session=session):
+            pass
+        self.assertFalse(session.close.called)
+
+    def test_timeout_should_be_passed_to_session(self):
+        session = Mock(**{'request.return_value': OK_RESPONSE})
+        rc = ReadyCloud(token='12345', session=session, api=ReadyCloud.API_V1, timeout=5)
+        rc.get_orders()
+        self.assertEqual(session.request.call_args[1]['timeout'], 5)
+
+
 if __name__ == '__main__':
     unittest.main()
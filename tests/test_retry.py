@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_retry
+----------------------------------
+
+Tests for `readycloud.retry` module.
+"""
+
+import unittest
+
+from mock import patch
+from requests.exceptions import ConnectionError
+
+from readycloud import ReadyCloud
+from readycloud.exceptions import ReadyCloudServerError
+from readycloud.retry import RetryPolicy, parse_retry_after
+
+from tests.helpers import response
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_should_retry_idempotent_methods_on_server_errors(self):
+        policy = RetryPolicy(max_retries=2)
+        self.assertTrue(policy.should_retry('GET', 0, response=response(503)))
+        self.assertTrue(policy.should_retry('put', 1, response=response(500)))
+        self.assertFalse(policy.should_retry('GET', 2, response=response(503)))
+        self.assertFalse(policy.should_retry('POST', 0, response=response(503)))
+        self.assertFalse(policy.should_retry('GET', 0, response=response(404)))
+
+    def test_should_retry_429_for_any_method(self):
+        self.assertTrue(RetryPolicy().should_retry('POST', 0, response=response(429)))
+
+    def test_should_retry_connection_errors_for_idempotent_methods(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry('DELETE', 0, error=ConnectionError()))
+        self.assertFalse(policy.should_retry('POST', 0, error=ConnectionError()))
+
+    def test_backoff_should_grow_exponentially_with_jitter(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+        self.assertEqual(RetryPolicy(backoff_factor=1, jitter=False).get_backoff(2), 4)
+        for attempt in range(6):
+            self.assertTrue(0 <= policy.get_backoff(attempt) <= min(5, 2 ** attempt))
+
+    def test_backoff_should_respect_retry_after(self):
+        policy = RetryPolicy(max_backoff=10)
+        self.assertEqual(policy.get_backoff(0, response(429, headers={'Retry-After': '3'})), 3)
+        self.assertEqual(policy.get_backoff(0, response(429, headers={'Retry-After': '300'})), 10)
+
+    def test_parse_retry_after_should_support_http_dates(self):
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+class ReadyCloudRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rc = ReadyCloud(token='12345', org_id='1',
+                             retry=RetryPolicy(max_retries=2, backoff_factor=0))
+
+    @patch('requests.Session.request')
+    def test_get_should_be_retried_until_success(self, request):
+        request.side_effect = [response(503), ConnectionError(), response(200)]
+        self.assertEqual(self.rc.get_orders(), {'status_code': 200, 'ok': True})
+        self.assertEqual(request.call_count, 3)
+
+    @patch('requests.Session.request')
+    def test_last_server_error_should_be_raised_when_retries_exhausted(self, request):
+        request.return_value = response(500)
+        self.assertRaises(ReadyCloudServerError, self.rc.get_orders)
+        self.assertEqual(request.call_count, 3)
+
+    @patch('requests.Session.request')
+    def test_post_should_not_be_retried_on_server_error(self, request):
+        request.return_value = response(500)
+        self.assertRaises(ReadyCloudServerError, self.rc.create_order, {})
+        self.assertEqual(request.call_count, 1)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_client_should_sleep_between_retries(self, request, sleep):
+        self.rc.retry = RetryPolicy(max_retries=1)
+        request.side_effect = [response(429, headers={'Retry-After': '2'}), response(201)]
+        self.rc.create_order({})
+        sleep.assert_called_once_with(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_singleflight
+----------------------------------
+
+Tests for `readycloud.singleflight` module.
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from readycloud import ReadyCloud
+from readycloud.singleflight import AsyncSingleFlight, SingleFlight, make_key
+from readycloud.transport import InMemoryTransport
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+
+
+def run_threads(func, count):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = func()
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def blocking(self, result, waiters):
+        def func():
+            self.calls += 1
+            wait_for(lambda: self.flight.collapsed >= waiters)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return func
+
+    def test_identical_calls_should_be_collapsed(self):
+        results = run_threads(lambda: self.flight.do('key', self.blocking('result', 7)), 8)
+        self.assertEqual(results, ['result'] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight.stats, {'calls': 1, 'collapsed': 7, 'in_flight': 0})
+
+    def test_error_should_be_raised_in_all_callers(self):
+        error = ValueError('boom')
+        results = run_threads(lambda: self.flight.do('key', self.blocking(error, 3)), 4)
+        self.assertEqual(results, [error] * 4)
+
+    def test_sequential_calls_should_not_be_collapsed(self):
+        self.flight.do('key', lambda: 1)
+        self.flight.do('key', lambda: 2)
+        self.assertEqual(self.flight.stats['collapsed'], 0)
+
+    def test_make_key(self):
+        self.assertEqual(make_key('/orders/', {'a': 1, 'b': [2]}, 't'),
+                         make_key('/orders/', {'b': [2], 'a': 1}, 't'))
+        self.assertNotEqual(make_key('/orders/', {}, 't'), make_key('/orders/', {}, 'other'))
+
+
+class ReadyCloudSingleFlightTestCase(unittest.TestCase):
+    def test_concurrent_gets_should_share_one_request(self):
+        flight = SingleFlight()
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            wait_for(lambda: flight.collapsed >= 5)
+            return 200, {'id': 'a', 'name': 'A'}
+
+        rc = ReadyCloud(token='12345', transport=InMemoryTransport(handler), single_flight=flight)
+        events = []
+        rc.instrumentation.add_listener(events.append)
+        results = run_threads(lambda: rc.get_organization('a'), 6)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(len(events), 1)
+        self.assertTrue(all(result == {'id': 'a', 'name': 'A', 'status_code': 200, 'ok': True}
+                            for result in results))
+        results[0]['name'] = 'changed'
+        self.assertEqual(results[1]['name'], 'A')
+
+
+class AsyncSingleFlightTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_calls_should_be_collapsed(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        results = await asyncio.gather(*[flight.do('key', func) for _ in range(5)])
+        self.assertEqual(results, ['result'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats, {'calls': 1, 'collapsed': 4, 'in_flight': 0})
+
+    async def test_error_should_be_raised_in_all_callers(self):
+        flight = AsyncSingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.01)
+            raise ValueError('boom')
+
+        results = await asyncio.gather(*[flight.do('key', func) for _ in range(3)],
+                                       return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_cancelled_waiter_should_not_cancel_call(self):
+        flight = AsyncSingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.02)
+            return 'result'
+
+        leader = asyncio.ensure_future(flight.do('key', func))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.do('key', func))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        self.assertEqual(await leader, 'result')
+
+    async def test_cancelled_leader_should_not_cancel_call(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return 'result'
+
+        leader = asyncio.ensure_future(flight.do('key', func))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('key', func))
+        await asyncio.sleep(0)
+        leader.cancel()
+        self.assertEqual(await follower, 'result')
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_streaming
+----------------------------------
+
+Tests for `readycloud.streaming` module.
+"""
+
+import json
+import unittest
+from datetime import timedelta
+
+from mock import patch, Mock
+
+from readycloud import ReadyCloud
+from readycloud.exceptions import ReadyCloudServerError
+from readycloud.streaming import JSONStreamScanner, StreamingPage
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def streamed_response(payload, chunk_size=7, status_code=200):
+    data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    return Mock(status_code=status_code, ok=status_code < 400, elapsed=timedelta(0),
+                content=data, headers={},
+                iter_content=lambda size: iter(chunked(data, chunk_size)))
+
+
+class StreamingPageTestCase(unittest.TestCase):
+    payload = {
+        'count': 3,
+        'next': None,
+        'results': [
+            {'id': 1, 'message': u'caf\xe9 ☃', 'total': 12345.678},
+            {'id': 2, 'items': [{'sku': 'A', 'qty': 10}], 'note': None},
+            {'id': 3, 'escaped': '"quoted" \\ [not, array]'},
+        ],
+        'extra': {'after': True},
+        'tail': -0.5,
+    }
+
+    def test_records_should_be_same_as_buffered_decoding_for_any_chunk_size(self):
+        for chunk_size in range(1, 40):
+            page = StreamingPage(streamed_response(self.payload, chunk_size))
+            self.assertEqual(list(page), self.payload['results'])
+            self.assertEqual(page.meta, {'count': 3, 'next': None, 'extra': {'after': True},
+                                         'tail': -0.5})
+
+    def test_meta_before_records_should_be_available_during_iteration(self):
+        page = StreamingPage(streamed_response(self.payload))
+        next(iter(page))
+        self.assertEqual(page.meta['count'], 3)
+
+    def test_v1_objects_should_be_supported(self):
+        payload = {'meta': {'total_count': 2}, 'objects': {'1': 'b', '0': 'a'}}
+        page = StreamingPage(streamed_response(payload))
+        self.assertEqual(list(page), ['a', 'b'])
+        self.assertEqual(page.meta, {'meta': {'total_count': 2}})
+
+    def test_error_response_should_expose_body_in_meta(self):
+        page = StreamingPage(streamed_response({'detail': 'denied'}, status_code=403))
+        self.assertEqual(list(page), [])
+        self.assertEqual((page.status_code, page.ok), (403, False))
+        self.assertEqual(page.meta, {'detail': 'denied'})
+
+    def test_server_error_should_raise_exception(self):
+        self.assertRaises(ReadyCloudServerError, StreamingPage,
+                          streamed_response(b'boom', status_code=500))
+
+    def test_response_should_be_closed_after_iteration(self):
+        response = streamed_response({'results': []})
+        list(StreamingPage(response))
+        response.close.assert_called_once_with()
+
+    def test_invalid_json_should_raise_value_error(self):
+        self.assertRaises(ValueError, list, StreamingPage(streamed_response(b'{"results": [1,')))
+
+
+class JSONStreamScannerTestCase(unittest.TestCase):
+    def test_number_split_between_chunks_should_be_decoded_whole(self):
+        scanner = JSONStreamScanner([b'12', b'34', b'5 '])
+        self.assertEqual(scanner.value(), 12345)
+
+    def test_fraction_and_exponent_split_between_chunks_should_be_decoded_whole(self):
+        self.assertEqual(JSONStreamScanner([b'[1.', b'5]']).value(), [1.5])
+        numbers = [1.5, -0.25, 1e5, 2.5E-3, -7e+2, 10]
+        data = b'[1.5,-0.25,1e5,2.5E-3,-7e+2,10]'
+        for chunk_size in range(1, len(data) + 1):
+            scanner = JSONStreamScanner(chunked(data, chunk_size))
+            scanner.expect('[')
+            values = []
+            while True:
+                values.append(scanner.value())
+                if scanner.expect(',]') == ']':
+                    break
+            self.assertEqual(values, numbers)
+
+    def test_buffer_should_be_compacted(self):
+        scanner = JSONStreamScanner(chunked(json.dumps(list(range(100000))).encode(), 1000))
+        scanner.expect('[')
+        while True:
+            scanner.value()
+            if scanner.expect(',]') == ']':
+                break
+        self.assertLess(len(scanner.buffer), JSONStreamScanner.COMPACT_SIZE + 2000)
+
+
+class ReadyCloudStreamTestCase(unittest.TestCase):
+    @patch('requests.Session.request')
+    def test_stream_orders_should_request_streamed_response(self, request):
+        request.return_value = streamed_response({'results': [{'id': 1}]})
+        rc = ReadyCloud(token='12345', org_id='1')
+        with rc.stream_orders(limit=1000) as page:
+            self.assertEqual(list(page), [{'id': 1}])
+        request.assert_called_once_with(
+            'GET', 'https://readycloud.com/api/v2/orgs/1/orders/',
+            headers=rc.get_headers(), params={'limit': 1000}, stream=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
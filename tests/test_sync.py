@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_sync
+----------------------------------
+
+Tests for `readycloud.sync` module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+
+from readycloud.sync import (OrderSync, MemoryCheckpointStore, FileCheckpointStore,
+                             SQLiteCheckpointStore, UPSERT, DELETE)
+
+
+class FakeOrders(object):
+    def __init__(self, orders):
+        self.orders = orders
+        self.calls = []
+
+    def __call__(self, **params):
+        self.calls.append(params)
+        since = params.get('updated_at__gte')
+        orders = sorted((o for o in self.orders if since is None or o['updated_at'] >= since),
+                        key=lambda o: o['updated_at'])
+        offset, limit = params['offset'], params['limit']
+        return {'count': len(orders), 'results': orders[offset:offset + limit]}
+
+
+class OrderSyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.orders = [
+            {'id': 1, 'updated_at': '2016-01-01T00:00:00'},
+            {'id': 2, 'updated_at': '2016-01-02T00:00:00'},
+            {'id': 3, 'updated_at': '2016-01-02T00:00:00'},
+        ]
+        self.get_orders = FakeOrders(self.orders)
+        self.client = Mock(org_id='org', get_orders=self.get_orders)
+        self.store = MemoryCheckpointStore()
+        self.sync = OrderSync(self.client, self.store, limit=2)
+
+    def test_first_run_should_fetch_all_orders_and_save_checkpoint(self):
+        events = list(self.sync.run())
+        self.assertEqual([(e.action, e.order['id']) for e in events],
+                         [(UPSERT, 1), (UPSERT, 2), (UPSERT, 3)])
+        checkpoint = self.store.load('orders:org')
+        self.assertEqual(checkpoint['updated_at'], '2016-01-02T00:00:00')
+        self.assertEqual(sorted(checkpoint['ids']), [2, 3])
+        self.assertEqual(self.get_orders.calls[0]['ordering'], 'updated_at')
+
+    def test_next_run_should_fetch_only_changed_orders(self):
+        list(self.sync.run())
+        self.orders.append({'id': 1, 'updated_at': '2016-01-03T00:00:00', 'deleted': True})
+        self.orders.append({'id': 4, 'updated_at': '2016-01-02T00:00:00'})
+        events = list(self.sync.run())
+        self.assertEqual([(e.action, e.order['id']) for e in events], [(UPSERT, 4), (DELETE, 1)])
+        self.assertEqual(self.get_orders.calls[-1]['updated_at__gte'], '2016-01-02T00:00:00')
+        self.assertEqual(list(self.sync.run()), [])
+
+    def test_interrupted_run_should_continue_from_last_handled_page(self):
+        events = self.sync.run()
+        next(events)
+        next(events)
+        next(events)  # first order of second page, first page is handled
+        events.close()
+        self.assertEqual(self.store.load('orders:org'),
+                         {'updated_at': '2016-01-02T00:00:00', 'ids': [2]})
+        self.assertEqual([e.order['id'] for e in self.sync.run()], [3])
+
+    def test_order_updated_during_run_should_not_hide_others(self):
+        del self.orders[:]
+        self.orders.extend({'id': i, 'updated_at': '2016-01-0{0}T00:00:00'.format(i + 1)}
+                           for i in range(6))
+        ids = []
+        for event in self.sync.run():
+            ids.append(event.order['id'])
+            if ids == [0, 1]:
+                self.orders[0]['updated_at'] = '2016-02-01T00:00:00'
+        self.assertEqual(ids, [0, 1, 2, 3, 4, 5, 0])
+        self.assertEqual(self.store.load('orders:org'),
+                         {'updated_at': '2016-02-01T00:00:00', 'ids': [0]})
+        self.assertEqual(list(self.sync.run()), [])
+
+    def test_orders_updated_at_same_time_should_span_pages(self):
+        del self.orders[:]
+        self.orders.extend({'id': i, 'updated_at': '2016-01-01T00:00:00'} for i in range(5))
+        self.assertEqual([e.order['id'] for e in self.sync.run()], [0, 1, 2, 3, 4])
+        self.assertEqual([call['offset'] for call in self.get_orders.calls], [0, 0, 2, 4])
+
+    def test_reset_should_drop_checkpoint(self):
+        list(self.sync.run())
+        self.sync.reset()
+        self.assertEqual(len(list(self.sync.run())), 3)
+
+
+class CheckpointStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_store(self, make_store):
+        store = make_store()
+        self.assertIsNone(store.load('a'))
+        store.save('a', {'updated_at': '1', 'ids': [1]})
+        store.save('b', {'updated_at': '2', 'ids': []})
+        store.delete('b')
+        # new instance reads persisted checkpoints
+        store = make_store()
+        self.assertEqual(store.load('a'), {'updated_at': '1', 'ids': [1]})
+        self.assertIsNone(store.load('b'))
+
+    def test_file_store_should_persist_checkpoints(self):
+        path = os.path.join(self.directory, 'checkpoints.json')
+        self.check_store(lambda: FileCheckpointStore(path))
+        self.assertEqual(os.listdir(self.directory), ['checkpoints.json'])
+
+    def test_sqlite_store_should_persist_checkpoints(self):
+        path = os.path.join(self.directory, 'checkpoints.db')
+        self.check_store(lambda: SQLiteCheckpointStore(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_transport
+----------------------------------
+
+Tests for `readycloud.transport` module.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from requests.exceptions import ConnectionError, Timeout
+
+from readycloud import ReadyCloud
+from readycloud.compression import Compression
+from readycloud.transport import (AUTO, RECORD, REPLAY, CassetteTransport, HTTPXTransport,
+                                  InMemoryTransport, build_response, httpx)
+
+
+ORDERS = [{'id': i, 'number': 'RC-{0}'.format(i)} for i in range(5)]
+
+
+def handler(request):
+    if request.method == 'GET':
+        offset = request.params.get('offset', 0)
+        limit = request.params.get('limit', 100)
+        return 200, {'count': len(ORDERS), 'results': ORDERS[offset:offset + limit]}
+    if request.method == 'POST':
+        return 201, dict(request.json(), id=len(request.data))
+    return build_response(204)
+
+
+class BuildResponseTestCase(unittest.TestCase):
+    def test_build_response(self):
+        response = build_response(201, {'id': 1}, headers={'ETag': '"a"'})
+        self.assertTrue(response.ok)
+        self.assertEqual(response.json(), {'id': 1})
+        self.assertEqual(response.headers['etag'], '"a"')
+        self.assertEqual(b''.join(response.iter_content(4)), b'{"id": 1}')
+        self.assertFalse(build_response(404, b'').ok)
+
+
+class InMemoryTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.rc = ReadyCloud(token='12345', org_id='a', transport=InMemoryTransport(handler))
+
+    def test_client_should_route_requests_to_handler(self):
+        self.assertIsNone(self.rc.session)
+        self.assertEqual(self.rc.get_orders(limit=2)['results'], ORDERS[:2])
+        self.assertEqual(list(self.rc.iter_orders(limit=2)), ORDERS)
+        with self.rc.stream_orders() as page:
+            self.assertEqual(list(page), ORDERS)
+        self.assertEqual(self.rc.delete_order(1)['status_code'], 204)
+
+    def test_handler_should_receive_decompressed_body(self):
+        self.rc.compression = Compression(threshold=0)
+        response = self.rc.create_order({'number': 'RC-9'})
+        self.assertEqual(response['number'], 'RC-9')
+        self.assertEqual(response['status_code'], 201)
+
+
+class CassetteTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cassette.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        cassette = CassetteTransport(self.path, mode=RECORD,
+                                     transport=InMemoryTransport(handler))
+        with ReadyCloud(token='12345', org_id='a', transport=cassette) as rc:
+            rc.get_orders(limit=2)
+            rc.create_order({'number': 'RC-9'})
+        cassette.close()
+
+    def test_recorded_requests_should_be_replayed(self):
+        self.record()
+        rc = ReadyCloud(token='other', org_id='a', transport=CassetteTransport(self.path))
+        self.assertEqual(rc.get_orders(limit=2)['results'], ORDERS[:2])
+        self.assertEqual(rc.create_order({'number': 'RC-9'})['number'], 'RC-9')
+        self.assertRaises(ConnectionError, rc.get_orders, limit=3)
+        with open(self.path) as f:
+            self.assertNotIn('12345', f.read())
+
+    def test_auto_mode_should_record_new_requests(self):
+        self.record()
+        cassette = CassetteTransport(self.path, mode=AUTO,
+                                     transport=InMemoryTransport(handler))
+        rc = ReadyCloud(token='12345', org_id='a', transport=cassette)
+        rc.get_orders(limit=3)
+        cassette.close()
+        self.assertEqual(len(CassetteTransport(self.path, mode=REPLAY).interactions), 3)
+
+    def test_unknown_mode_should_be_rejected(self):
+        self.assertRaises(ValueError, CassetteTransport, self.path, mode='rewind')
+
+
+class HTTPXTransportTestCase(unittest.TestCase):
+    @unittest.skipIf(httpx is not None, 'httpx is installed')
+    def test_transport_should_require_httpx(self):
+        self.assertRaises(ImportError, HTTPXTransport)
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class HTTPXMockTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.error = None
+        client = httpx.Client(transport=httpx.MockTransport(self.handler),
+                              timeout=httpx.Timeout(7.0))
+        self.transport = HTTPXTransport(client=client)
+        self.rc = ReadyCloud(token='12345', org_id='a', transport=self.transport)
+
+    def handler(self, request):
+        self.requests.append(request)
+        if self.error is not None:
+            raise self.error
+        if request.method == 'POST':
+            status, data = 201, dict(json.loads(request.content), id=1)
+        else:
+            offset = int(request.url.params.get('offset', 0))
+            limit = int(request.url.params.get('limit', 100))
+            status, data = 200, {'count': len(ORDERS), 'results': ORDERS[offset:offset + limit]}
+        # unread stream, like response of network transport
+        return httpx.Response(status, headers={'Content-Type': 'application/json'},
+                              stream=httpx.ByteStream(json.dumps(data).encode('utf-8')))
+
+    def test_buffered_response(self):
+        self.assertEqual(self.rc.get_orders(limit=2)['results'], ORDERS[:2])
+        self.assertEqual(self.rc.create_order({'number': 'RC-9'})['id'], 1)
+        request = self.requests[0]
+        self.assertEqual(request.url.params['limit'], '2')
+        self.assertEqual(request.headers['authorization'], 'bearer 12345')
+        self.assertEqual(json.loads(self.requests[1].content), {'number': 'RC-9'})
+
+    def test_client_timeout_should_be_used_by_default(self):
+        self.transport.request('GET', 'https://readycloud.com/api/v2/orgs/a/orders/')
+        self.assertEqual(self.requests[0].extensions['timeout']['read'], 7.0)
+        self.transport.request('GET', 'https://readycloud.com/api/v2/orgs/a/orders/',
+                               timeout=2)
+        self.assertEqual(self.requests[1].extensions['timeout']['read'], 2)
+
+    def test_streamed_response(self):
+        with self.rc.stream_orders(chunk_size=16) as page:
+            self.assertEqual(list(page), ORDERS)
+
+    def test_body_should_be_read_in_chunks(self):
+        response = self.transport.request('GET', 'https://readycloud.com/api/v2/orgs/a/orders/',
+                                          stream=True)
+        head = response.raw.read(10)
+        self.assertEqual(len(head), 10)
+        body = head + response.raw.read()
+        self.assertEqual(json.loads(body.decode('utf-8'))['results'], ORDERS)
+        self.assertEqual(response.raw.read(10), b'')
+        self.assertEqual(response.raw.tell(), len(body))
+        response.raw.close()
+
+    def test_timeout_should_be_raised_as_requests_timeout(self):
+        self.error = httpx.ReadTimeout('timed out')
+        self.assertRaises(Timeout, self.rc.get_orders)
+
+    def test_transport_error_should_be_raised_as_connection_error(self):
+        self.error = httpx.ConnectError('refused')
+        self.assertRaises(ConnectionError, self.rc.get_orders)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,7 +12,7 @@ import unittest
 
 from mock import Mock
 
-from readycloud.utils import urljoin, get_response_json
+from readycloud.utils import urljoin, get_response_json, get_endpoint_template
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -58,5 +58,15 @@ class UtilsTestCase(unittest.TestCase):
             }
         )
 
+    def test_get_endpoint_template(self):
+        self.assertEqual(
+            get_endpoint_template('https://readycloud.com/api/v2/orgs/abc/orders/12/?limit=1'),
+            '/api/v2/orgs/{org}/orders/{id}/')
+        self.assertEqual(get_endpoint_template('https://readycloud.com/api/v1/webhooks/3/'),
+                         '/api/v1/webhooks/{id}/')
+        self.assertEqual(get_endpoint_template('https://readycloud.com/api/v2/orgs/'),
+                         '/api/v2/orgs/')
+        self.assertEqual(get_endpoint_template('/api/v1/boxes'), '/api/v1/boxes')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+test_webhooks
+----------------------------------
+
+Tests for `readycloud.webhooks` module.
+"""
+
+import asyncio
+import io
+import json
+import threading
+import unittest
+
+from readycloud import ReadyCloud
+from readycloud.transport import InMemoryTransport
+from readycloud.webhooks import (CREATE, DELETE, UPDATE, WebhookChange, WebhookReceiver,
+                                 diff_webhooks)
+
+
+def deliver(receiver, payload, method='POST'):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    environ = {
+        'REQUEST_METHOD': method,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    responses = []
+    result = receiver(environ, lambda status, headers: responses.append((status, dict(headers))))
+    assert result == [b'']
+    return responses[0]
+
+
+class WebhookReceiverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.receiver = WebhookReceiver(self.batches.append, batch_size=3, batch_timeout=0.01)
+
+    def tearDown(self):
+        self.receiver.stop()
+
+    def test_delivery_should_be_acknowledged_and_dispatched(self):
+        status, _ = deliver(self.receiver, {'id': 1, 'status': 'new'})
+        self.assertEqual(status, '202 Accepted')
+        self.receiver.stop()
+        self.assertEqual(self.batches, [[{'id': 1, 'status': 'new'}]])
+        self.assertEqual(self.receiver.stats['processed'], 1)
+
+    def test_queued_deliveries_should_be_dispatched_in_batches(self):
+        for i in range(7):
+            self.receiver.queue.put(json.dumps({'id': i}).encode('utf-8'))
+        self.receiver.start()
+        self.receiver.stop()
+        self.assertEqual(sorted(len(batch) for batch in self.batches), [1, 3, 3])
+        self.assertEqual(sorted(event['id'] for batch in self.batches for event in batch),
+                         list(range(7)))
+        self.assertEqual(self.receiver.stats['batches'], 3)
+
+    def test_only_post_should_be_accepted(self):
+        self.assertEqual(deliver(self.receiver, b'', method='GET')[0], '405 Method Not Allowed')
+
+    def test_big_delivery_should_be_rejected(self):
+        self.receiver.max_body_size = 5
+        self.assertEqual(deliver(self.receiver, {'id': 1})[0], '413 Payload Too Large')
+
+    def test_invalid_payloads_and_handler_errors_should_be_counted(self):
+        def handler(events):
+            if any(event.get('fail') for event in events):
+                raise ValueError('handler failed')
+
+        receiver = WebhookReceiver(handler, batch_size=1)
+        deliver(receiver, b'<html>')
+        deliver(receiver, {'fail': True})
+        deliver(receiver, {'id': 1})
+        receiver.stop()
+        self.assertEqual(receiver.stats['failed'], 2)
+        self.assertEqual(receiver.stats['processed'], 1)
+
+    def test_full_queue_should_reject_deliveries(self):
+        release = threading.Event()
+        receiver = WebhookReceiver(lambda events: release.wait(), batch_size=1, max_queue=2,
+                                   workers=1, retry_after=5)
+        responses = [deliver(receiver, {'id': i}) for i in range(20)]
+        rejected = [headers for status, headers in responses
+                    if status == '503 Service Unavailable']
+        self.assertTrue(rejected)
+        self.assertEqual(rejected[0]['Retry-After'], '5')
+        release.set()
+        receiver.stop()
+        stats = receiver.stats
+        self.assertEqual(stats['received'] + stats['rejected'], 20)
+        self.assertEqual(stats['processed'], stats['received'])
+
+    def test_asgi_application(self):
+        messages = [
+            {'type': 'http.request', 'body': b'{"id"', 'more_body': True},
+            {'type': 'http.request', 'body': b': 1}'},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.receiver.asgi({'type': 'http', 'method': 'POST'}, receive, send))
+        self.receiver.stop()
+        self.assertEqual(sent[0]['status'], 202)
+        self.assertEqual(self.batches, [[{'id': 1}]])
+
+
+class DiffWebhooksTestCase(unittest.TestCase):
+    existing = [
+        {'id': 1, 'entity': 'orders', 'url': 'https://a.com/'},
+        {'id': 2, 'entity': 'orders', 'url': 'https://a.com/'},
+        {'id': 3, 'entity': 'orders', 'url': 'https://old.com/'},
+        {'id': 4, 'entity': 'shipments', 'url': 'https://old.com/'},
+    ]
+
+    def test_changes_should_reuse_stale_webhooks(self):
+        desired = [('orders', 'https://a.com/'), ('orders', 'https://b.com/'),
+                   ('returns', 'https://a.com/')]
+        self.assertEqual(diff_webhooks(self.existing, desired, prune=True), [
+            WebhookChange(DELETE, 2, 'orders', 'https://a.com/', None),
+            WebhookChange(UPDATE, 3, 'orders', 'https://b.com/', 'https://old.com/'),
+            WebhookChange(CREATE, None, 'returns', 'https://a.com/', None),
+            WebhookChange(DELETE, 4, 'shipments', 'https://old.com/', None),
+        ])
+
+    def test_stale_webhooks_should_be_kept_without_prune(self):
+        desired = [('orders', 'https://a.com/'), ('orders', 'https://b.com/')]
+        self.assertEqual(diff_webhooks(self.existing, desired), [
+            WebhookChange(DELETE, 2, 'orders', 'https://a.com/', None),
+            WebhookChange(CREATE, None, 'orders', 'https://b.com/', None),
+        ])
+
+    def test_registered_webhooks_should_not_be_changed(self):
+        self.assertEqual(diff_webhooks(self.existing[:1], [('orders', 'https://a.com/')]), [])
+
+
+class SyncWebhooksTestCase(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        webhooks = [{'id': i, 'entity': 'orders', 'url': 'https://{0}.com/'.format(i)}
+                    for i in range(150)]
+
+        def handler(request):
+            self.requests.append((request.method, request.path))
+            if request.method == 'GET':
+                offset = request.params.get('offset', 0)
+                return 200, {'count': len(webhooks),
+                             'results': webhooks[offset:offset + request.params['limit']]}
+            if request.path.endswith('/13/'):
+                return 500, b'boom'
+            return (201 if request.method == 'POST' else 200), {'id': 1}
+
+        self.rc = ReadyCloud(token='12345', transport=InMemoryTransport(handler))
+
+    def test_only_needed_calls_should_be_sent(self):
+        report = self.rc.sync_webhooks({'orders': 'https://0.com/', 'shipments': 'https://s.com/'},
+                                       prune=True)
+        self.assertEqual(len(report.changes), 150)
+        self.assertEqual(report.unchanged, 1)
+        self.assertEqual([r for r in self.requests if r[0] == 'GET'],
+                         [('GET', '/api/v1/webhooks/')] * 2)
+        self.assertEqual(sorted(set(r[0] for r in self.requests)), ['DELETE', 'GET', 'POST'])
+        self.assertEqual([result.item.webhook_id for result in report.failed], [13])
+
+    def test_stale_webhooks_should_be_kept_by_default(self):
+        report = self.rc.sync_webhooks({'orders': 'https://0.com/', 'shipments': 'https://s.com/'})
+        self.assertEqual(report.changes,
+                         [WebhookChange(CREATE, None, 'shipments', 'https://s.com/', None)])
+        self.assertEqual(report.unchanged, 150)
+        self.assertNotIn('DELETE', set(r[0] for r in self.requests))
+
+    def test_dry_run_should_not_change_webhooks(self):
+        report = self.rc.sync_webhooks([('orders', 'https://new.com/')], prune=True,
+                                       dry_run=True)
+        self.assertTrue(report.dry_run)
+        self.assertEqual(report.results, [])
+        self.assertEqual(report.changes[0],
+                         WebhookChange(UPDATE, 0, 'orders', 'https://new.com/', 'https://0.com/'))
+        self.assertEqual(set(r[0] for r in self.requests), {'GET'})
+
+
+if __name__ == '__main__':
+    unittest.main()